@@ -0,0 +1,35 @@
+"""
+Converting JSON received from Telegram to DepyTG objects.
+"""
+import warnings
+
+from depytg import depyfier, methods, types
+from depytg.internals import json_codec
+
+import payloads
+
+warnings.simplefilter("ignore")
+
+
+def bench_update_from_json(fresh, mode, updates_response):
+    fresh(lambda updates: [types.Update.from_json(u) for u in updates], updates_response["result"])
+
+
+def bench_reply_chain_from_json(fresh, mode):
+    fresh(types.Message.from_json, payloads.reply_chain(10))
+
+
+def bench_depyfy(fresh, mode, updates_response):
+    # set_mode() rebinds depyfier.depyfy, look it up after the mode fixture ran
+    depyfy = depyfier.depyfy
+    fresh(lambda updates: depyfy(updates, methods.getUpdates.ReturnType), updates_response["result"])
+
+
+def bench_read_result(benchmark, mode, updates_response):
+    body = json_codec.dumpb(updates_response)
+    benchmark(methods.getUpdates.read_result, body)
+
+
+def bench_json_loads(benchmark, updates_response):
+    body = json_codec.dumpb(updates_response)
+    benchmark(json_codec.loads, body)
@@ -0,0 +1,46 @@
+"""
+Building objects and accessing their fields.
+"""
+from depytg import methods, types
+
+import payloads
+
+
+def bench_construct_message(benchmark, mode):
+    def construct():
+        return methods.sendMessage(
+            -1001000000000, "Hello *world*", parse_mode="Markdown", disable_web_page_preview=True,
+            reply_markup=types.InlineKeyboardMarkup([[types.InlineKeyboardButton("Yes", callback_data="yes"),
+                                                      types.InlineKeyboardButton("No", callback_data="no")]]))
+
+    benchmark(construct)
+
+
+def bench_construct_inline_results(benchmark, mode):
+    benchmark(payloads.inline_results, 50)
+
+
+def bench_getattr(benchmark, mode):
+    update = types.Update.from_json({"update_id": 1, "message": payloads.reply_chain(1)})
+
+    def get():
+        message = update.message
+        return message.chat.id, message.from_.id, message.date, message.reply_to_message.message_id
+
+    benchmark(get)
+
+
+def bench_setattr(benchmark, mode):
+    message = types.Message.from_json(payloads.message(0))
+
+    def set_():
+        message.text = "Edited"
+        message.edit_date = 1530000100
+        message.caption = None
+
+    benchmark(set_)
+
+
+def bench_compact(benchmark, mode, updates):
+    decoded = [types.Update.from_json(u) for u in updates]
+    benchmark(lambda: [u.compact() for u in decoded])
@@ -0,0 +1,63 @@
+"""
+Preparing requests and sending them to a local stub server.
+"""
+import asyncio
+
+import pytest
+
+import depytg
+from depytg import methods
+
+import payloads
+
+TOKEN = "123456:benchmark"
+
+
+def bench_prepare_json(benchmark):
+    method = payloads.inline_results(50)
+    benchmark(method._prepare_for_call, TOKEN)
+
+
+def bench_prepare_multipart(benchmark):
+    method = payloads.upload()
+    benchmark(method._prepare_for_call, TOKEN)
+
+
+def bench_client_send_message(benchmark, stub):
+    with depytg.Client(TOKEN, url_template=stub) as client:
+        benchmark(client.call, methods.sendMessage(1000, "Hello"))
+
+
+def bench_client_get_updates(benchmark, stub):
+    with depytg.Client(TOKEN, url_template=stub) as client:
+        benchmark(client.call, methods.getUpdates(timeout=0))
+
+
+def bench_client_upload(benchmark, stub):
+    method = payloads.upload()
+    photo = method.photo.file
+
+    def send():
+        photo.seek(0)
+        return client.call(method)
+
+    with depytg.Client(TOKEN, url_template=stub) as client:
+        benchmark(send)
+
+
+def bench_async_client_concurrent(benchmark, stub):
+    pytest.importorskip("aiohttp")
+    from depytg import AsyncClient
+
+    loop = asyncio.new_event_loop()
+    client = AsyncClient(TOKEN, url_template=stub)
+
+    async def send_many():
+        # 100 concurrent requests over the connection pool
+        await asyncio.gather(*(client.call(methods.sendMessage(1000 + i, "Hello")) for i in range(100)))
+
+    try:
+        benchmark(lambda: loop.run_until_complete(send_many()))
+    finally:
+        loop.run_until_complete(client.close())
+        loop.close()
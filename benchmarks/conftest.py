@@ -0,0 +1,51 @@
+import copy
+
+import pytest
+
+import depytg
+from depytg.depyfier import MODES
+
+import payloads
+import stub_server
+
+
+@pytest.fixture(params=MODES)
+def mode(request):
+    """
+    Runs the benchmark in every conversion mode.
+    """
+    previous = depytg.get_mode()
+    depytg.set_mode(request.param)
+    yield request.param
+    depytg.set_mode(previous)
+
+
+@pytest.fixture(scope="session")
+def updates_response() -> dict:
+    return payloads.get_updates_response(100)
+
+
+@pytest.fixture
+def updates(updates_response) -> list:
+    # Decoders may keep references to the input, give every benchmark its own copy
+    return copy.deepcopy(updates_response["result"])
+
+
+@pytest.fixture
+def fresh(benchmark):
+    """
+    Benchmarks fn(data) giving every round its own deep copy of 'data', since decoding may modify its input in place
+    and later rounds would only measure converting already converted objects. Copying isn't measured.
+    """
+
+    def run(fn, data, rounds: int = 50):
+        benchmark.pedantic(fn, setup=lambda: ((copy.deepcopy(data),), {}), rounds=rounds)
+
+    return run
+
+
+@pytest.fixture(scope="session")
+def stub():
+    server, url_template = stub_server.start()
+    yield url_template
+    server.shutdown()
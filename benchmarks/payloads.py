@@ -0,0 +1,115 @@
+"""
+Realistic Bot API payloads. They are deterministic, so that results are comparable between runs.
+"""
+import io
+import random
+
+from depytg import methods, types
+
+
+def user(i: int) -> dict:
+    return {"id": 1000 + i, "is_bot": False, "first_name": "User{}".format(i), "username": "user{}".format(i),
+            "language_code": "en"}
+
+
+def chat(i: int, chat_type: str = "private") -> dict:
+    if chat_type == "private":
+        return {"id": 1000 + i, "type": chat_type, "first_name": "User{}".format(i)}
+    return {"id": -1001000000000 - i, "type": chat_type, "title": "Group {}".format(i)}
+
+
+def photo(i: int) -> list:
+    return [{"file_id": "AgADBAAD{}_{}".format(i, size), "width": 90 * size, "height": 60 * size,
+             "file_size": 1000 * size} for size in (1, 4, 8)]
+
+
+def message(i: int, depth: int = 1) -> dict:
+    """
+    A message of a random kind: text with entities, photo, document, forward or reply. Replies contain another
+    message, up to 'depth' levels.
+    """
+    r = random.Random(i)
+    kind = r.choice(("text", "photo", "document", "forward", "reply"))
+    m = {"message_id": i, "from": user(i % 50), "date": 1530000000 + i,
+         "chat": chat(i % 20, r.choice(("private", "supergroup")))}
+
+    if kind == "photo":
+        m["photo"] = photo(i)
+        m["caption"] = "Caption {}".format(i)
+    elif kind == "document":
+        m["document"] = {"file_id": "BQADBAAD{}".format(i), "file_name": "file{}.pdf".format(i),
+                         "mime_type": "application/pdf", "thumb": photo(i)[0], "file_size": 123456}
+    else:
+        m["text"] = "/start hello @user{} https://example.com".format(i)
+        m["entities"] = [{"type": "bot_command", "offset": 0, "length": 6},
+                         {"type": "mention", "offset": 13, "length": 6},
+                         {"type": "url", "offset": 20, "length": 19}]
+
+    if kind == "reply" and depth > 0:
+        m["reply_to_message"] = message(i + 7, depth - 1)
+    elif kind == "forward":
+        m["forward_from"] = user(i + 3)
+        m["forward_date"] = 1520000000
+    return m
+
+
+def reply_chain(depth: int) -> dict:
+    """
+    A message replying to a message replying to another one, 'depth' levels deep, each with a pinned message.
+    """
+    m = message(0, 0)
+    for i in range(1, depth + 1):
+        reply = message(i * 10, 0)
+        reply["reply_to_message"] = m
+        reply["pinned_message"] = message(i * 10 + 1, 0)
+        m = reply
+    return m
+
+
+def update(i: int) -> dict:
+    r = random.Random(i * 31)
+    kind = r.choice(("message", "message", "message", "edited_message", "callback_query", "inline_query"))
+    u = {"update_id": 500000 + i}
+
+    if kind in ("message", "edited_message"):
+        u[kind] = message(i)
+        if kind == "edited_message":
+            u[kind]["edit_date"] = 1530000100 + i
+    elif kind == "callback_query":
+        u[kind] = {"id": str(i), "from": user(i % 50), "message": message(i), "chat_instance": "ci{}".format(i),
+                   "data": "button:{}".format(i)}
+    else:
+        u[kind] = {"id": str(i), "from": user(i % 50), "query": "search {}".format(i), "offset": ""}
+    return u
+
+
+def get_updates_response(n: int = 100) -> dict:
+    """
+    A getUpdates response with 'n' updates of mixed kinds.
+    """
+    return {"ok": True, "result": [update(i) for i in range(n)]}
+
+
+def inline_results(n: int = 50) -> methods.answerInlineQuery:
+    """
+    An answerInlineQuery call with 'n' articles, each with a keyboard.
+    """
+    results = []
+    for i in range(n):
+        keyboard = types.InlineKeyboardMarkup([[types.InlineKeyboardButton("Open {}".format(i),
+                                                                           url="https://example.com/{}".format(i)),
+                                                types.InlineKeyboardButton("Share", switch_inline_query=str(i))]])
+        results.append(types.InlineQueryResultArticle(
+            "article", str(i), "Result {}".format(i),
+            types.InputTextMessageContent("Result *{}*".format(i), parse_mode="Markdown"),
+            reply_markup=keyboard, description="Description of result {}".format(i),
+            thumb_url="https://example.com/{}.jpg".format(i)))
+    return methods.answerInlineQuery("query-id", results, cache_time=300)
+
+
+def upload(size: int = 1024 * 1024) -> methods.sendPhoto:
+    """
+    A sendPhoto call uploading 'size' bytes.
+    """
+    data = io.BytesIO(bytes(random.Random(size).getrandbits(8) for _ in range(min(size, 4096))) * (size // 4096 or 1))
+    return methods.sendPhoto(-1001000000000, types.InputFile(data, "image/jpeg", "photo.jpg"), caption="Photo")
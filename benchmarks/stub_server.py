@@ -0,0 +1,72 @@
+"""
+A local stand-in for the Bot API, answering every method with a canned response. It's used to measure client
+throughput without network latency or Telegram's rate limits.
+
+    python stub_server.py 8081
+"""
+import json
+import socket
+import sys
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+from typing import Tuple
+
+from payloads import get_updates_response, message
+
+_get_updates = json.dumps(get_updates_response()).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Small responses would otherwise wait for delayed ACKs
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        method = self.path.rsplit("/", 1)[-1]
+
+        if method == "getUpdates":
+            out = _get_updates
+        elif method in ("sendMessage", "sendPhoto"):
+            result = message(1, 0)
+            if self.headers.get("Content-Type", "").startswith("application/json"):
+                result["text"] = json.loads(body).get("text", "")
+            out = json.dumps({"ok": True, "result": result}).encode()
+        else:
+            out = b'{"ok":true,"result":true}'
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(out)))
+        self.end_headers()
+        self.wfile.write(out)
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    # http.server.ThreadingHTTPServer is only available since Python 3.7
+    daemon_threads = True
+
+
+def start(port: int = 0) -> Tuple[StubServer, str]:
+    """
+    Starts the server in a daemon thread.
+    :param port: (int) Optional. Port to listen on, by default a free one is picked.
+    :return: The server and the url_template to pass to clients
+    """
+    server = StubServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, "http://127.0.0.1:{}/bot{{token}}/{{method}}".format(server.server_address[1])
+
+
+if __name__ == "__main__":
+    server, url = start(int(sys.argv[1]) if len(sys.argv) > 1 else 8081)
+    print("Listening on", url)
+    threading.Event().wait()
@@ -1,8 +1,18 @@
-__all__ = ('methods', 'types', 'errors', 'webhooks', 'API_VERSION')
+__all__ = ('methods', 'types', 'errors', 'webhooks', 'API_VERSION', 'set_mode', 'get_mode', 'Client',
+           'AsyncClient', 'RateLimiter', 'RetryPolicy')
 
 API_VERSION = "3.6"
 
 from . import methods, types, errors
+from .depyfier import set_mode, get_mode
+from .client import Client
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+
+try:
+    from .aio import AsyncClient
+except ImportError:
+    pass
 
 try:
     from . import webhooks
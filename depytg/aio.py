@@ -0,0 +1,223 @@
+import asyncio
+from typing import BinaryIO, Optional, TypeVar, Union
+
+import aiohttp
+
+from depytg.download import DownloadCache, DownloadTarget, GetFileCache, Transfer, copy_file
+from depytg.errors import TelegramError, FloodWait
+from depytg.internals import TelegramMethodBase, TelegramObjectBase, _rewind_files, base_url, file_url
+from depytg.methods import getFile
+from depytg.multipart import CHUNK_SIZE
+from depytg.ratelimit import RateLimiter
+from depytg.retry import RetryPolicy, DEFAULT_POLICY
+from depytg.uploadcache import UploadCache
+
+R = TypeVar("R")
+
+
+class AsyncClient(object):
+    """
+    Calls Telegram Bot API methods from asyncio code, using a shared aiohttp session with a pool of persistent
+    connections. Any number of tasks can call methods concurrently, requests beyond the connection limit wait for
+    a free connection.
+
+    >>> async with AsyncClient("my_bot_token") as client:
+    ...     await client.call(methods.sendMessage(chat_id, "Hello"))
+    Message(...)
+
+    :param token: (str) The bot's API token
+    :param limit: (int) Optional. Maximum number of simultaneous connections. Defaults to 100.
+    :param timeout: (float) Optional. Request timeout in seconds. The long polling timeout of getUpdates is added to
+    it. Defaults to no timeout.
+    :param keepalive_timeout: (float) Optional. Seconds an idle connection is kept open. Defaults to 60.
+    :param dns_cache_ttl: (int) Optional. Seconds DNS lookups are cached for. Defaults to 300.
+    :param url_template: (str) Optional. API URL with {token} and {method} placeholders, to use a local Bot API server.
+    :param session: (aiohttp.ClientSession) Optional. The session to use instead of a new one. It's used as it is and
+    it's not closed by close().
+    :param rate_limiter: (RateLimiter) Optional. If specified, message sending methods wait until Telegram's limits
+    allow them to be sent.
+    :param retry_policy: (RetryPolicy) Optional. Decides which failed calls are repeated. Defaults to RetryPolicy(),
+    pass None to never repeat calls.
+    :param upload_cache: (UploadCache) Optional. If specified, files that were already uploaded are sent by file_id
+    instead of being uploaded again, see depytg.uploadcache. Files are hashed in the default executor.
+    :param file_url_template: (str) Optional. File download URL with {token} and {path} placeholders, to use a local
+    Bot API server.
+    :param download_cache: (DownloadCache) Optional. If specified, downloaded files are kept on disk and downloading
+    them again copies them from there, see depytg.download.
+    :param getfile_cache: (GetFileCache) Optional. If specified, getFile results are reused until they expire and
+    concurrent getFile calls for the same file are coalesced into one request, see depytg.download.
+    """
+
+    def __init__(self, token: str, limit: int = 100, timeout: Optional[float] = None, keepalive_timeout: float = 60,
+                 dns_cache_ttl: int = 300, url_template: str = base_url, session: aiohttp.ClientSession = None,
+                 rate_limiter: RateLimiter = None, retry_policy: Optional[RetryPolicy] = DEFAULT_POLICY,
+                 upload_cache: UploadCache = None, file_url_template: str = file_url,
+                 download_cache: DownloadCache = None,
+                 getfile_cache: GetFileCache = None):
+        self.token = token
+        self.timeout = timeout
+        self.url_template = url_template
+        self.rate_limiter = rate_limiter
+        self.retry_policy = RetryPolicy() if retry_policy is DEFAULT_POLICY else retry_policy
+        self.upload_cache = upload_cache
+        self.file_url_template = file_url_template
+        self.download_cache = download_cache
+        self.getfile_cache = getfile_cache
+
+        self._limit = limit
+        self._keepalive_timeout = keepalive_timeout
+        self._dns_cache_ttl = dns_cache_ttl
+        self._owns_session = session is None
+        self._session = session
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        The aiohttp session, created on first use since it must be created inside the event loop.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._limit,
+                                             keepalive_timeout=self._keepalive_timeout,
+                                             use_dns_cache=True,
+                                             ttl_dns_cache=self._dns_cache_ttl)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+            self._owns_session = True
+        return self._session
+
+    async def call(self, method: TelegramMethodBase) -> R:
+        """
+        Sends a method to Telegram and returns its result.
+        :param method: The method to call, i.e. methods.sendMessage(...)
+        :return: The method's result
+        """
+        if self.getfile_cache is not None and isinstance(method, getFile):
+            return await self.getfile_cache.async_call(method["file_id"], lambda: self._call(method))
+
+        if self.upload_cache is None:
+            return await self._call(method)
+
+        # Hashing reads the files, keep it off the event loop
+        method, uploads = await asyncio.get_event_loop().run_in_executor(None, self.upload_cache.prepare, method)
+        try:
+            result = await self._call(method)
+        except TelegramError as e:
+            if not self.upload_cache.restore(uploads, e):
+                raise
+            # A cached file_id was rejected, upload the files instead
+            result = await self._call(method)
+
+        self.upload_cache.update(uploads, result)
+        return result
+
+    async def _call(self, method: TelegramMethodBase) -> R:
+        timeout = None
+        if self.timeout is not None and method.get("timeout"):
+            # getUpdates long polling
+            timeout = aiohttp.ClientTimeout(total=self.timeout + method["timeout"])
+
+        # Files are read to the end by each attempt, and must be rewound before repeating the call
+        positions = method._file_positions()
+
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.reserve(method)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            try:
+                return await method.async_call(self.session, self.token, timeout, self.url_template)
+            except TelegramError as e:
+                delay = None if self.retry_policy is None else self.retry_policy.retry_delay(method, e, attempt)
+                if delay is None or positions is None:
+                    raise
+
+                if self.rate_limiter is not None and isinstance(e, FloodWait):
+                    # The next reservation of rate limited methods waits, along with other calls to the same chat
+                    self.rate_limiter.backoff(method, delay)
+                    if not self.rate_limiter.is_limited(method) and delay > 0:
+                        await asyncio.sleep(delay)
+                elif delay > 0:
+                    await asyncio.sleep(delay)
+                _rewind_files(positions)
+                attempt += 1
+
+    async def download(self, file: Union[TelegramObjectBase, str], dest: Union[str, BinaryIO],
+                       chunk_size: int = CHUNK_SIZE, retries: int = 3):
+        """
+        Downloads a file sent to the bot, writing it in chunks as it's received. Works like Client.download(), file
+        I/O is done in the default executor. The client's timeout applies to each read from the connection rather
+        than to the whole download.
+
+        >>> await client.download(message.document, "report.pdf")
+
+        :param file: (File, or any object with a file_id such as Document or PhotoSize, or str) The file or its file_id.
+        getFile is called unless the file is in the download cache or a File with a file_path is passed.
+        :param dest: (str or BinaryIO) Path to save the file to, or a binary file open for writing
+        :param chunk_size: (int) Optional. Size of the chunks written to 'dest'. Defaults to 64 KiB.
+        :param retries: (int) Optional. How many times an interrupted download is resumed. Defaults to 3.
+        """
+        file_id = file if isinstance(file, str) else file["file_id"]
+        loop = asyncio.get_event_loop()
+
+        cache = self.download_cache
+        if cache is not None:
+            cached = await loop.run_in_executor(None, cache.open, file_id)
+            if cached is not None:
+                with cached:
+                    await loop.run_in_executor(None, copy_file, cached, dest, chunk_size)
+                return
+
+        if isinstance(file, str) or not file.get("file_path"):
+            file = await self.call(getFile(file_id))
+
+        target = DownloadTarget(cache, file_id, dest, chunk_size)
+        f, start = await loop.run_in_executor(None, target.open)
+        try:
+            await self._transfer(Transfer(file, f, start, self.file_url_template, self.token, retries), file_id,
+                                 chunk_size)
+        except BaseException:
+            target.abort()
+            raise
+        await loop.run_in_executor(None, target.finish)
+
+    async def _transfer(self, transfer: Transfer, file_id: str, chunk_size: int):
+        loop = asyncio.get_event_loop()
+        # The session's timeout would limit the whole download, only limit waiting for data instead
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+
+        request = transfer.next_request()
+        while request is not None:
+            url, headers = request
+            try:
+                async with self.session.get(url, headers=headers, timeout=timeout) as r:
+                    if transfer.check_status(r.status):
+                        async for chunk in r.content.iter_chunked(chunk_size):
+                            await loop.run_in_executor(None, transfer.f.write, chunk)
+                        if transfer.complete():
+                            return
+            except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                transfer.interrupted(e)
+
+            if transfer.expired:
+                if self.getfile_cache is not None:
+                    self.getfile_cache.discard(file_id)
+                transfer.refresh(await self.call(getFile(file_id)))
+            request = transfer.next_request()
+
+    async def close(self):
+        """
+        Closes the session and all its connections, unless it was provided by the caller.
+        """
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+
+    async def __aenter__(self) -> 'AsyncClient':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __repr__(self):
+        return "{}(token='{}...')".format(self.__class__.__name__, self.token.split(":")[0])
@@ -0,0 +1,212 @@
+import socket
+import time
+from typing import BinaryIO, Optional, TypeVar, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from depytg.download import DownloadCache, GetFileCache, Transfer, copy_file, download_target
+from depytg.errors import TelegramError, FloodWait
+from depytg.internals import TelegramMethodBase, TelegramObjectBase, _rewind_files, base_url, file_url
+from depytg.methods import getFile
+from depytg.multipart import CHUNK_SIZE
+from depytg.ratelimit import RateLimiter
+from depytg.retry import RetryPolicy, DEFAULT_POLICY
+from depytg.uploadcache import UploadCache
+
+R = TypeVar("R")
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that enables TCP keep-alive, so that idle pooled connections dropped by the network are detected
+    instead of failing the next request.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault("socket_options", HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        ])
+        super().init_poolmanager(*args, **kwargs)
+
+
+class Client(object):
+    """
+    Calls Telegram Bot API methods reusing a pool of persistent connections, instead of opening a new one for
+    every request like calling the method with a token does.
+
+    >>> client = Client("my_bot_token")
+    >>> client(methods.sendMessage(chat_id, "Hello"))
+    Message(...)
+
+    :param token: (str) The bot's API token
+    :param pool_size: (int) Optional. Maximum number of connections kept open, requests made by more threads than
+    this wait for a free connection. Defaults to 10.
+    :param timeout: (float) Optional. Request timeout in seconds. The long polling timeout of getUpdates is added to
+    it. Defaults to no timeout.
+    :param url_template: (str) Optional. API URL with {token} and {method} placeholders, to use a local Bot API server.
+    :param session: (requests.Session) Optional. The session to use instead of a new one. It's used as it is.
+    :param rate_limiter: (RateLimiter) Optional. If specified, message sending methods wait until Telegram's limits
+    allow them to be sent.
+    :param retry_policy: (RetryPolicy) Optional. Decides which failed calls are repeated. Defaults to RetryPolicy(),
+    pass None to never repeat calls.
+    :param upload_cache: (UploadCache) Optional. If specified, files that were already uploaded are sent by file_id
+    instead of being uploaded again, see depytg.uploadcache.
+    :param file_url_template: (str) Optional. File download URL with {token} and {path} placeholders, to use a local
+    Bot API server.
+    :param download_cache: (DownloadCache) Optional. If specified, downloaded files are kept on disk and downloading
+    them again copies them from there, see depytg.download.
+    :param getfile_cache: (GetFileCache) Optional. If specified, getFile results are reused until they expire and
+    concurrent getFile calls for the same file are coalesced into one request, see depytg.download.
+    """
+
+    def __init__(self, token: str, pool_size: int = 10, timeout: Optional[float] = None,
+                 url_template: str = base_url, session: requests.Session = None, rate_limiter: RateLimiter = None,
+                 retry_policy: Optional[RetryPolicy] = DEFAULT_POLICY, upload_cache: UploadCache = None,
+                 file_url_template: str = file_url, download_cache: DownloadCache = None,
+                 getfile_cache: GetFileCache = None):
+        self.token = token
+        self.timeout = timeout
+        self.url_template = url_template
+        self.rate_limiter = rate_limiter
+        self.retry_policy = RetryPolicy() if retry_policy is DEFAULT_POLICY else retry_policy
+        self.upload_cache = upload_cache
+        self.file_url_template = file_url_template
+        self.download_cache = download_cache
+        self.getfile_cache = getfile_cache
+
+        if session is None:
+            session = requests.Session()
+            adapter = _KeepAliveAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+        self.session = session
+
+    def call(self, method: TelegramMethodBase) -> R:
+        """
+        Sends a method to Telegram and returns its result.
+        :param method: The method to call, i.e. methods.sendMessage(...)
+        :return: The method's result
+        """
+        if self.getfile_cache is not None and isinstance(method, getFile):
+            return self.getfile_cache.call(method["file_id"], lambda: self._call(method))
+
+        if self.upload_cache is None:
+            return self._call(method)
+
+        method, uploads = self.upload_cache.prepare(method)
+        try:
+            result = self._call(method)
+        except TelegramError as e:
+            if not self.upload_cache.restore(uploads, e):
+                raise
+            # A cached file_id was rejected, upload the files instead
+            result = self._call(method)
+
+        self.upload_cache.update(uploads, result)
+        return result
+
+    __call__ = call
+
+    def _call(self, method: TelegramMethodBase) -> R:
+        timeout = self.timeout
+        if timeout is not None and method.get("timeout"):
+            # getUpdates long polling
+            timeout += method["timeout"]
+
+        # Files are read to the end by each attempt, and must be rewound before repeating the call
+        positions = method._file_positions()
+
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                delay = self.rate_limiter.reserve(method)
+                if delay > 0:
+                    time.sleep(delay)
+
+            try:
+                return method._post(self.session, self.token, timeout, self.url_template)
+            except TelegramError as e:
+                delay = None if self.retry_policy is None else self.retry_policy.retry_delay(method, e, attempt)
+                if delay is None or positions is None:
+                    raise
+
+                if self.rate_limiter is not None and isinstance(e, FloodWait):
+                    # The next reservation of rate limited methods waits, along with other calls to the same chat
+                    self.rate_limiter.backoff(method, delay)
+                    if not self.rate_limiter.is_limited(method) and delay > 0:
+                        time.sleep(delay)
+                elif delay > 0:
+                    time.sleep(delay)
+                _rewind_files(positions)
+                attempt += 1
+
+    def download(self, file: Union[TelegramObjectBase, str], dest: Union[str, BinaryIO], chunk_size: int = CHUNK_SIZE,
+                 retries: int = 3):
+        """
+        Downloads a file sent to the bot, writing it in chunks as it's received so that it's never loaded in memory
+        as a whole.
+
+        Interrupted downloads are resumed where they stopped with an HTTP Range request, up to 'retries' times. When
+        downloading to a path, the data is written to '<dest>.part' first, and a later download to the same path
+        resumes it. If the download link expired, a new one is requested.
+
+        >>> client.download(message.document, "report.pdf")
+        >>> client.download(message.photo[-1].file_id, buffer)
+
+        :param file: (File, or any object with a file_id such as Document or PhotoSize, or str) The file or its file_id.
+        getFile is called unless the file is in the download cache or a File with a file_path is passed.
+        :param dest: (str or BinaryIO) Path to save the file to, or a binary file open for writing
+        :param chunk_size: (int) Optional. Size of the chunks written to 'dest'. Defaults to 64 KiB.
+        :param retries: (int) Optional. How many times an interrupted download is resumed. Defaults to 3.
+        """
+        file_id = file if isinstance(file, str) else file["file_id"]
+
+        cache = self.download_cache
+        if cache is not None:
+            cached = cache.open(file_id)
+            if cached is not None:
+                with cached:
+                    copy_file(cached, dest, chunk_size)
+                return
+
+        if isinstance(file, str) or not file.get("file_path"):
+            file = self.call(getFile(file_id))
+
+        with download_target(cache, file_id, dest, chunk_size) as (f, start):
+            transfer = Transfer(file, f, start, self.file_url_template, self.token, retries)
+            request = transfer.next_request()
+            while request is not None:
+                url, headers = request
+                try:
+                    with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as r:
+                        if transfer.check_status(r.status_code):
+                            for chunk in r.iter_content(chunk_size):
+                                f.write(chunk)
+                            if transfer.complete():
+                                return
+                except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                    transfer.interrupted(e)
+
+                if transfer.expired:
+                    if self.getfile_cache is not None:
+                        self.getfile_cache.discard(file_id)
+                    transfer.refresh(self.call(getFile(file_id)))
+                request = transfer.next_request()
+
+    def close(self):
+        """
+        Closes all pooled connections.
+        """
+        self.session.close()
+
+    def __enter__(self) -> 'Client':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __repr__(self):
+        return "{}(token='{}...')".format(self.__class__.__name__, self.token.split(":")[0])
@@ -0,0 +1,173 @@
+"""
+Compact, read-mostly representation of Telegram objects, meant for keeping many of them in memory.
+
+TelegramObjectBase instances are dicts, so every object carries a hash table sized for its keys plus an instance
+__dict__. Compact objects store their fields in __slots__ generated from the constructor's signature, the key
+table is shared by the whole class, and sequences are stored as tuples.
+
+>>> message = update.message.compact()
+>>> message.chat.id
+-1001234
+>>> message.to_dict()
+{'message_id': 1, 'date': 1530000000, 'chat': {'id': -1001234, 'type': 'supergroup'}, ...}
+"""
+
+from typing import Any, Dict
+
+from depytg.compiler import _strip_optional
+from depytg.depyfier import is_sequence, is_tobject
+from depytg.internals import TelegramObjectBase, json_codec
+
+
+class CompactObject(object):
+    """
+    Base class for compact Telegram objects. Subclasses are generated by compact_class() and should not be created
+    directly.
+    """
+
+    __slots__ = ()
+
+    # The TelegramObjectBase subclass this class is generated from
+    _cls = TelegramObjectBase
+    # JSON name -> attribute name
+    _shadowed = {}  # type: Dict[str, str]
+    # Attribute name -> expected type
+    _types = {}  # type: Dict[str, Any]
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'CompactObject':
+        """
+        Builds a compact object from a Telegram object or its JSON dict. Nested objects are made compact too.
+        :param d: (dict) The object
+        :return: An instance of this class
+        """
+        obj = cls.__new__(cls)
+        setattr_ = object.__setattr__
+        shadowed = cls._shadowed
+
+        for key, value in d.items():
+            try:
+                name = shadowed[key]
+            except KeyError:
+                raise TypeError("Not a valid '{}' object. Unexpected field: '{}'"
+                                .format(cls._cls.__name__, key)) from None
+            if value is not None:
+                setattr_(obj, name, _compact_value(value, cls._types[name]))
+
+        return obj
+
+    def __getattr__(self, item):
+        # Only called for unset slots and unknown attributes
+        if item in self._types:
+            return None
+        raise AttributeError("'{}' object has no attribute '{}'".format(self.__class__.__name__, item))
+
+    def _items(self):
+        for key, name in self._shadowed.items():
+            try:
+                yield key, object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+
+    def to_dict(self) -> dict:
+        """
+        Converts the object to a JSON-compatible dict, with nested objects converted too.
+        :return: (dict) The object's fields
+        """
+        return {key: _expand_value(value) for key, value in self._items()}
+
+    def to_json(self) -> str:
+        """
+        Serializes the object to JSON.
+        :return: (str) The JSON string
+        """
+        return json_codec.dumps(self.to_dict())
+
+    def to_object(self) -> TelegramObjectBase:
+        """
+        Converts the object back to the regular TelegramObjectBase subclass, using the current conversion mode.
+        :return: A TelegramObjectBase subclass instance
+        """
+        return self._cls.from_json(self.to_dict())
+
+    def __eq__(self, other):
+        if isinstance(other, CompactObject):
+            return self._cls is other._cls and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Generated classes can't be pickled by reference, rebuild them from the original class
+        return _rebuild, (self._cls, self.to_dict())
+
+    def __repr__(self):
+        return "{}({})".format(self.__class__.__name__, dict(self._items()))
+
+    def __dir__(self):
+        return dir(type(self)) + list(self._types)
+
+
+def compact_class(cls: type) -> type:
+    """
+    Returns the compact class for a TelegramObjectBase subclass, generating it on first use.
+    :param cls: The TelegramObjectBase subclass
+    :return: A CompactObject subclass with a slot for each field of 'cls'
+    """
+    compact = cls.__dict__.get("_compact_class")
+    if compact is None:
+        schema = cls._schema()
+        compact = type("Compact" + cls.__name__, (CompactObject,), {
+            "__slots__": schema.fields,
+            "__module__": __name__,
+            "_cls": cls,
+            "_shadowed": {schema.unshadowed[name]: name for name in schema.fields},
+            "_types": dict(schema.types),
+        })
+        cls._compact_class = compact
+    return compact
+
+
+def compact(obj: TelegramObjectBase) -> CompactObject:
+    """
+    Builds the compact representation of a Telegram object.
+    :param obj: (TelegramObjectBase) The object
+    :return: A CompactObject subclass instance
+    """
+    if type(obj) is TelegramObjectBase:
+        raise TypeError("Untyped objects can't be made compact, use compact_class(<type>).from_dict(obj)")
+    return compact_class(type(obj)).from_dict(obj)
+
+
+def _rebuild(cls: type, d: dict) -> CompactObject:
+    return compact_class(cls).from_dict(d)
+
+
+def _compact_value(value: Any, otype: Any) -> Any:
+    cls = value.__class__
+
+    if isinstance(value, dict):
+        # Typed objects know their class, untyped ones (fast mode, JSON) rely on the expected type
+        if cls is dict or cls is TelegramObjectBase:
+            otype = _strip_optional(otype)
+            cls = otype if is_tobject(otype) and otype is not TelegramObjectBase else None
+        if cls is None:
+            return value
+        return compact_class(cls).from_dict(value)
+
+    if cls is list or cls is tuple:
+        otype = _strip_optional(otype)
+        item_type = otype.__args__[0] if is_sequence(otype) else Any
+        return tuple(_compact_value(i, item_type) for i in value)
+
+    return value
+
+
+def _expand_value(value: Any) -> Any:
+    if isinstance(value, CompactObject):
+        return value.to_dict()
+    if value.__class__ is tuple:
+        return [_expand_value(i) for i in value]
+    return value
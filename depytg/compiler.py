@@ -0,0 +1,317 @@
+"""
+Generates specialized decoders for TelegramObjectBase subclasses.
+
+Generic decoding (TelegramObjectBase.from_json and depyfier.depyfy) inspects the expected type of every single value
+it converts. The decoders generated here take those decisions once, the first time a class is decoded, and are
+otherwise equivalent to depyfying in development mode.
+
+Compiled decoders don't run the objects' constructors: they assume that, like every object in this library, the
+constructor only assigns its arguments to the fields of the same name.
+
+Lazy decoders only check the fields of the object itself and keep nested objects as they are in the JSON. Each of
+them is converted, with a lazy decoder too, the first time it's accessed as an attribute.
+"""
+
+import threading
+import warnings
+from typing import Any, Callable, Optional
+
+from depytg.depyfier import is_union, is_sequence, is_mapping, is_tobject, is_forwardref
+from depytg.internals import TelegramObjectBase, unshadow, json_codec
+
+Converter = Callable[[Any], Any]
+
+_NoneType = type(None)
+
+# Held while decoders are compiled, so that other threads never see a decoder whose nested decoders aren't bound yet
+_lock = threading.RLock()
+# (class, lazy) pairs whose decoder is being compiled by the thread holding the lock
+_building = set()
+
+
+def enable(enabled: bool = True):
+    """
+    Makes TelegramObjectBase.from_json use compiled decoders, whatever the depyfying mode. The choice is kept when the
+    mode is changed with depytg.set_mode().
+    :param enabled: False to use the generic implementation, even in 'typed' and 'lazy' modes
+    """
+    TelegramObjectBase._compiled_override = enabled
+    TelegramObjectBase._compiled = enabled
+
+
+def get_decoder(cls: type, lazy: bool = False) -> Callable[[dict], TelegramObjectBase]:
+    """
+    Returns the compiled decoder for a TelegramObjectBase subclass, generating it if needed.
+    :param cls: The TelegramObjectBase subclass
+    :param lazy: (bool) Optional. Whether to return the lazy decoder. Defaults to False.
+    :return: A function that takes a dict and returns a 'cls' instance
+    """
+    return cls._get_decoder(lazy)
+
+
+def get_field_converter(cls: type, key: str) -> Converter:
+    """
+    Returns the converter used to convert a field left as it was by a lazy decoder, building it on first use.
+    :param cls: The TelegramObjectBase subclass
+    :param key: (str) The field's JSON name
+    :return: The converter
+    """
+    converters = cls.__dict__.get("_field_converters")
+    if converters is None:
+        converters = cls._field_converters = {}
+
+    converter = converters.get(key)
+    if converter is None:
+        schema = cls._schema()
+        converter = build_converter(_strip_optional(schema.types[schema.shadowed[key]]), lazy=True)
+        converters[key] = converter
+    return converter
+
+
+def build_converter(otype: Any, lazy: bool = False) -> Optional[Converter]:
+    """
+    Builds a function that converts a JSON value to the given type, deciding ahead of time what needs to be
+    done to convert it.
+    :param otype: The expected type for the values
+    :param lazy: (bool) Optional. Whether Telegram objects are built with lazy decoders. Defaults to False.
+    :return: The converter, or None if values of this type are to be kept as they are
+    """
+    if otype is Any or is_forwardref(otype):
+        return None
+    elif is_union(otype):
+        return _union_converter(otype, lazy)
+    elif is_sequence(otype):
+        return _sequence_converter(otype, lazy)
+    elif is_mapping(otype):
+        # Mappings with Telegram object keys don't exist in the API, values are kept as they are
+        return None
+    elif is_tobject(otype):
+        return _tobject_converter(otype, lazy)
+    return None
+
+
+def _tobject_converter(otype: type, lazy: bool) -> Converter:
+    decode = get_decoder(otype, lazy)
+
+    def convert(value):
+        if value.__class__ is dict:
+            return decode(value)
+        elif value.__class__ is str:
+            return decode(json_codec.loads(value))
+        return value
+
+    return convert
+
+
+def _sequence_converter(seq_type, lazy: bool) -> Optional[Converter]:
+    convert_item = build_converter(seq_type.__args__[0], lazy)
+
+    # Sequence of regular Python objects, nothing to do
+    if convert_item is None:
+        return None
+
+    def convert(seq):
+        if seq.__class__ is list:
+            return [convert_item(i) for i in seq]
+        # Cast back to original type
+        return type(seq)([convert_item(i) for i in seq])
+
+    return convert
+
+
+def _union_converter(union, lazy: bool) -> Optional[Converter]:
+    args = union.__args__
+    decoders = [get_decoder(t, lazy) for t in args if is_tobject(t)]
+    converters = []
+    # Sequences of regular objects and mappings are accepted without conversion, like depyfy_union does
+    passthrough = False
+
+    for t in args:
+        if is_sequence(t) or is_mapping(t):
+            c = build_converter(t, lazy)
+            if c is None:
+                passthrough = True
+            else:
+                converters.append(c)
+
+    if not decoders and not converters:
+        return None
+
+    try_decoders = dict not in args
+
+    def convert(value):
+        # Regular Python object specified in the Union
+        if value.__class__ in args:
+            return value
+
+        # Return the first Telegram object that accepts the value
+        if try_decoders and value.__class__ is dict:
+            for decode in decoders:
+                try:
+                    return decode(value)
+                except Exception:
+                    pass
+
+        for c in converters:
+            try:
+                return c(value)
+            except Exception:
+                pass
+
+        if not passthrough:
+            warnings.warn("Could not match object '{}' of type {} with anything in {}"
+                          .format(value, type(value), union))
+        return value
+
+    return convert
+
+
+def _needs_conversion(otype) -> bool:
+    # Same outcome as 'build_converter(otype) is not None', without compiling any decoder
+    if is_forwardref(otype):
+        return False
+    elif is_union(otype):
+        return any(is_tobject(t) or (is_sequence(t) and _needs_conversion(t)) for t in otype.__args__)
+    elif is_sequence(otype):
+        return _needs_conversion(otype.__args__[0])
+    elif is_mapping(otype):
+        return False
+    return otype is not Any and is_tobject(otype)
+
+
+def _strip_optional(otype):
+    # Python < 3.11 turns hints with a None default into Optional[...], None values never reach the converters
+    if is_union(otype) and _NoneType in otype.__args__:
+        args = tuple(t for t in otype.__args__ if t is not _NoneType)
+        if len(args) == 1:
+            return args[0]
+    return otype
+
+
+def _raise_missing(cls: type, j: dict):
+    required = set(unshadow(i) for i in cls._schema().required)
+    missing = required.difference(j.keys())
+    raise TypeError("Not a valid '{}' object. Missing {} required fields: {}"
+                    .format(cls.__name__, len(missing), missing))
+
+
+def _raise_unexpected(cls: type, j: dict):
+    known = set(unshadow(i) for i in cls._schema().fields)
+    unexpected = set(j.keys()).difference(known)
+    raise TypeError("Not a valid '{}' object. Got {} unexpected fields: {}"
+                    .format(cls.__name__, len(unexpected), unexpected))
+
+
+def _trampoline(cls: type, lazy: bool) -> Callable[[dict], TelegramObjectBase]:
+    # Stands for a decoder that is still being compiled, i.e. Message's in Message.reply_to_message. It looks the
+    # decoder up when called, waiting for it if another thread is still compiling it.
+    def decode(j):
+        return cls._get_decoder(lazy)(j)
+
+    return decode
+
+
+def compile_decoder(cls: type, lazy: bool = False) -> Callable[[dict], TelegramObjectBase]:
+    """
+    Generates the source code of a decoder for a TelegramObjectBase subclass, compiles it and caches it in the class.
+    Decoders are compiled under a lock, and cached only once the decoders of nested types are bound, so they can be
+    compiled concurrently from several threads. Recursive types (e.g. Message.reply_to_message) call themselves
+    through a trampoline.
+    :param cls: The TelegramObjectBase subclass
+    :param lazy: (bool) Optional. Whether to generate a lazy decoder, which leaves the fields that need conversion
+    as they are and lists them in the object's '_pending' attribute. Defaults to False.
+    :return: A function that takes a dict and returns a 'cls' instance
+    """
+    attr = "_lazy_decoder" if lazy else "_object_decoder"
+    with _lock:
+        decoder = cls.__dict__.get(attr)
+        if decoder is not None:
+            # Compiled by another thread in the meantime
+            return decoder
+        if (cls, lazy) in _building:
+            return _trampoline(cls, lazy)
+
+        _building.add((cls, lazy))
+        try:
+            decoder = _compile_decoder(cls, lazy)
+        finally:
+            _building.discard((cls, lazy))
+
+        setattr(cls, attr, decoder)
+        return decoder
+
+
+def _compile_decoder(cls: type, lazy: bool) -> Callable[[dict], TelegramObjectBase]:
+    schema = cls._schema()
+    namespace = {
+        "_cls": cls,
+        "_new": dict.__new__,
+        "_known": frozenset(unshadow(i) for i in schema.fields),
+        "_raise_missing": _raise_missing,
+        "_raise_unexpected": _raise_unexpected,
+    }
+    decoder_name = "decode_lazy" if lazy else "decode"
+
+    lines = ["def {}_{}(j):".format(decoder_name, cls.__name__)]
+
+    if schema.required:
+        lines.append("    try:")
+        for n, name in enumerate(schema.required):
+            lines.append("        r{} = j[{!r}]".format(n, unshadow(name)))
+        lines.append("    except KeyError:")
+        lines.append("        _raise_missing(_cls, j)")
+
+    lines.append("    if not _known.issuperset(j):")
+    lines.append("        _raise_unexpected(_cls, j)")
+    lines.append("    obj = _new(_cls)")
+
+    # Nested types are resolved once the function exists, see below
+    nested = []
+    pending = []
+    required = {name: "r{}".format(n) for n, name in enumerate(schema.required)}
+
+    for n, name in enumerate(schema.fields):
+        key = unshadow(name)
+        otype = schema.types[name]
+        indent = "    "
+
+        if name in required:
+            var = required[name]
+        else:
+            otype = _strip_optional(otype)
+            var = "v"
+            lines.append("    v = j.get({!r})".format(key))
+            lines.append("    if v is not None:")
+            indent = "        "
+
+        if not _needs_conversion(otype):
+            expr = var
+        elif lazy:
+            expr = var
+            pending.append(key)
+        else:
+            nested.append((n, otype))
+            if is_tobject(otype):
+                expr = "_d{0}({1}) if {1}.__class__ is dict else _c{0}({1})".format(n, var)
+            else:
+                expr = "_c{}({})".format(n, var)
+        lines.append("{}obj[{!r}] = {}".format(indent, key, expr))
+
+    if pending:
+        namespace["_pending"] = frozenset(pending)
+        lines.append("    p = j.keys() & _pending")
+        lines.append("    if p:")
+        lines.append("        obj.__dict__['_pending'] = p")
+
+    lines.append("    return obj")
+
+    exec("\n".join(lines), namespace)
+    decoder = namespace["{}_{}".format(decoder_name, cls.__name__)]
+    decoder.__qualname__ = "{}.{}".format(cls.__name__, decoder_name)
+
+    for n, otype in nested:
+        if is_tobject(otype):
+            namespace["_d{}".format(n)] = get_decoder(otype)
+        namespace["_c{}".format(n)] = build_converter(otype)
+
+    return decoder
@@ -0,0 +1,55 @@
+import threading
+from collections import OrderedDict
+
+
+class RecentUpdates(object):
+    """
+    Remembers the IDs of the most recently received updates, so that updates delivered more than once (i.e. when
+    Telegram sends a webhook update again because the reply was late) are only handled once.
+    All operations take constant time and are thread-safe.
+
+    >>> recent = RecentUpdates(1000)
+    >>> recent.add(update.update_id)
+    True
+    >>> recent.add(update.update_id)
+    False
+
+    :param size: (int) Optional. How many update IDs are remembered, the least recently seen are forgotten first.
+    Defaults to 10000.
+    """
+
+    def __init__(self, size: int = 10000):
+        self.size = size
+
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, update_id: int) -> bool:
+        """
+        Marks an update as seen.
+        :param update_id: (int) The update's ID
+        :return: (bool) True if the update is new, False if it was already seen
+        """
+        with self._lock:
+            if update_id in self._ids:
+                self._ids.move_to_end(update_id)
+                return False
+
+            self._ids[update_id] = None
+            if len(self._ids) > self.size:
+                self._ids.popitem(last=False)
+            return True
+
+    def discard(self, update_id: int):
+        """
+        Forgets an update, i.e. because it couldn't be handled and Telegram is expected to send it again.
+        :param update_id: (int) The update's ID
+        """
+        with self._lock:
+            self._ids.pop(update_id, None)
+
+    def __contains__(self, update_id: int) -> bool:
+        return update_id in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
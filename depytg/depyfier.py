@@ -1,7 +1,7 @@
 import collections.abc
 import os
 import warnings
-from typing import Mapping, Union, Any
+from typing import Mapping, Union, Any, Callable
 
 try:
     from typing import ForwardRef
@@ -9,22 +9,97 @@ except ImportError:
     from typing import _ForwardRef as ForwardRef
 
 from depytg.errors import NotImplementedWarning
+from depytg.internals import TelegramMethodBase
 from depytg.types import *
 
 _warned = False
 
+# Depyfying modes:
+#  - fast: objects are converted to untyped TelegramObjectBase dicts
+#  - typed: objects are converted to their proper type using compiled converters, see depytg.compiler
+#  - lazy: like typed, but nested objects are only converted when accessed as attributes
+#  - devel: objects are converted to their proper type by inspecting it at every step, and misuse is reported
+MODES = ('fast', 'typed', 'lazy', 'devel')
 
-def devel() -> bool:
-    global _warned
+_mode = None
+
+
+def _mode_from_env() -> str:
+    """
+    Reads the depyfying mode from the DEPYTG_MODE environment variable. Setting DEPYTG_DEVEL enables
+    the development mode.
+    :return: One of MODES
+    """
     try:
-        dbg = bool(os.environ.get('DEPYTG_DEVEL', False))
-        if dbg and not _warned:
-            _warned = True
-            warnings.warn('DepyTG development mode enabled, uses more CPU. Unset DEPYTG_DEVEL for performance.')
-        return dbg
+        if os.environ.get('DEPYTG_DEVEL', False):
+            return 'devel'
+
+        m = os.environ.get('DEPYTG_MODE', 'fast')
+        if m not in MODES:
+            warnings.warn("Unknown DEPYTG_MODE '{}', falling back to 'fast'".format(m))
+            return 'fast'
+        return m
     except Exception as e:
         warnings.warn(e)
-        return False
+        return 'fast'
+
+
+def get_mode() -> str:
+    """
+    Returns the current depyfying mode.
+    :return: One of 'fast', 'typed', 'lazy', 'devel'
+    """
+    return _mode
+
+
+def set_mode(mode: str):
+    """
+    Changes the depyfying mode. The mode is read from the environment when DepyTG is imported; changing it
+    swaps the functions used to convert objects, so that they don't need to check the mode every time.
+    Compiled decoders are used in 'typed' and 'lazy' modes, unless depytg.compiler.enable() was called.
+    :param mode: One of 'fast', 'typed', 'lazy', 'devel'
+    """
+    global _mode, _warned, depyfy
+
+    if mode not in MODES:
+        raise ValueError("Unknown mode '{}', must be one of {}".format(mode, MODES))
+
+    if mode == 'devel' and not _warned:
+        _warned = True
+        warnings.warn('DepyTG development mode enabled, uses more CPU. Unset DEPYTG_DEVEL for performance.')
+
+    _mode = mode
+    depyfy = {
+        'fast': depyfy_untyped,
+        'typed': depyfy_typed,
+        'lazy': depyfy_typed,
+        'devel': depyfy_devel,
+    }[mode]
+
+    if TelegramObjectBase._compiled_override is None:
+        TelegramObjectBase._compiled = mode in ('typed', 'lazy')
+    else:
+        TelegramObjectBase._compiled = TelegramObjectBase._compiled_override
+    TelegramObjectBase._lazy = mode == 'lazy'
+    TelegramObjectBase.__getattr__ = TelegramObjectBase._lazy_getattr if mode == 'lazy' \
+        else TelegramObjectBase._getattr
+    TelegramObjectBase.__setattr__ = TelegramObjectBase._devel_setattr if mode == 'devel' \
+        else TelegramObjectBase._setattr
+    TelegramMethodBase._typed_results = mode in ('typed', 'lazy')
+
+
+def devel() -> bool:
+    return _mode == 'devel'
+
+
+def _generic_origin(some_type):
+    """
+    Returns the runtime class a parametrized generic stands for, i.e. collections.abc.Sequence for
+    typing.Sequence[int]. Python 3.6 stores it as '__extra__', newer versions as '__origin__'.
+    :param some_type: The type you're checking
+    :return: The origin class, or None if it is not a generic
+    """
+    return getattr(some_type, "__extra__", None) or getattr(some_type, "__origin__", None)
 
 
 def is_union(some_type: type(Union)) -> bool:
@@ -38,19 +113,16 @@ def is_union(some_type: type(Union)) -> bool:
     # Yeah. Thanks Python.
     return isinstance(some_type, type(Union)) or \
            id(type(some_type)) == id(type(Union)) or \
-           str(type(some_type)) == "typing.Union"
+           str(type(some_type)) == "typing.Union" or \
+           getattr(some_type, "__origin__", None) is Union
 
 
 def is_sequence(some_type) -> bool:
-    if "__extra__" in dir(some_type):
-        return some_type.__extra__ == collections.abc.Sequence
-    return False
+    return _generic_origin(some_type) == collections.abc.Sequence
 
 
 def is_mapping(some_type) -> bool:
-    if "__extra__" in dir(some_type):
-        return some_type.__extra__ == collections.abc.Mapping
-    return False
+    return _generic_origin(some_type) == collections.abc.Mapping
 
 
 def is_tobject(some_type: type) -> bool:
@@ -64,7 +136,7 @@ def is_forwardref(some_type) -> bool:
     return isinstance(some_type, ForwardRef)
 
 
-def depyfy(obj: Any, otype: type) -> Any:
+def depyfy_devel(obj: Any, otype: type) -> Any:
     """
     Walks into a generic object 'obj' and converts it to a DepyTG typechecked
     object, if possible.
@@ -78,9 +150,6 @@ def depyfy(obj: Any, otype: type) -> Any:
     :return: The converted object
     """
 
-    if not devel():
-        return depyfy_fast(obj)
-
     if is_sequence(otype):
         return depyfy_sequence(obj, otype)
     elif is_mapping(otype):
@@ -93,8 +162,19 @@ def depyfy(obj: Any, otype: type) -> Any:
         return obj
 
 
+def depyfy_untyped(obj: Any, otype: type) -> Any:
+    """
+    Same as 'depyfy_fast', with the same signature as the other 'depyfy' implementations.
+    """
+    return depyfy_fast(obj)
+
+
+# Types that depyfy_fast leaves untouched, checked first since they're the most common
+_scalar_types = frozenset((str, int, float, bool, type(None)))
+
+
 def depyfy_fast(obj: Any) -> Any:
-    if isinstance(obj, TelegramObjectBase):
+    if obj.__class__ in _scalar_types or isinstance(obj, TelegramObjectBase):
         return obj
 
     if isinstance(obj, tuple):
@@ -107,16 +187,51 @@ def depyfy_fast(obj: Any) -> Any:
         return obj
 
     if isinstance(obj, dict):
-        new = TelegramObjectBase()
+        # Skip TelegramObjectBase.__init__, there's nothing to set up for untyped objects
+        new = dict.__new__(TelegramObjectBase)
 
         for key, value in obj.items():
-            new[key] = depyfy_fast(value)
+            new[key] = value if value.__class__ in _scalar_types else depyfy_fast(value)
 
         return new
 
     return obj
 
 
+_converters = {}
+
+
+def _keep(obj: Any) -> Any:
+    return obj
+
+
+def get_converter(otype: type) -> Callable[[Any], Any]:
+    """
+    Returns the function that converts objects to 'otype' in typed mode. Converters are built only once for
+    each type and kept in a dispatch table.
+    :param otype: The expected type for the objects
+    :return: A function that takes an object and returns the converted object
+    """
+    try:
+        return _converters[otype]
+    except KeyError:
+        from depytg.compiler import build_converter
+        converter = build_converter(otype) or _keep
+        _converters[otype] = converter
+        return converter
+
+
+def depyfy_typed(obj: Any, otype: type) -> Any:
+    """
+    Converts a generic object to a DepyTG typechecked object like 'depyfy' does in development mode, but using
+    converters that are generated once per type.
+    :param obj: The object to convert
+    :param otype: The expected type for the object
+    :return: The converted object
+    """
+    return get_converter(otype)(obj)
+
+
 def depyfy_sequence(seq: Sequence, seq_type) -> Sequence:
     subtype = seq_type.__args__[0]
     newseq = []
@@ -241,6 +356,17 @@ def depyfy_tobject(tobj: Union[TelegramObjectBase, dict, str], otype: type) -> T
 
 
 def depyfy_obj_hook(obj: dict) -> 'TelegramObjectBase':
+    """
+    Deprecated, responses are no longer parsed with an object hook. Use depyfy_fast() to convert parsed JSON to
+    untyped objects.
+    """
+    warnings.warn("depyfy_obj_hook is deprecated, use depyfy_fast instead", DeprecationWarning, stacklevel=2)
     t = TelegramObjectBase()
     t.update(obj)
     return t
+
+
+# Converts a generic object to a DepyTG object, the implementation depends on the mode. See set_mode()
+depyfy = depyfy_untyped
+
+set_mode(_mode_from_env())
@@ -0,0 +1,344 @@
+import asyncio
+import logging
+import queue
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from depytg.types import Update
+
+logger = logging.getLogger("depytg")
+
+# Updates whose order matters within the chat they were sent to
+_chat_fields = ("message", "edited_message", "channel_post", "edited_channel_post")
+# Updates that only carry the user who sent them
+_user_fields = ("inline_query", "chosen_inline_result", "shipping_query", "pre_checkout_query")
+
+# What webhook receivers can do with an update received while the dispatcher is full
+OVERFLOW_POLICIES = ("block", "reject", "drop")
+
+
+def chat_key(update: Update) -> Optional[int]:
+    """
+    Returns the ID of the chat an update belongs to: the message's chat for messages and callback queries, the
+    sender's ID (which is also the ID of their private chat with the bot) for inline and payment queries.
+    Works with both typed and untyped updates.
+
+    :param update: (Update) The update
+    :return: (int) The chat ID, or None if the update doesn't belong to any chat
+    """
+    for field in _chat_fields:
+        message = update.get(field)
+        if message is not None:
+            return message["chat"]["id"]
+
+    callback_query = update.get("callback_query")
+    if callback_query is not None:
+        message = callback_query.get("message")
+        if message is not None:
+            return message["chat"]["id"]
+        return callback_query["from"]["id"]
+
+    for field in _user_fields:
+        query = update.get(field)
+        if query is not None:
+            return query["from"]["id"]
+
+    return None
+
+
+class _DispatcherBase(object):
+    def __init__(self, handler: Callable, workers: int, max_pending: int, key: Callable[[Update], Hashable],
+                 on_error: Callable[[Update, Exception], Any]):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.key = key
+        self.on_error = on_error
+
+        # Updates waiting to be handled, by key. A key stays here while one of its updates is being handled, so that
+        # the following ones wait for it instead of being handed to another worker.
+        self._pending = {}  # type: Dict[Hashable, deque]
+        self._stopping = False
+
+    def _key(self, update: Update) -> Hashable:
+        key = self.key(update)
+        # Updates without a key don't need to be ordered
+        return object() if key is None else key
+
+    def _enqueue(self, key: Hashable, update: Update) -> bool:
+        """
+        Adds an update to its key's queue.
+        :return: (bool) True if the key isn't queued for a worker yet
+        """
+        updates = self._pending.get(key)
+        if updates is None:
+            self._pending[key] = deque((update,))
+            return True
+        updates.append(update)
+        return False
+
+    def _done(self, key: Hashable) -> bool:
+        """
+        Called after an update has been handled.
+        :return: (bool) True if the key has more updates and must be queued for a worker again
+        """
+        if self._pending[key]:
+            return True
+        del self._pending[key]
+        return False
+
+    def _handle_error(self, update: Update, e: Exception):
+        if self.on_error is None:
+            logger.exception("Update handler failed on update %s", update.get("update_id"))
+            return
+        try:
+            self.on_error(update, e)
+        except Exception:
+            logger.exception("Error handler failed on update %s", update.get("update_id"))
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of dispatched updates not being handled yet, including the ones waiting for an earlier update with the
+        same key. Unlike for 'max_pending', updates being handled aren't counted.
+        """
+        return sum(len(u) for u in self._pending.values())
+
+
+class Dispatcher(_DispatcherBase):
+    """
+    Hands updates to a pool of worker threads. Updates with the same key, by default the same chat, are handled one
+    at a time in the order they were dispatched, while updates for different chats are handled concurrently, so that
+    a slow handler only delays the chat it's handling.
+
+    At most 'max_pending' updates can be waiting or being handled at any time. Once the limit is reached, dispatch()
+    blocks until an update is done, slowing down the source of updates instead of buffering them without bound.
+
+    >>> with Dispatcher(handle_update) as dispatcher:
+    ...     for update in UpdatePoller(client):
+    ...         dispatcher.dispatch(update)
+
+    :param handler: (callable(Update)) Called on every update from a worker thread
+    :param workers: (int) Optional. Number of worker threads. Defaults to 8.
+    :param max_pending: (int) Optional. Maximum number of updates waiting or being handled. Defaults to 1000.
+    :param key: (callable(Update) -> hashable) Optional. Returns the key of an update, updates with the same key are
+    handled in order. Updates whose key is None are not ordered. Defaults to chat_key.
+    :param on_error: (callable(Update, Exception)) Optional. Called when the handler raises an exception. By default
+    exceptions are logged.
+    """
+
+    def __init__(self, handler: Callable[[Update], Any], workers: int = 8, max_pending: int = 1000,
+                 key: Callable[[Update], Hashable] = chat_key, on_error: Callable[[Update, Exception], Any] = None):
+        super().__init__(handler, workers, max_pending, key, on_error)
+
+        self._ready = queue.Queue()
+        self._capacity = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        """
+        Starts the worker threads. Called automatically by the first dispatch().
+        """
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping = False
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name="depytg-dispatcher-{}".format(i), daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def dispatch(self, update: Update, block: bool = True, timeout: Optional[float] = None):
+        """
+        Schedules an update to be handled.
+        :param update: (Update) The update
+        :param block: (bool) Optional. Whether to wait if 'max_pending' updates are pending. Defaults to True.
+        :param timeout: (float) Optional. Maximum number of seconds to wait, ignored if 'block' is False. Defaults to no
+        limit.
+        :raises queue.Full: if the update can't be scheduled without waiting longer than allowed
+        """
+        if self._stopping:
+            raise RuntimeError("Dispatcher is stopped")
+        if not self._threads:
+            self.start()
+
+        # Before taking a slot, which would be lost if the key function raised
+        key = self._key(update)
+        if not self._capacity.acquire(block, timeout if block else None):
+            raise queue.Full
+
+        with self._lock:
+            if self._enqueue(key, update):
+                self._ready.put(key)
+
+    def _work(self):
+        while True:
+            key = self._ready.get()
+            if key is None:
+                break
+
+            with self._lock:
+                update = self._pending[key].popleft()
+
+            try:
+                self.handler(update)
+            except Exception as e:
+                self._handle_error(update, e)
+
+            with self._lock:
+                if self._done(key):
+                    # Back to the end of the line, so that a busy chat doesn't starve the others
+                    self._ready.put(key)
+            self._capacity.release()
+            self._ready.task_done()
+
+    def join(self):
+        """
+        Waits until all dispatched updates have been handled.
+        """
+        self._ready.join()
+
+    def stop(self, wait: bool = True):
+        """
+        Stops the worker threads after all dispatched updates have been handled.
+        :param wait: (bool) Optional. Whether to wait for the threads to finish. Defaults to True.
+        """
+        self._stopping = True
+        threads, self._threads = self._threads, []
+
+        def shutdown():
+            self._ready.join()
+            for _ in threads:
+                self._ready.put(None)
+            for thread in threads:
+                thread.join()
+
+        if wait:
+            shutdown()
+        else:
+            threading.Thread(target=shutdown, daemon=True).start()
+
+    def __enter__(self) -> 'Dispatcher':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class AsyncDispatcher(_DispatcherBase):
+    """
+    Hands updates to a pool of asyncio worker tasks. Like Dispatcher, updates with the same key, by default the same
+    chat, are handled one at a time in order, while updates for different chats are handled concurrently.
+
+    At most 'max_pending' updates can be waiting or being handled at any time, dispatch() waits once the limit is
+    reached.
+
+    >>> async with AsyncDispatcher(handle_update) as dispatcher:
+    ...     async for update in UpdatePoller(client):
+    ...         await dispatcher.dispatch(update)
+
+    :param handler: (coroutine function(Update)) Awaited on every update from a worker task
+    :param workers: (int) Optional. Number of worker tasks. Defaults to 64.
+    :param max_pending: (int) Optional. Maximum number of updates waiting or being handled. Defaults to 1000.
+    :param key: (callable(Update) -> hashable) Optional. Returns the key of an update, updates with the same key are
+    handled in order. Updates whose key is None are not ordered. Defaults to chat_key.
+    :param on_error: (callable(Update, Exception)) Optional. Called when the handler raises an exception. By default
+    exceptions are logged.
+    """
+
+    def __init__(self, handler: Callable[[Update], Awaitable], workers: int = 64, max_pending: int = 1000,
+                 key: Callable[[Update], Hashable] = chat_key, on_error: Callable[[Update, Exception], Any] = None):
+        super().__init__(handler, workers, max_pending, key, on_error)
+
+        # Created by start(), since they must be created inside the event loop
+        self._ready = None  # type: asyncio.Queue
+        # Holds an item for every pending update, so that its size limits them
+        self._slots = None  # type: asyncio.Queue
+        self._tasks = []
+
+    def start(self):
+        """
+        Starts the worker tasks. Called automatically by the first dispatch().
+        """
+        if self._tasks:
+            return
+        self._stopping = False
+        self._ready = asyncio.Queue()
+        self._slots = asyncio.Queue(self.max_pending)
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+
+    async def dispatch(self, update: Update):
+        """
+        Schedules an update to be handled, waiting if 'max_pending' updates are pending.
+        :param update: (Update) The update
+        """
+        if self._stopping:
+            raise RuntimeError("Dispatcher is stopped")
+        if not self._tasks:
+            self.start()
+
+        key = self._key(update)
+        await self._slots.put(None)
+        self._put(key, update)
+
+    def dispatch_nowait(self, update: Update):
+        """
+        Schedules an update to be handled without waiting.
+        :param update: (Update) The update
+        :raises asyncio.QueueFull: if 'max_pending' updates are pending
+        """
+        if self._stopping:
+            raise RuntimeError("Dispatcher is stopped")
+        if not self._tasks:
+            self.start()
+
+        key = self._key(update)
+        self._slots.put_nowait(None)
+        self._put(key, update)
+
+    def _put(self, key: Hashable, update: Update):
+        if self._enqueue(key, update):
+            self._ready.put_nowait(key)
+
+    async def _work(self):
+        while True:
+            key = await self._ready.get()
+            update = self._pending[key].popleft()
+
+            try:
+                await self.handler(update)
+            except Exception as e:
+                self._handle_error(update, e)
+
+            if self._done(key):
+                self._ready.put_nowait(key)
+            self._slots.get_nowait()
+            self._ready.task_done()
+
+    async def join(self):
+        """
+        Waits until all dispatched updates have been handled.
+        """
+        if self._ready is not None:
+            await self._ready.join()
+
+    async def stop(self):
+        """
+        Stops the worker tasks after all dispatched updates have been handled.
+        """
+        self._stopping = True
+        await self.join()
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def __aenter__(self) -> 'AsyncDispatcher':
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
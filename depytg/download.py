@@ -0,0 +1,514 @@
+"""
+Caches for downloading files, used by Client and AsyncClient: a local disk cache for downloaded files, and a cache
+of the File objects returned by getFile.
+
+>>> client = Client("my_bot_token", download_cache=DownloadCache("/var/cache/mybot", max_size=2 * 1024 ** 3))
+>>> client.download(message.document, "report.pdf")  # Downloaded
+>>> client.download(message.document, "copy.pdf")  # Copied from the cache
+"""
+
+import asyncio
+import hashlib
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Awaitable, BinaryIO, Callable, Iterator, Optional, Tuple, Union
+
+from depytg.errors import make_error
+from depytg.internals import TelegramObjectBase
+from depytg.multipart import CHUNK_SIZE
+
+# Suffix of partially downloaded files
+PART_SUFFIX = ".part"
+
+
+class DownloadCache(object):
+    """
+    Keeps downloaded files in a directory, by file_id. When the total size grows over 'max_size', the least recently
+    used files are deleted.
+
+    Interrupted downloads leave a partial file in the directory, and the next download of the same file resumes it.
+    Partial files count towards 'max_size' and are deleted like the others once they're no longer being written.
+
+    :param directory: (str) Where files are stored, it's created if it doesn't exist
+    :param max_size: (int) Optional. Maximum total size of the cached files in bytes. Defaults to 1 GiB.
+    """
+
+    def __init__(self, directory: str, max_size: int = 1024 ** 3):
+        self.directory = directory
+        self.max_size = max_size
+
+        os.makedirs(directory, exist_ok=True)
+
+        # Path -> size of complete and partial files, least recently used first
+        self._sizes = OrderedDict()
+        self._size = 0
+        # Partial files being written by downloads in progress, they can't be deleted
+        self._writing = set()
+        self._lock = threading.Lock()
+
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(entries):
+            self._sizes[path] = size
+            self._size += size
+
+    def _path(self, file_id: str) -> str:
+        # file_ids may contain characters that aren't allowed in file names
+        return os.path.join(self.directory, hashlib.sha256(file_id.encode()).hexdigest())
+
+    def _track(self, path: str, size: int):
+        self._size -= self._sizes.pop(path, 0)
+        self._sizes[path] = size
+        self._size += size
+
+        while self._size > self.max_size and len(self._sizes) > 1:
+            old_path, old_size = self._sizes.popitem(last=False)
+            self._size -= old_size
+            try:
+                os.remove(old_path)
+            except OSError:
+                # Already deleted by another process, or open on Windows. It's found again on the next scan.
+                pass
+
+    def open(self, file_id: str) -> Optional[BinaryIO]:
+        """
+        Opens a cached file for reading, marking it as recently used. The file stays readable even if it's evicted
+        while it's open.
+        :param file_id: (str) The file's file_id
+        :return: (BinaryIO) The open file, or None if it isn't cached
+        """
+        path = self._path(file_id)
+        with self._lock:
+            if path not in self._sizes:
+                return None
+
+            try:
+                f = open(path, "rb")
+                # The modification time orders files by use when the cache is loaded again
+                os.utime(path)
+            except FileNotFoundError:
+                # Deleted by someone else, i.e. another process sharing the directory
+                self._size -= self._sizes.pop(path)
+                return None
+
+            self._sizes.move_to_end(path)
+            return f
+
+    def begin(self, file_id: str) -> str:
+        """
+        Reserves a partial file to download a file into. It's the one left by an interrupted download of the same
+        file if any, unless another download is using it.
+        :param file_id: (str) The file's file_id
+        :return: (str) Path of the partial file, to be passed to add() or abort()
+        """
+        path = self._path(file_id) + PART_SUFFIX
+        with self._lock:
+            n = 0
+            while path in self._writing:
+                n += 1
+                path = "{}.{}{}".format(self._path(file_id), n, PART_SUFFIX)
+
+            self._writing.add(path)
+            # Partial files being written aren't evicted
+            self._size -= self._sizes.pop(path, 0)
+        return path
+
+    def add(self, file_id: str, part_path: str):
+        """
+        Moves a completely downloaded file into the cache, deleting the least recently used files if needed.
+        :param file_id: (str) The file's file_id
+        :param part_path: (str) Path returned by begin()
+        """
+        path = self._path(file_id)
+        size = os.path.getsize(part_path)
+        os.replace(part_path, path)
+
+        with self._lock:
+            self._writing.discard(part_path)
+            self._track(path, size)
+
+    def abort(self, part_path: str):
+        """
+        Releases a partial file after a failed download. The file is kept, so that the download can be resumed, until
+        it's evicted.
+        :param part_path: (str) Path returned by begin()
+        """
+        with self._lock:
+            self._writing.discard(part_path)
+            try:
+                self._track(part_path, os.path.getsize(part_path))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        """
+        Deletes all cached files, except the ones being written.
+        """
+        with self._lock:
+            for path in self._sizes:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._sizes.clear()
+            self._size = 0
+
+    @property
+    def size(self) -> int:
+        """
+        Total size of the cached files in bytes.
+        """
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+
+class DownloadTarget(object):
+    """
+    The file a download is written to: a partial file in the cache, '<dest>.part' or 'dest' itself. Once the
+    download completes, the file is copied or moved to 'dest'. open() and finish() do blocking file I/O, AsyncClient
+    runs them in the default executor.
+
+    :param cache: (DownloadCache) The client's download cache, if any
+    :param file_id: (str) The file's file_id
+    :param dest: (str or BinaryIO) Path or binary file the download is saved to
+    :param chunk_size: (int) Optional. Size of the chunks copied from the cache.
+    """
+
+    def __init__(self, cache: Optional[DownloadCache], file_id: str, dest: Union[str, BinaryIO],
+                 chunk_size: int = CHUNK_SIZE):
+        self.cache = cache
+        self.file_id = file_id
+        self.dest = dest
+        self.chunk_size = chunk_size
+
+        self._part_path = None  # type: Optional[str]
+        self._f = None  # type: Optional[BinaryIO]
+
+    def open(self) -> Tuple[BinaryIO, int]:
+        """
+        Opens the file to write to.
+        :return: The file and the position the download starts at. What's already written after that position is
+        resumed.
+        """
+        if self.cache is not None:
+            self._part_path = self.cache.begin(self.file_id)
+        elif isinstance(self.dest, str):
+            self._part_path = self.dest + PART_SUFFIX
+        else:
+            return self.dest, self.dest.tell()
+
+        try:
+            # Appending keeps what an interrupted download already wrote
+            self._f = open(self._part_path, "ab")
+        except BaseException:
+            self.abort()
+            raise
+        return self._f, 0
+
+    def finish(self):
+        """
+        Saves the completed download to 'dest'.
+        """
+        if self._f is None:
+            return
+        self._f.close()
+
+        if self.cache is None:
+            os.replace(self._part_path, self.dest)
+            return
+
+        try:
+            # Copied before being added, it could be evicted right away otherwise
+            with open(self._part_path, "rb") as f:
+                copy_file(f, self.dest, self.chunk_size)
+        except BaseException:
+            self.abort()
+            raise
+        self.cache.add(self.file_id, self._part_path)
+
+    def abort(self):
+        """
+        Closes the file after a failed download. Partial files are kept to be resumed.
+        """
+        if self._f is not None:
+            self._f.close()
+        if self.cache is not None and self._part_path is not None:
+            self.cache.abort(self._part_path)
+
+
+@contextmanager
+def download_target(cache: Optional[DownloadCache], file_id: str, dest: Union[str, BinaryIO],
+                    chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[BinaryIO, int]]:
+    """
+    Opens the file a download is written to, see DownloadTarget, and saves it to 'dest' when the block exits
+    without an exception.
+    :return: A context manager returning the file to write to and the position the download starts at
+    """
+    target = DownloadTarget(cache, file_id, dest, chunk_size)
+    f, start = target.open()
+    try:
+        yield f, start
+    except BaseException:
+        target.abort()
+        raise
+    target.finish()
+
+
+class Transfer(object):
+    """
+    The state of a download, resumed with Range requests when it's interrupted. Client and AsyncClient do the I/O and
+    report what happened, it decides what to request next.
+
+    :param file: (File) The file, with a file_path
+    :param f: (BinaryIO) Where the file is written
+    :param start: (int) Position in 'f' where the file starts, anything already after it is resumed
+    :param url_template: (str) File download URL with {token} and {path} placeholders
+    :param token: (str) The bot's API token
+    :param retries: (int) How many times an interrupted download is resumed
+    """
+
+    def __init__(self, file: TelegramObjectBase, f: BinaryIO, start: int, url_template: str, token: str,
+                 retries: int):
+        self.file = file
+        self.f = f
+        self.start = start
+        self.url_template = url_template
+        self.token = token
+        self.retries = retries
+
+        # Whether the link expired and the caller must set a new File before the next request
+        self.expired = False
+        self._refreshed = False
+        self._attempt = 0
+        self._offset = 0
+
+    def _restart(self):
+        self.f.seek(self.start)
+        self.f.truncate()
+        self._offset = 0
+
+    def next_request(self) -> Optional[Tuple[str, Optional[dict]]]:
+        """
+        Returns the next request to send.
+        :return: The URL and headers, or None if the file is complete
+        """
+        self._offset = self.f.tell() - self.start
+        size = self.file.get("file_size")
+        if size is not None and self._offset >= size:
+            if self._offset == size:
+                return None
+            # Not the same file, start over
+            self._restart()
+
+        url = self.url_template.format(token=self.token, path=self.file["file_path"])
+        headers = {"Range": "bytes={}-".format(self._offset)} if self._offset else None
+        return url, headers
+
+    def check_status(self, status: int) -> bool:
+        """
+        Handles the status of a response.
+        :param status: (int) The HTTP status
+        :return: (bool) True if the response body should be written, False if the next request should be sent. If
+        'expired' is True, a new File must be set first.
+        """
+        if status == 404 and not self._refreshed:
+            self._refreshed = True
+            self.expired = True
+            return False
+
+        if status == 416:
+            # The partial file is larger than the file, start over
+            self._restart()
+            return False
+
+        if status not in (200, 206):
+            raise make_error("Download failed with HTTP status {}".format(status), status)
+
+        if status == 200 and self._offset:
+            # Range requests aren't supported, start over
+            self._restart()
+        return True
+
+    def refresh(self, file: TelegramObjectBase):
+        """
+        Sets the File object returned by getFile after the link expired.
+        :param file: (File) The new File object
+        """
+        self.file = file
+        self.expired = False
+
+    def interrupted(self, error: Exception):
+        """
+        Handles a connection error while downloading, re-raising it if there are no retries left.
+        :param error: The error
+        """
+        if self._attempt >= self.retries:
+            raise error
+        self._attempt += 1
+
+    def complete(self) -> bool:
+        """
+        Checks whether the whole file was received after the response body was written.
+        :return: (bool) True if it was, False if the connection was closed early and the next request should be sent
+        """
+        size = self.file.get("file_size")
+        written = self.f.tell() - self.start
+        if size is None or written >= size:
+            return True
+
+        self.interrupted(ConnectionError("Download interrupted after {} of {} bytes".format(written, size)))
+        return False
+
+
+class GetFileCache(object):
+    """
+    Remembers the File objects returned by getFile, so that getting the download link of the same file again doesn't
+    need a request. Telegram guarantees that links are valid for at least one hour, entries expire earlier, leaving
+    time to download the file.
+
+    Concurrent getFile calls for a file that isn't cached are coalesced: one request is sent, and every caller gets
+    its result. Callers share the returned File objects, so they shouldn't be modified.
+
+    :param ttl: (float) Optional. Seconds an entry is used for, it should be well under one hour. Defaults to 50
+    minutes.
+    :param size: (int) Optional. How many files are remembered, the least recently used are forgotten first.
+    Defaults to 10000.
+    """
+
+    def __init__(self, ttl: float = 50 * 60, size: int = 10000):
+        self.ttl = ttl
+        self.size = size
+
+        # file_id -> (expiry time, File), least recently used first
+        self._files = OrderedDict()
+        # file_id -> Future or asyncio.Task of the getFile call in progress
+        self._pending = {}
+        self._async_pending = {}
+        self._lock = threading.Lock()
+
+    def get(self, file_id: str) -> Optional[TelegramObjectBase]:
+        """
+        Looks up a file.
+        :param file_id: (str) The file's file_id
+        :return: (File) The File object, or None if it isn't cached or it expired
+        """
+        with self._lock:
+            return self._lookup(file_id)
+
+    def _lookup(self, file_id: str) -> Optional[TelegramObjectBase]:
+        entry = self._files.get(file_id)
+        if entry is None:
+            return None
+
+        if entry[0] <= time.monotonic():
+            del self._files[file_id]
+            return None
+
+        self._files.move_to_end(file_id)
+        return entry[1]
+
+    def set(self, file_id: str, file: TelegramObjectBase):
+        """
+        Stores a File object just returned by getFile.
+        :param file_id: (str) The file's file_id
+        :param file: (File) The File object
+        """
+        with self._lock:
+            self._files[file_id] = (time.monotonic() + self.ttl, file)
+            self._files.move_to_end(file_id)
+            if len(self._files) > self.size:
+                self._files.popitem(last=False)
+
+    def discard(self, file_id: str):
+        """
+        Forgets a file, i.e. because its link expired earlier than expected.
+        :param file_id: (str) The file's file_id
+        """
+        with self._lock:
+            self._files.pop(file_id, None)
+
+    def call(self, file_id: str, get_file: Callable[[], TelegramObjectBase]) -> TelegramObjectBase:
+        """
+        Returns the cached File object for a file, or calls 'get_file' to get it. Threads asking for the same file
+        while 'get_file' is running wait for its result.
+        :param file_id: (str) The file's file_id
+        :param get_file: (callable()) Calls getFile for the file
+        :return: (File) The File object
+        """
+        with self._lock:
+            file = self._lookup(file_id)
+            if file is not None:
+                return file
+
+            future = self._pending.get(file_id)
+            if future is None:
+                future = self._pending[file_id] = Future()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            return future.result()
+
+        try:
+            file = get_file()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.set(file_id, file)
+            future.set_result(file)
+            return file
+        finally:
+            with self._lock:
+                del self._pending[file_id]
+
+    async def async_call(self, file_id: str,
+                         get_file: Callable[[], Awaitable[TelegramObjectBase]]) -> TelegramObjectBase:
+        """
+        Returns the cached File object for a file, or awaits 'get_file' to get it. Tasks asking for the same file
+        while 'get_file' is running wait for its result. Cancelling a waiting task doesn't cancel the call.
+        :param file_id: (str) The file's file_id
+        :param get_file: (coroutine function()) Calls getFile for the file
+        :return: (File) The File object
+        """
+        file = self.get(file_id)
+        if file is not None:
+            return file
+
+        task = self._async_pending.get(file_id)
+        if task is None:
+            task = self._async_pending[file_id] = asyncio.ensure_future(self._async_get(file_id, get_file))
+        return await asyncio.shield(task)
+
+    async def _async_get(self, file_id: str, get_file: Callable[[], Awaitable[TelegramObjectBase]]):
+        try:
+            file = await get_file()
+            self.set(file_id, file)
+            return file
+        finally:
+            del self._async_pending[file_id]
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+
+def copy_file(src: BinaryIO, dest: Union[str, BinaryIO], chunk_size: int = CHUNK_SIZE):
+    """
+    Copies an open file to a path or a writable binary file, in chunks.
+    """
+    if isinstance(dest, str):
+        with open(dest, "wb") as f:
+            shutil.copyfileobj(src, f, chunk_size)
+    else:
+        shutil.copyfileobj(src, dest, chunk_size)
@@ -2,8 +2,108 @@ class NotImplementedWarning(Warning, NotImplementedError):
     pass
 
 class TelegramError(Exception):
-    def __init__(self, description: str, error_code: int):
+    """
+    An error returned by Telegram's API.
+    :param description: (str) Human-readable description of the error
+    :param error_code: (int) The error code, usually matching the HTTP status code
+    :param parameters: (ResponseParameters) Optional. Additional information on how the request can be retried
+    """
+
+    def __init__(self, description: str, error_code: int, parameters: 'ResponseParameters' = None):
         self.description = description
         self.error_code = error_code
+        self.parameters = parameters
 
         super().__init__(description)
+
+    @property
+    def retry_after(self) -> int:
+        """
+        Seconds to wait before repeating the request, if Telegram specified it.
+        """
+        return self.parameters.get("retry_after") if self.parameters else None
+
+    @property
+    def migrate_to_chat_id(self) -> int:
+        """
+        The supergroup the target group was migrated to, if Telegram specified it.
+        """
+        return self.parameters.get("migrate_to_chat_id") if self.parameters else None
+
+
+class BadRequest(TelegramError):
+    """
+    The request is invalid (error code 400).
+    """
+
+
+class ChatMigrated(BadRequest):
+    """
+    The target group has been migrated to a supergroup, whose ID is in 'migrate_to_chat_id'.
+    """
+
+
+class Unauthorized(TelegramError):
+    """
+    The bot's token is invalid (error code 401).
+    """
+
+
+class Forbidden(TelegramError):
+    """
+    The bot can't perform the request, i.e. it was blocked by the user or kicked from the chat (error code 403).
+    """
+
+
+class NotFound(TelegramError):
+    """
+    The method doesn't exist (error code 404).
+    """
+
+
+class Conflict(TelegramError):
+    """
+    The request conflicts with another one, i.e. getUpdates is called while a webhook is set (error code 409).
+    """
+
+
+class FloodWait(TelegramError):
+    """
+    Too many requests were sent, the request can be repeated after 'retry_after' seconds (error code 429).
+    """
+
+
+class ServerError(TelegramError):
+    """
+    Telegram's servers failed to handle the request (error codes 5xx).
+    """
+
+
+_errors_by_code = {
+    400: BadRequest,
+    401: Unauthorized,
+    403: Forbidden,
+    404: NotFound,
+    409: Conflict,
+    429: FloodWait,
+}
+
+
+def make_error(description: str, error_code: int, parameters: 'ResponseParameters' = None) -> TelegramError:
+    """
+    Builds the most specific TelegramError subclass for an error returned by Telegram.
+    :param description: (str) Human-readable description of the error
+    :param error_code: (int) The error code
+    :param parameters: (ResponseParameters) Optional. The response's 'parameters' field
+    :return: A TelegramError instance
+    """
+    if parameters and parameters.get("migrate_to_chat_id"):
+        cls = ChatMigrated
+    elif parameters and parameters.get("retry_after"):
+        cls = FloodWait
+    elif error_code is not None and error_code >= 500:
+        cls = ServerError
+    else:
+        cls = _errors_by_code.get(error_code, TelegramError)
+
+    return cls(description, error_code, parameters)
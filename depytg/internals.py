@@ -1,17 +1,19 @@
-import asyncio as asyncio
 import inspect
-import json
+import logging
 import os
 import warnings
 from inspect import _empty
-from typing import TypeVar, Union, Any, Generator, Tuple, Type, Optional, overload, get_type_hints
+from typing import TypeVar, Union, Any, Generator, List, Tuple, Type, Optional, Callable, overload, get_type_hints
 
 import requests
 
-from depytg.errors import NotImplementedWarning, TelegramError
+from depytg.errors import NotImplementedWarning, make_error
 
 base_url = "https://api.telegram.org/bot{token}/{method}"
 file_url = "https://api.telegram.org/file/bot{token}/{path}"
+json_headers = {"Content-Type": "application/json"}
+
+logger = logging.getLogger("depytg")
 
 unacceptable_names = (
     "from", "import", "for", "class", "def", "return", "yield", "with", "global", "print", "del", "is", "not", "while",
@@ -20,6 +22,52 @@ unacceptable_names = (
 T = TypeVar("T")
 
 
+class JSONCodec(object):
+    """
+    Encodes and decodes JSON using the fastest library available: orjson, ujson, or Python's json module as a
+    fallback. All JSON handled by DepyTG goes through the 'json_codec' instance below.
+    Instances provide 'loads' (str or bytes to object), 'dumps' (object to str) and 'dumpb' (object to UTF-8 bytes).
+    :param backend: (str) Optional. One of 'orjson', 'ujson', 'json'. If not specified, the fastest installed
+    library is used.
+    """
+
+    backends = ('orjson', 'ujson', 'json')
+
+    def __init__(self, backend: str = None):
+        if backend is None:
+            for backend in self.backends:
+                try:
+                    __import__(backend)
+                    break
+                except ImportError:
+                    pass
+
+        if backend not in self.backends:
+            raise ValueError("Unknown JSON backend '{}', must be one of {}".format(backend, self.backends))
+
+        self.name = backend
+        lib = __import__(backend)
+
+        if backend == 'orjson':
+            self.loads = lib.loads
+            self.dumpb = lib.dumps
+            self.dumps = lambda obj: lib.dumps(obj).decode()
+        elif backend == 'ujson':
+            self.loads = lib.loads
+            self.dumps = lambda obj: lib.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+            self.dumpb = lambda obj: self.dumps(obj).encode()
+        else:
+            self.loads = lib.loads
+            self.dumps = lambda obj: lib.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+            self.dumpb = lambda obj: self.dumps(obj).encode()
+
+    def __repr__(self):
+        return "JSONCodec({!r})".format(self.name)
+
+
+json_codec = JSONCodec()
+
+
 def shadow(name: str) -> str:
     if name in unacceptable_names:
         return name + "_"
@@ -32,29 +80,92 @@ def unshadow(name: str) -> str:
     return name
 
 
+class ObjectSchema(object):
+    """
+    Describes the fields of a TelegramObjectBase subclass, as inferred from its constructor's signature and type hints.
+    It is built only once per class, the first time it is needed, since inspecting the signature is expensive.
+    :param cls: The TelegramObjectBase subclass to describe
+    """
+
+    __slots__ = ("fields", "required", "optional", "types", "is_required", "shadowed", "unshadowed")
+
+    def __init__(self, cls: type):
+        s = inspect.signature(cls.__init__)
+        hints = get_type_hints(cls.__init__)
+
+        fields = []
+        self.types = {}
+        self.is_required = {}
+        self.shadowed = {}
+        self.unshadowed = {}
+
+        for name, p in s.parameters.items():
+            if name == "self" or p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD):
+                continue
+            fields.append(name)
+            self.types[name] = hints.get(name, Any)
+            self.is_required[name] = p.default == _empty
+            self.unshadowed[name] = unshadow(name)
+            self.shadowed[unshadow(name)] = name
+
+        # Shadowed names, in the same order as the constructor arguments
+        self.fields = tuple(fields)
+        self.required = tuple(i for i in fields if self.is_required[i])
+        self.optional = tuple(i for i in fields if not self.is_required[i])
+
+
 class TelegramObjectBase(dict):
     """
     Base class for Telegram API objects. It should not be used directly.
     """
 
-    __fields = []
+    # Whether from_json uses the decoders generated by depytg.compiler, see depytg.compiler.enable()
+    _compiled = False
+    # The value passed to depytg.compiler.enable(), overriding the mode's default. None if it wasn't called.
+    _compiled_override = None  # type: Optional[bool]
+    # Whether compiled decoders leave nested objects to be converted on access, see depytg.depyfier.set_mode()
+    _lazy = False
 
     def __init__(self):
         super().__init__()
 
-        self.__fields.extend([i for i, _ in self._get_fields(required=None)])
+    @classmethod
+    def _schema(cls) -> ObjectSchema:
+        """
+        Returns the cached field schema for this class, building it on first use.
+        :return: An ObjectSchema instance
+        """
+        # Look in the class' own namespace so that subclasses don't inherit their parent's schema
+        schema = cls.__dict__.get("_object_schema")
+        if schema is None:
+            schema = ObjectSchema(cls)
+            cls._object_schema = schema
+        return schema
+
+    @classmethod
+    def _get_decoder(cls, lazy: bool = False) -> Callable[[dict], 'TelegramObjectBase']:
+        """
+        Returns the compiled decoder for this class, generating it on first use.
+        :param lazy: (bool) Optional. Whether to return the lazy decoder. Defaults to False.
+        :return: A function that takes a dict and returns an instance of this class
+        """
+        decoder = cls.__dict__.get("_lazy_decoder" if lazy else "_object_decoder")
+        if decoder is None:
+            from depytg.compiler import compile_decoder
+            decoder = compile_decoder(cls, lazy)
+        return decoder
 
     @classmethod
     def _get_fields(cls, required: Optional[bool]) -> Generator[Tuple[str, Any], None, None]:
-        s = inspect.signature(cls.__init__)
-        hints = get_type_hints(cls.__init__)
-        for name, p in s.parameters.items():
-            if name == "self":
-                continue
-            if (required or required is None) and p.default == _empty:
-                yield name, Any if name not in hints else hints[name]
-            if not required and p.default != _empty:
-                yield name, Any if name not in hints else hints[name]
+        schema = cls._schema()
+        if required is None:
+            names = schema.fields
+        elif required:
+            names = schema.required
+        else:
+            names = schema.optional
+        for name in names:
+            yield name, schema.types[name]
 
     @classmethod
     def _get_required(cls) -> Generator[Tuple[str, Any], None, None]:
@@ -62,8 +173,7 @@ class TelegramObjectBase(dict):
         A generator yielding required fields based on the constructor's signature.
         :return: A sequence of (field_name, type) tuples
         """
-        for n, t in cls._get_fields(required=True):
-            yield n, t
+        return cls._get_fields(required=True)
 
     @classmethod
     def _get_optional(cls) -> Generator[Tuple[str, Any], None, None]:
@@ -71,18 +181,18 @@ class TelegramObjectBase(dict):
         A generator yielding optional fields based on the constructor's signature.
         :return: A sequence of (field_name, type) tuples
         """
-        for n, t in cls._get_fields(required=False):
-            yield n, t
+        return cls._get_fields(required=False)
 
     @classmethod
     def _get_field_type(cls, name: str) -> Optional[Type]:
-        # s = inspect.signature(cls.__init__)
-        hints = get_type_hints(cls.__init__)
-        return hints[name] if name in hints else None
+        return cls._schema().types.get(name, None)
 
     @classmethod
     def _is_required(cls, name: str) -> bool:
-        return inspect.signature(cls.__init__).parameters[name].default == _empty
+        try:
+            return cls._schema().is_required[name]
+        except KeyError:
+            raise AttributeError("'{}' object has no field '{}'".format(cls.__name__, unshadow(name))) from None
 
     @classmethod
     def _is_optional(cls, name: str) -> bool:
@@ -95,7 +205,7 @@ class TelegramObjectBase(dict):
 
     @classmethod
     @overload
-    def from_json(cls, j: str) -> 'TelegramObjectBase':
+    def from_json(cls, j: Union[str, bytes]) -> 'TelegramObjectBase':
         pass
 
     @classmethod
@@ -106,12 +216,16 @@ class TelegramObjectBase(dict):
         :return: A TelegramObjectBase subclass instance representing the object
         """
 
-        if isinstance(j, str):
-            j = json.loads(j)
+        if isinstance(j, (str, bytes)):
+            j = json_codec.loads(j)
+
+        if cls._compiled:
+            return cls._get_decoder(cls._lazy)(j)
 
         # Check if all required fields are specified
         # (KwArgs /\ Required) = Required
-        required = set([i for i, _ in cls._get_required()])
+        schema = cls._schema()
+        required = set(schema.unshadowed[i] for i in schema.required)
         given = set(j.keys())
         if given.intersection(required) != required:
             # missing = Required \ (KwArgs /\ Required)
@@ -119,7 +233,7 @@ class TelegramObjectBase(dict):
             raise TypeError("Not a valid '{}' object. Missing {} required fields: {}"
                             .format(cls.__name__, len(missing), missing))
 
-        args = (cls._depyfy(j[i], shadow(i)) for i, _ in cls._get_required())
+        args = (cls._depyfy(j[schema.unshadowed[i]], i) for i in schema.required)
         kwargs = {shadow(i): cls._depyfy(j[i], shadow(i)) for i in given.difference(required)}
 
         return cls(*args, **kwargs)
@@ -146,7 +260,7 @@ class TelegramObjectBase(dict):
 
         try:
             # If the field is optional, the value can be None
-            if cls._is_optional(name) and value is None:
+            if value is None and not cls._schema().is_required.get(name, True):
                 return None
             # Convert the field to a native type
             return depyfy(value, field_type)
@@ -178,9 +292,26 @@ class TelegramObjectBase(dict):
             else:
                 raise
 
-    def __setattr__(self, item, value):
-        from depytg.depyfier import devel
+    # Plain attribute getter, lazy mode replaces __getattr__ with _lazy_getattr
+    _getattr = __getattr__
+
+    def _lazy_getattr(self, item):
+        # Fields left as they are in the JSON by the lazy decoder are converted on first access
+        pending = self.__dict__.get("_pending")
+        if pending:
+            key = unshadow(item)
+            if key in pending:
+                value = self.get(key)
+                if value is not None:
+                    from depytg.compiler import get_field_converter
+                    value = get_field_converter(type(self), key)(value)
+                    self[key] = value
+                # Only once converted, a field that can't be converted raises again on the next access
+                pending.discard(key)
+                return value
+        return self._getattr(item)
 
+    def __setattr__(self, item, value):
         if item.startswith('_'):
             return super().__setattr__(item, value)
 
@@ -197,16 +328,19 @@ class TelegramObjectBase(dict):
         else:
             self[unshadow(item)] = self._depyfy(value, item)
 
-        try:
-            if devel() and not self._is_optional(item):
-                warnings.warn(
-                    "'{}' object has no attribute '{}', but you are trying to set it. It WILL appear in the JSON."
-                        .format(self.__class__.__name__, unshadow(item)), RuntimeWarning)
-        except AttributeError:
-            pass
-
         # return super().__setattr__(item, value)
 
+    # Plain attribute setter, development mode replaces __setattr__ with _devel_setattr
+    _setattr = __setattr__
+
+    def _devel_setattr(self, item, value):
+        self._setattr(item, value)
+
+        if not item.startswith('_') and item not in self._schema().is_required:
+            warnings.warn(
+                "'{}' object has no attribute '{}', but you are trying to set it. It WILL appear in the JSON."
+                    .format(self.__class__.__name__, unshadow(item)), RuntimeWarning)
+
     def __delattr__(self, item):
         required = False
         try:
@@ -224,17 +358,78 @@ class TelegramObjectBase(dict):
         else:
             return super().__delattr__(item)
 
+    def compact(self) -> 'CompactObject':
+        """
+        Returns a compact copy of this object, using much less memory. See depytg.compact.
+        :return: A CompactObject subclass instance
+        """
+        from depytg.compact import compact
+        return compact(self)
+
     def __repr__(self):
         return "{}({})".format(self.__class__.__name__, dict(self))
 
     def __dir__(self):
-        return dir(type(self)) + self.__fields
+        return dir(type(self)) + list(self._schema().fields)
+
+
+def _replace_files(value: Any, input_file: type, attach: Callable[[Any], str]) -> Any:
+    """
+    Replaces the InputFile objects nested in lists and dicts with the result of 'attach'. Containers without files
+    are returned as they are, the others are copied.
+    """
+    if isinstance(value, input_file):
+        return attach(value)
+
+    if isinstance(value, dict):
+        new = None
+        for k, v in value.items():
+            replaced = _replace_files(v, input_file, attach)
+            if replaced is not v:
+                if new is None:
+                    new = dict(value)
+                new[k] = replaced
+        return value if new is None else new
+
+    if isinstance(value, (list, tuple)):
+        items = [_replace_files(v, input_file, attach) for v in value]
+        if any(new is not old for new, old in zip(items, value)):
+            return items
+        return value
+
+    return value
+
+
+def _find_files(value: Any, input_file: type) -> Generator[Any, None, None]:
+    """
+    Yields the InputFile objects nested in lists and dicts.
+    """
+    if isinstance(value, input_file):
+        yield value
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _find_files(v, input_file)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            yield from _find_files(v, input_file)
+
+
+def _rewind_files(positions: List[Tuple[Any, int]]):
+    """
+    Moves files back to the positions returned by TelegramMethodBase._file_positions(), so that a call can be repeated.
+    :param positions: List of (file, position) pairs
+    """
+    for f, position in positions:
+        f.seek(position)
 
 
 class TelegramMethodBase(TelegramObjectBase):
     ReturnType = Any
 
-    def _prepare_for_call(self, token: str) -> Tuple[str, dict, dict, dict, bool]:
+    # Set according to the depyfying mode, see depytg.depyfier.set_mode()
+    _typed_results = False
+
+    def _prepare_for_call(self, token: str, url_template: str = base_url) -> Tuple[str, dict, dict, dict, bool]:
         # Local import to issues due to recursive imports
         # Python is smart enough to work everything out
         from depytg.types import InputFile
@@ -242,71 +437,162 @@ class TelegramMethodBase(TelegramObjectBase):
         form = {}
         files = {}
         inputfiles = {}
-        use_multipart = False
-
-        # Look for InputFile objects and turn them into something that makes
-        # sense to requests
-        filecounter = 0
-        for k, v in self.items():
-            if isinstance(v, InputFile):
-                use_multipart = True
+        # InputFile id -> attachment name, so that a file used more than once is only sent once
+        attached = {}
 
-                fname = "file{}".format(filecounter)
+        def attach(v: InputFile) -> str:
+            fname = attached.get(id(v))
+            if fname is None:
+                fname = "file{}".format(len(attached))
 
                 if v.name and not v.name in files:
                     fname += "_" + v.name
                 elif getattr(v.file, "name", None) and os.path.basename(v.file.name) not in files:
                     fname += "_" + os.path.basename(v.file.name)
 
-                form[k] = "attach://" + fname
-
+                attached[id(v)] = fname
                 files[fname] = v.file
                 inputfiles[fname] = v
-                filecounter += 1
 
+            return "attach://" + fname
+
+        # Look for InputFile objects, including the ones nested in other objects (i.e. InputMedia in
+        # sendMediaGroup), and turn them into something that makes sense to requests
+        for k, v in self.items():
+            if isinstance(v, InputFile):
+                form[k] = attach(v)
+            elif isinstance(v, (list, tuple, dict)):
+                form[k] = json_codec.dumps(_replace_files(v, InputFile, attach))
             else:
-                form[k] = json.dumps(v) if isinstance(v, (list, dict)) else v
+                form[k] = v
+
+        use_multipart = bool(files)
 
-        url = base_url.format(token=token, method=self.__class__.__name__)
+        url = url_template.format(token=token, method=self.__class__.__name__)
 
         return url, form, files, inputfiles, use_multipart
 
-    def __call__(self, token: str) -> ReturnType:
-        url, form, files, _, use_multipart = self._prepare_for_call(token)
+    def _file_positions(self) -> Optional[List[Tuple[Any, int]]]:
+        """
+        Returns the current position of every file the method uploads, including the ones nested in other objects.
+        Sending the method reads them to the end, so they must be rewound with _rewind_files() before the call is
+        repeated.
+        :return: List of (file, position) pairs, or None if a file isn't seekable and the call can't be repeated
+        """
+        from depytg.types import InputFile
+
+        positions = []
+        for v in _find_files(list(self.values()), InputFile):
+            try:
+                positions.append((v.file, v.file.tell()))
+            except (AttributeError, OSError, ValueError):
+                # Pipes, sockets and other streams
+                return None
+        return positions
+
+    def _log_upload(self, form: dict, inputfiles: dict):
+        """
+        Logs the content of a multipart request. Callers should check that debug logging is enabled first, since
+        formatting large forms is expensive.
+        """
+        logger.debug("%s: multipart request with fields %r", self.__class__.__name__, form)
+        for name, f in inputfiles.items():
+            logger.debug("%s: uploading %s (%s) from %r", self.__class__.__name__, name, f.mime, f.file)
+
+    def _post(self, session: Union[requests.Session, Any], token: str, timeout: Optional[float] = None,
+              url_template: str = base_url) -> ReturnType:
+        """
+        Sends the method to Telegram and returns its result.
+        :param session: A requests.Session, or the requests module itself
+        :param token: The bot's API token
+        :param timeout: Optional. Request timeout in seconds
+        :param url_template: Optional. API URL, with {token} and {method} placeholders
+        :return: The method's result
+        """
+        url, form, files, inputfiles, use_multipart = self._prepare_for_call(token, url_template)
 
         if use_multipart:
-            r = requests.post(url, data=form, files=list(files.items()))
+            if logger.isEnabledFor(logging.DEBUG):
+                self._log_upload(form, inputfiles)
+
+            # Files are read while the request is being sent instead of being loaded in memory
+            from depytg.multipart import MultipartStream
+            body = MultipartStream(form, inputfiles)
+            r = session.post(url, data=body, headers={"Content-Type": body.content_type}, timeout=timeout)
         else:
-            r = requests.post(url, json=form)
+            r = session.post(url, data=json_codec.dumpb(form), headers=json_headers, timeout=timeout)
 
-        j = r.json()
-        return self.read_result(j)
+        return self._read_response(r.content, r.status_code)
 
-    @asyncio.coroutine
-    def async_call(self, session, token: str) -> ReturnType:
-        url, form, files, inputfiles, use_multipart = self._prepare_for_call(token)
+    def __call__(self, token: str) -> ReturnType:
+        return self._post(requests, token)
 
-        if use_multipart:
-            data = form.copy()
-            data.update(files)
+    async def async_call(self, session, token: str, timeout=None, url_template: str = base_url) -> ReturnType:
+        """
+        Sends the method to Telegram using an aiohttp session and returns its result.
+        :param session: An aiohttp.ClientSession
+        :param token: The bot's API token
+        :param timeout: Optional. An aiohttp.ClientTimeout, the session's timeout is used if not specified
+        :param url_template: Optional. API URL, with {token} and {method} placeholders
+        :return: The method's result
+        """
+        url, form, files, inputfiles, use_multipart = self._prepare_for_call(token, url_template)
+        kwargs = {} if timeout is None else {"timeout": timeout}
 
-            print("Method:", self.__class__.__name__)
-            print("Data:", data)
+        if use_multipart:
+            if logger.isEnabledFor(logging.DEBUG):
+                self._log_upload(form, inputfiles)
 
             from aiohttp import FormData
             data = FormData()
             data.add_fields(*((str(k), str(v)) for k, v in form.items()))
             for name, f in inputfiles.items():
-                print(name, f.file, f.mime, name)
                 data.add_field(name, f.file, content_type=f.mime, filename=name)
 
-            req = session.post(url, data=data)
+            req = session.post(url, data=data, **kwargs)
         else:
-            req = session.post(url, json=form)
+            req = session.post(url, data=json_codec.dumpb(form), headers=json_headers, **kwargs)
 
-        r = yield from req
-        j = yield from r.json()
-        return self.read_result(j)
+        async with req as r:
+            body = await r.read()
+        return self._read_response(body, r.status)
+
+    @classmethod
+    def _read_response(cls, body: bytes, status: int) -> ReturnType:
+        """
+        Reads the body of an HTTP response from Telegram. Bodies that aren't JSON, i.e. error pages from proxies, are
+        reported as errors based on the HTTP status.
+        :param body: The response body
+        :param status: The HTTP status code
+        :return: The method's result
+        """
+        try:
+            j = json_codec.loads(body)
+        except ValueError:
+            raise make_error("Invalid response with HTTP status {}".format(status), status) from None
+        return cls.read_result(j)
+
+    @classmethod
+    def _get_result_converter(cls) -> Callable[[Any], ReturnType]:
+        """
+        Returns the typed or lazy mode converter for this method's ReturnType, looking it up only once per method.
+        :return: A function that takes the 'result' field of a response and returns the converted object
+        """
+        if cls._lazy:
+            converter = cls.__dict__.get("_lazy_result_converter")
+            if converter is None:
+                from depytg.compiler import build_converter
+                from depytg.depyfier import _keep
+                converter = build_converter(cls.ReturnType, lazy=True) or _keep
+                cls._lazy_result_converter = converter
+            return converter
+
+        converter = cls.__dict__.get("_result_converter")
+        if converter is None:
+            from depytg.depyfier import get_converter
+            converter = get_converter(cls.ReturnType)
+            cls._result_converter = converter
+        return converter
 
     @classmethod
     @overload
@@ -315,7 +601,7 @@ class TelegramMethodBase(TelegramObjectBase):
 
     @classmethod
     @overload
-    def read_result(cls, j: str) -> ReturnType:
+    def read_result(cls, j: Union[str, bytes]) -> ReturnType:
         pass
 
     @classmethod
@@ -326,18 +612,21 @@ class TelegramMethodBase(TelegramObjectBase):
         :param j: The response JSON/dict
         :return: A TelegramObjectBase subclass instance representing the response
         """
-        from depytg.depyfier import depyfy, depyfy_obj_hook, devel
-
-        if isinstance(j, str):
-            if devel():
-                hook = None
-            else:
-                hook = depyfy_obj_hook
+        from depytg.depyfier import depyfy
 
-            j = json.loads(j, object_hook=hook)
+        if isinstance(j, (str, bytes)):
+            j = json_codec.loads(j)
 
         if "ok" in j and j["ok"] and "result" in j:
+            if cls._typed_results:
+                return cls._get_result_converter()(j["result"])
             return depyfy(j["result"], cls.ReturnType)
         else:
-            raise TelegramError(j.get("description", "Unknown error"),
-                                j.get("error_code", None))
+            parameters = j.get("parameters", None)
+            if parameters is not None:
+                from depytg.types import ResponseParameters
+                parameters = ResponseParameters.from_json(parameters)
+
+            raise make_error(j.get("description", "Unknown error"),
+                             j.get("error_code", None),
+                             parameters)
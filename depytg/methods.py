@@ -528,7 +528,7 @@ class sendMediaGroup(TelegramMethodBase):
     :param reply_to_message_id: (int) Optional. If the message is a reply, ID of the original message.
     """
 
-    ReturnType = Message
+    ReturnType = Sequence[Message]
 
     def __init__(self, chat_id: Union[int, str],
                  media: Sequence[InputMedia],
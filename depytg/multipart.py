@@ -0,0 +1,113 @@
+import mmap
+import os
+import uuid
+from typing import BinaryIO, Dict, List, Union
+
+from depytg.types import InputFile
+
+# Size of the chunks files are read in
+CHUNK_SIZE = 64 * 1024
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\r", "%0D").replace("\n", "%0A")
+
+
+def _remaining(f: Union[BinaryIO, mmap.mmap]) -> int:
+    """
+    Returns the number of bytes left to read in a file, without reading it. Raises OSError or ValueError if the file
+    isn't seekable.
+    """
+    if isinstance(f, mmap.mmap):
+        return len(f) - f.tell()
+
+    position = f.tell()
+    try:
+        return os.fstat(f.fileno()).st_size - position
+    except (AttributeError, OSError, ValueError):
+        # In-memory buffers and other seekable streams
+        end = f.seek(0, os.SEEK_END)
+        f.seek(position)
+        return end - position
+
+
+class MultipartStream(object):
+    """
+    A multipart/form-data request body that reads files in chunks while it's being sent, instead of building the
+    whole body in memory. Its length is computed in advance, so that requests can send a Content-Length header
+    instead of using chunked encoding. mmap objects are supported too. Files that aren't seekable, i.e. pipes, are
+    read in memory, since their length can't be known in advance.
+
+    >>> body = MultipartStream(form, inputfiles)
+    >>> requests.post(url, data=body, headers={"Content-Type": body.content_type})
+
+    :param form: (dict) Regular fields, field name to value
+    :param files: (dict of InputFile) Files, attachment name to InputFile
+    :param boundary: (str) Optional. The boundary between parts, by default a random one.
+    """
+
+    def __init__(self, form: dict, files: Dict[str, InputFile], boundary: str = None):
+        self.boundary = boundary or uuid.uuid4().hex
+        self.content_type = "multipart/form-data; boundary={}".format(self.boundary)
+
+        # Parts are either bytes or files, files are read when their turn comes
+        self._parts = []  # type: List[Union[bytes, BinaryIO]]
+        self._length = 0
+
+        for name, value in form.items():
+            self._add(self._header(name) + str(value).encode() + b"\r\n")
+
+        for name, f in files.items():
+            self._add(self._header(name, name, f.mime))
+            try:
+                self._add(f.file, _remaining(f.file))
+            except (AttributeError, OSError, ValueError):
+                self._add(f.file.read())
+            self._add(b"\r\n")
+
+        self._add("--{}--\r\n".format(self.boundary).encode())
+        self._current = 0
+
+    def _header(self, name: str, filename: str = None, mime: str = None) -> bytes:
+        header = '--{}\r\nContent-Disposition: form-data; name="{}"'.format(self.boundary, _quote(name))
+        if filename is not None:
+            header += '; filename="{}"\r\nContent-Type: {}'.format(_quote(filename), mime or "application/octet-stream")
+        return (header + "\r\n\r\n").encode()
+
+    def _add(self, part: Union[bytes, BinaryIO], length: int = None):
+        self._parts.append(part)
+        self._length += len(part) if length is None else length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        """
+        Reads the next chunk of the body.
+        :param size: (int) Optional. Maximum number of bytes to return. By default the rest of the body is returned.
+        :return: (bytes) The chunk, or an empty bytes object once the body has been read completely
+        """
+        if size is None or size < 0:
+            # Nothing is left past the whole body, a bound that also keeps reads from allocating more than needed
+            size = self._length
+
+        chunks = []
+        while size > 0 and self._current < len(self._parts):
+            part = self._parts[self._current]
+
+            if isinstance(part, bytes):
+                chunk = part[:size]
+                if len(chunk) < len(part):
+                    self._parts[self._current] = part[size:]
+                else:
+                    self._current += 1
+            else:
+                chunk = part.read(size)
+                if not chunk:
+                    self._current += 1
+                    continue
+
+            chunks.append(chunk)
+            size -= len(chunk)
+
+        return b"".join(chunks)
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Iterator, AsyncIterator, List, Sequence
+
+from depytg.dedup import RecentUpdates
+from depytg.errors import ServerError, FloodWait
+from depytg.methods import getUpdates
+from depytg.types import Update
+
+logger = logging.getLogger("depytg")
+
+# getUpdates leaving the updates unconverted, so that the poller can convert them one by one and skip the ones it
+# can't convert instead of losing the whole batch. The class name is the method name sent to Telegram.
+_RawGetUpdates = type("getUpdates", (getUpdates,), {"ReturnType": Any, "__module__": __name__})
+
+
+class UpdatePoller(object):
+    """
+    Receives updates through long polling with getUpdates, keeping track of the offset. Iterate over it to get
+    Update objects: use 'for' with a Client or 'async for' with an AsyncClient.
+
+    >>> for update in UpdatePoller(Client("my_bot_token")):
+    ...     handle(update)
+
+    With 'pipeline' enabled (the default), the next getUpdates request is sent as soon as a batch of updates is
+    received, while that batch is being handled, so that new updates are received with the lowest possible latency.
+    Since Telegram considers updates handled once a request with a higher offset is sent, the updates of a batch are
+    lost if the program crashes while handling them. Disable 'pipeline' to only request the next batch once the
+    current one has been handled.
+
+    Network errors, server errors and flood waits are retried, other errors (i.e. Conflict, when a webhook is set)
+    are raised.
+    Updates that can't be converted, i.e. update types added to the Bot API after this library, are logged and
+    skipped.
+
+    :param client: (Client or AsyncClient) The client used to call getUpdates
+    :param timeout: (int) Optional. Long polling timeout in seconds. Defaults to 30.
+    :param limit: (int) Optional. Maximum number of updates per request, 1-100. Defaults to 100.
+    :param allowed_updates: ('Array of String') Optional. Types of updates to receive, see getUpdates.
+    :param offset: (int) Optional. Identifier of the first update to be returned. By default updates starting from
+    the earliest unconfirmed one are returned.
+    :param pipeline: (bool) Optional. Whether to request the next batch while the current one is being handled.
+    Defaults to True.
+    :param retry_delay: (float) Optional. Seconds to wait before retrying after an error. Defaults to 1.
+    :param dedup_size: (int) Optional. If specified, the IDs of this many recent updates are remembered and updates
+    received again (i.e. after restarting from an older offset) are skipped. Defaults to 0.
+    """
+
+    # Errors after which polling is retried
+    transient_errors = (OSError, ServerError, FloodWait)
+
+    def __init__(self, client, timeout: int = 30, limit: int = 100, allowed_updates: Sequence[str] = None,
+                 offset: int = None, pipeline: bool = True, retry_delay: float = 1, dedup_size: int = 0):
+        self.client = client
+        self.timeout = timeout
+        self.limit = limit
+        self.allowed_updates = allowed_updates
+        self.offset = offset
+        self.pipeline = pipeline
+        self.retry_delay = retry_delay
+        self.recent = RecentUpdates(dedup_size) if dedup_size else None
+
+        self._running = False
+
+    def _method(self) -> getUpdates:
+        return _RawGetUpdates(offset=self.offset, limit=self.limit, timeout=self.timeout,
+                              allowed_updates=self.allowed_updates)
+
+    def _handle_batch(self, batch: list) -> List[Update]:
+        # Confirm the batch first, an update that can't be converted would otherwise be received again forever
+        if batch:
+            self.offset = batch[-1]["update_id"] + 1
+
+        updates = []
+        for update in batch:
+            if self.recent is not None and not self.recent.add(update["update_id"]):
+                continue
+
+            if not isinstance(update, Update):
+                try:
+                    update = Update.from_json(update)
+                except Exception as e:
+                    # i.e. update types added to the Bot API after this library
+                    logger.warning("Skipping update %s, it can't be converted: %r", update["update_id"], e)
+                    continue
+
+            updates.append(update)
+        return updates
+
+    def _error_delay(self, e: Exception) -> float:
+        logger.warning("getUpdates failed, retrying: %r", e)
+        if isinstance(e, FloodWait) and e.retry_after is not None:
+            return e.retry_after
+        return self.retry_delay
+
+    def _poll(self) -> List[Update]:
+        while True:
+            try:
+                return self._handle_batch(self.client.call(self._method()))
+            except self.transient_errors as e:
+                time.sleep(self._error_delay(e))
+
+    async def _async_poll(self, transient_errors: tuple) -> List[Update]:
+        while True:
+            try:
+                return self._handle_batch(await self.client.call(self._method()))
+            except transient_errors as e:
+                await asyncio.sleep(self._error_delay(e))
+
+    def _submit_poll(self) -> Future:
+        # Daemon thread, so that a pending long polling request doesn't keep the program alive
+        future = Future()
+
+        def run():
+            try:
+                future.set_result(self._poll())
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name="depytg-poller", daemon=True).start()
+        return future
+
+    def stop(self):
+        """
+        Stops iterating once the updates already received have been returned.
+        """
+        self._running = False
+
+    def __iter__(self) -> Iterator[Update]:
+        self._running = True
+        future = self._submit_poll()
+
+        try:
+            while self._running:
+                batch = future.result()
+                if self.pipeline:
+                    future = self._submit_poll()
+
+                for update in batch:
+                    yield update
+
+                if not self.pipeline and self._running:
+                    future = self._submit_poll()
+        finally:
+            self._running = False
+
+    def __aiter__(self) -> AsyncIterator[Update]:
+        return self._aiterate()
+
+    async def _aiterate(self) -> AsyncIterator[Update]:
+        import aiohttp
+        transient_errors = self.transient_errors + (aiohttp.ClientError, asyncio.TimeoutError)
+
+        self._running = True
+        task = asyncio.ensure_future(self._async_poll(transient_errors))
+
+        try:
+            while self._running:
+                batch = await task
+                if self.pipeline:
+                    task = asyncio.ensure_future(self._async_poll(transient_errors))
+
+                for update in batch:
+                    yield update
+
+                if not self.pipeline and self._running:
+                    task = asyncio.ensure_future(self._async_poll(transient_errors))
+        finally:
+            self._running = False
+            task.cancel()
@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import Dict, Union
+
+from depytg.internals import TelegramMethodBase
+
+
+class TokenBucket(object):
+    """
+    Token bucket implemented as a generic cell rate algorithm: instead of counting tokens, it tracks the
+    theoretical time at which the bucket will be full again. Sends can be scheduled in advance, which lets
+    callers wait outside of any lock.
+    :param rate: (float) Tokens per second
+    :param capacity: (float) Optional. Maximum number of tokens, i.e. how many sends can happen in a burst. Defaults
+    to 1.
+    """
+
+    __slots__ = ("interval", "tolerance", "tat")
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.interval = 1.0 / rate
+        self.tolerance = (capacity - 1) * self.interval
+        # Theoretical arrival time
+        self.tat = 0.0
+
+    def earliest(self, now: float) -> float:
+        """
+        Returns the earliest time a token is available at, without taking it.
+        :param now: (float) The current time
+        """
+        return max(now, self.tat - self.tolerance)
+
+    def take(self, at: float):
+        """
+        Takes a token at the given time, which must not be earlier than earliest().
+        :param at: (float) The time the token will be used at
+        """
+        self.tat = max(self.tat, at) + self.interval
+
+    def block_until(self, until: float):
+        """
+        Makes no tokens available until the given time.
+        :param until: (float) The time tokens become available again
+        """
+        self.tat = max(self.tat, until + self.tolerance)
+
+    def idle(self, now: float) -> bool:
+        """
+        Whether the bucket is full, meaning it's equivalent to a new one.
+        :param now: (float) The current time
+        """
+        return self.tat <= now
+
+
+class RateLimiter(object):
+    """
+    Schedules message sending methods according to Telegram's limits: about 30 messages per second overall, one
+    message per second to the same chat and 20 messages per minute to the same group. Other methods are not limited.
+
+    Callers ask for a delay with reserve(), wait for it, then send; sends to different chats are interleaved as fast
+    as the global limit allows. When Telegram replies with 'retry_after' anyway, backoff() makes the affected chat
+    (or every chat) wait.
+
+    The limiter is thread-safe and doesn't sleep by itself, so it can be shared by sync and async clients.
+    :param global_rate: (float) Optional. Messages per second to all chats. Defaults to 30.
+    :param private_rate: (float) Optional. Messages per second to the same private chat. Defaults to 1.
+    :param group_rate: (float) Optional. Messages per second to the same group or channel. Defaults to 20/60.
+    :param burst: (int) Optional. Messages that can be sent in a burst to all chats. Defaults to 1.
+    """
+
+    def __init__(self, global_rate: float = 30, private_rate: float = 1, group_rate: float = 20 / 60,
+                 burst: int = 1):
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+
+        self._global = TokenBucket(global_rate, burst)
+        self._chats = {}  # type: Dict[Union[int, str], TokenBucket]
+        self._lock = threading.Lock()
+        self._sweep_at = 1024
+
+    @staticmethod
+    def is_limited(method: TelegramMethodBase) -> bool:
+        """
+        Whether the method sends a message and is subject to rate limiting.
+        :param method: The method about to be called
+        """
+        name = method.__class__.__name__
+        return (name.startswith("send") and name != "sendChatAction") or name == "forwardMessage"
+
+    def _chat_bucket(self, chat_id: Union[int, str], now: float) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self._sweep_at:
+                self._sweep(now)
+
+            # Groups, supergroups and channels have negative IDs, channels can be addressed by @username
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            bucket = TokenBucket(self.group_rate if is_group else self.private_rate)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _sweep(self, now: float):
+        # Full buckets are equivalent to new ones, drop them so that memory doesn't grow with the number of chats
+        self._chats = {k: v for k, v in self._chats.items() if not v.idle(now)}
+        self._sweep_at = max(1024, 2 * len(self._chats))
+
+    def reserve(self, method: TelegramMethodBase) -> float:
+        """
+        Schedules a method call and returns how long the caller has to wait before sending it.
+        :param method: The method about to be called
+        :return: (float) Seconds to wait, 0 if it can be sent right away
+        """
+        if not self.is_limited(method):
+            return 0.0
+
+        chat_id = method.get("chat_id")
+
+        with self._lock:
+            now = time.monotonic()
+
+            if chat_id is None:
+                at = self._global.earliest(now)
+                self._global.take(at)
+            else:
+                bucket = self._chat_bucket(chat_id, now)
+                at = max(self._global.earliest(now), bucket.earliest(now))
+                self._global.take(at)
+                bucket.take(at)
+
+        return at - now
+
+    def backoff(self, method: TelegramMethodBase, retry_after: float):
+        """
+        Stops sending to the method's chat for 'retry_after' seconds, as requested by Telegram. If the method has no
+        chat, sending to all chats is stopped instead.
+        :param method: The method that was rejected
+        :param retry_after: (float) Seconds to wait
+        """
+        chat_id = method.get("chat_id")
+
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._global if chat_id is None else self._chat_bucket(chat_id, now)
+            bucket.block_until(now + retry_after)
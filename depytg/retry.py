@@ -0,0 +1,72 @@
+from typing import Callable, Optional, Union
+
+from depytg.errors import TelegramError, FloodWait, ChatMigrated, ServerError
+from depytg.internals import TelegramMethodBase
+
+# Default retry_policy argument of the clients, each client gets its own RetryPolicy()
+DEFAULT_POLICY = object()
+
+
+class RetryPolicy(object):
+    """
+    Decides whether a failed method call is repeated, based on the error returned by Telegram. Decisions only use
+    the error itself, so no additional request is needed to make them.
+
+    - FloodWait: the call is repeated after 'retry_after' seconds, unless it's longer than 'max_flood_wait'. If
+      Telegram didn't specify it, 'default_flood_wait' seconds are waited, doubled for each following repetition.
+    - ChatMigrated: 'chat_id' is replaced with the new supergroup's ID in the method and the call is repeated
+    - ServerError: the call is repeated with exponential backoff. Disabled by default, since repeating
+      non-idempotent methods such as sendMessage may result in duplicate messages.
+
+    :param flood_retries: (int) Optional. How many times a call is repeated after a FloodWait. Defaults to 3.
+    :param max_flood_wait: (float) Optional. Longest 'retry_after' to wait for, in seconds. Defaults to 60.
+    :param default_flood_wait: (float) Optional. Seconds to wait after a FloodWait without 'retry_after'. Defaults to
+    1.
+    :param follow_migrations: (bool) Optional. Whether to follow chat migrations. Defaults to True.
+    :param on_migrate: (callable(old_chat_id, new_chat_id)) Optional. Called when a chat migration is followed, so
+    that the new ID can be stored.
+    :param server_retries: (int) Optional. How many times a call is repeated after a ServerError. Defaults to 0.
+    :param server_backoff: (float) Optional. Seconds to wait before the first repetition after a ServerError, doubled
+    for each following one. Defaults to 0.5.
+    """
+
+    def __init__(self, flood_retries: int = 3, max_flood_wait: float = 60, follow_migrations: bool = True,
+                 on_migrate: Callable[[Union[int, str], int], None] = None, server_retries: int = 0,
+                 server_backoff: float = 0.5, default_flood_wait: float = 1):
+        self.flood_retries = flood_retries
+        self.max_flood_wait = max_flood_wait
+        self.follow_migrations = follow_migrations
+        self.on_migrate = on_migrate
+        self.server_retries = server_retries
+        self.server_backoff = server_backoff
+        self.default_flood_wait = default_flood_wait
+
+    def retry_delay(self, method: TelegramMethodBase, error: TelegramError, attempt: int) -> Optional[float]:
+        """
+        Decides whether to repeat a failed call, updating the method if needed.
+        :param method: The method that failed
+        :param error: The error returned by Telegram
+        :param attempt: (int) How many times the call has been repeated so far
+        :return: (float) Seconds to wait before repeating the call, or None to give up and raise the error
+        """
+        if isinstance(error, FloodWait):
+            retry_after = error.retry_after
+            if retry_after is None:
+                retry_after = self.default_flood_wait * 2 ** attempt
+            if attempt < self.flood_retries and retry_after <= self.max_flood_wait:
+                return retry_after
+
+        elif isinstance(error, ChatMigrated):
+            old_chat_id = method.get("chat_id")
+            # Only follow a migration once, and only if the method targets a chat
+            if self.follow_migrations and old_chat_id is not None and old_chat_id != error.migrate_to_chat_id:
+                method["chat_id"] = error.migrate_to_chat_id
+                if self.on_migrate is not None:
+                    self.on_migrate(old_chat_id, error.migrate_to_chat_id)
+                return 0.0
+
+        elif isinstance(error, ServerError):
+            if attempt < self.server_retries:
+                return self.server_backoff * 2 ** attempt
+
+        return None
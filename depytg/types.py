@@ -868,7 +868,7 @@ class ResponseParameters(TelegramObjectBase):
     the request can be repeated
     """
 
-    def __init__(self, migrate_to_chat_id: int,
+    def __init__(self, migrate_to_chat_id: int = None,
                  retry_after: int = None):
         super().__init__()
 
@@ -914,9 +914,9 @@ class InputMediaPhoto(InputMedia):
     """
     Represents a photo to be sent.
     :param type: (str) Type of the result, must be photo
-    :param media: (str) File to send. Pass a file_id to send a file that exists on the Telegram servers (recommended),
-    pass an HTTP URL for Telegram to get a file from the Internet, or pass "attach://<file_attach_name>" to upload a new
-    one using multipart/form-data under <file_attach_name> name.
+    :param media: Union[InputFile, String] File to send. Pass a file_id to send a file that exists on the Telegram
+    servers (recommended), pass an HTTP URL for Telegram to get a file from the Internet, or pass an InputFile (or
+    "attach://<file_attach_name>") to upload a new one using multipart/form-data under <file_attach_name> name.
     :param thumb: Union[InputFile, String] Optional. Thumbnail of the file sent. The thumbnail should be in JPEG format
     and less than 200 kB in size. A thumbnail‘s width and height should not exceed 90. Ignored if the file is not
     uploaded using multipart/form-data. Thumbnails can’t be reused and can be only uploaded as a new file, so you can
@@ -927,7 +927,7 @@ class InputMediaPhoto(InputMedia):
     """
 
     def __init__(self, type: str,
-                 media: str,
+                 media: Union[InputFile, str],
                  thumb: Union[InputFile, str] = None,
                  caption: str = None,
                  parse_mode: bool = None):
@@ -943,9 +943,9 @@ class InputMediaVideo(InputMedia):
     """
     Represents a photo to be sent.
     :param type: (str) Type of the result, must be video
-    :param media: (str) File to send. Pass a file_id to send a file that exists on the Telegram servers (recommended),
-    pass an HTTP URL for Telegram to get a file from the Internet, or pass "attach://<file_attach_name>" to upload a new
-    one using multipart/form-data under <file_attach_name> name.
+    :param media: Union[InputFile, String] File to send. Pass a file_id to send a file that exists on the Telegram
+    servers (recommended), pass an HTTP URL for Telegram to get a file from the Internet, or pass an InputFile (or
+    "attach://<file_attach_name>") to upload a new one using multipart/form-data under <file_attach_name> name.
     :param thumb: Union[InputFile, String] Optional. Thumbnail of the file sent. The thumbnail should be in JPEG format
     and less than 200 kB in size. A thumbnail‘s width and height should not exceed 90. Ignored if the file is not
     uploaded using multipart/form-data. Thumbnails can’t be reused and can be only uploaded as a new file, so you can
@@ -960,7 +960,7 @@ class InputMediaVideo(InputMedia):
     """
 
     def __init__(self, type: str,
-                 media: str,
+                 media: Union[InputFile, str],
                  thumb: Union[InputFile, str] = None,
                  caption: str = None,
                  parse_mode: bool = None,
@@ -984,9 +984,9 @@ class InputMediaAnimation(InputMedia):
     """
     Represents an animation file (GIF or H.264/MPEG-4 AVC video without sound) to be sent.
     :param type: (str) Type of the result, must be animation
-    :param media: (str) File to send. Pass a file_id to send a file that exists on the Telegram servers (recommended),
-    pass an HTTP URL for Telegram to get a file from the Internet, or pass "attach://<file_attach_name>" to upload a new
-    one using multipart/form-data under <file_attach_name> name.
+    :param media: Union[InputFile, String] File to send. Pass a file_id to send a file that exists on the Telegram
+    servers (recommended), pass an HTTP URL for Telegram to get a file from the Internet, or pass an InputFile (or
+    "attach://<file_attach_name>") to upload a new one using multipart/form-data under <file_attach_name> name.
     :param thumb: Union[InputFile, String] Optional. Thumbnail of the file sent. The thumbnail should be in JPEG format
     and less than 200 kB in size. A thumbnail‘s width and height should not exceed 90. Ignored if the file is not
     uploaded using multipart/form-data. Thumbnails can’t be reused and can be only uploaded as a new file, so you can
@@ -1000,7 +1000,7 @@ class InputMediaAnimation(InputMedia):
     """
 
     def __init__(self, type: str,
-                 media: str,
+                 media: Union[InputFile, str],
                  thumb: Union[InputFile, str] = None,
                  caption: str = None,
                  parse_mode: bool = None,
@@ -1022,9 +1022,9 @@ class InputMediaAudio(InputMedia):
     """
     Represents an audio file to be treated as music to be sent.
     :param type: (str) Type of the result, must be audio
-    :param media: (str) File to send. Pass a file_id to send a file that exists on the Telegram servers (recommended),
-    pass an HTTP URL for Telegram to get a file from the Internet, or pass "attach://<file_attach_name>" to upload a new
-    one using multipart/form-data under <file_attach_name> name.
+    :param media: Union[InputFile, String] File to send. Pass a file_id to send a file that exists on the Telegram
+    servers (recommended), pass an HTTP URL for Telegram to get a file from the Internet, or pass an InputFile (or
+    "attach://<file_attach_name>") to upload a new one using multipart/form-data under <file_attach_name> name.
     :param thumb: Union[InputFile, String] Optional. Thumbnail of the file sent. The thumbnail should be in JPEG format
     and less than 200 kB in size. A thumbnail‘s width and height should not exceed 90. Ignored if the file is not
     uploaded using multipart/form-data. Thumbnails can’t be reused and can be only uploaded as a new file, so you can
@@ -1038,7 +1038,7 @@ class InputMediaAudio(InputMedia):
     """
 
     def __init__(self, type: str,
-                 media: str,
+                 media: Union[InputFile, str],
                  thumb: Union[InputFile, str] = None,
                  caption: str = None,
                  parse_mode: bool = None,
@@ -1060,9 +1060,9 @@ class InputMediaDocument(InputMedia):
     """
     Represents a general file to be sent.
     :param type: (str) Type of the result, must be document
-    :param media: (str) File to send. Pass a file_id to send a file that exists on the Telegram servers (recommended),
-    pass an HTTP URL for Telegram to get a file from the Internet, or pass "attach://<file_attach_name>" to upload a new
-    one using multipart/form-data under <file_attach_name> name.
+    :param media: Union[InputFile, String] File to send. Pass a file_id to send a file that exists on the Telegram
+    servers (recommended), pass an HTTP URL for Telegram to get a file from the Internet, or pass an InputFile (or
+    "attach://<file_attach_name>") to upload a new one using multipart/form-data under <file_attach_name> name.
     :param thumb: Union[InputFile, String] Optional. Thumbnail of the file sent. The thumbnail should be in JPEG format
     and less than 200 kB in size. A thumbnail‘s width and height should not exceed 90. Ignored if the file is not
     uploaded using multipart/form-data. Thumbnails can’t be reused and can be only uploaded as a new file, so you can
@@ -1073,7 +1073,7 @@ class InputMediaDocument(InputMedia):
     """
 
     def __init__(self, type: str,
-                 media: str,
+                 media: Union[InputFile, str],
                  thumb: Union[InputFile, str] = None,
                  caption: str = None,
                  parse_mode: bool = None):
@@ -2282,9 +2282,9 @@ class Game(TelegramObjectBase):
 
     def __init__(self, title: str,
                  description: str,
-                 photo: 'Array of PhotoSize',
+                 photo: Sequence['PhotoSize'],
                  text: str = None,
-                 text_entities: 'Array of MessageEntity' = None,
+                 text_entities: Sequence['MessageEntity'] = None,
                  animation: 'Animation' = None):
         super().__init__()
 
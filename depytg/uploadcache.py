@@ -0,0 +1,366 @@
+"""
+Client-side cache of uploaded files, so that files sent more than once are only uploaded the first time.
+
+Files are identified by a hash of their content. When a method uploading an InputFile succeeds, the file_id
+Telegram assigned to it is stored under that hash; later calls sending the same content get the file_id instead
+of the InputFile, and nothing is uploaded.
+
+>>> client = Client("my_bot_token", upload_cache=MemoryUploadCache())
+>>> client(methods.sendPhoto(chat_id, InputFile(open("cat.jpg", "rb"), "image/jpeg")))  # Uploaded
+>>> client(methods.sendPhoto(chat_id, InputFile(open("cat.jpg", "rb"), "image/jpeg")))  # Sent by file_id
+"""
+
+import abc
+import copy
+import dbm
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from depytg.errors import BadRequest
+from depytg.internals import TelegramMethodBase, _rewind_files
+from depytg.multipart import CHUNK_SIZE
+from depytg.types import InputFile
+
+# Fields of a message that hold the file it was sent with
+MESSAGE_FILE_FIELDS = ("photo", "video", "animation", "document", "audio", "voice", "video_note", "sticker")
+
+# Fields never looked up: thumbnails can't be reused, certificates aren't stored by Telegram
+UNCACHED_FIELDS = ("thumb", "certificate")
+
+
+class _Upload(object):
+    """
+    An InputFile found in a method, along with where it was found.
+    """
+
+    __slots__ = ("key", "container", "field", "file", "index")
+
+    def __init__(self, key: str, container: dict, field: str, file: InputFile, index: Optional[int]):
+        self.key = key
+        self.container = container
+        self.field = field
+        self.file = file
+        # Index of the sent message in the result for sendMediaGroup, None if the result is the message itself
+        self.index = index
+
+    def restore(self):
+        self.container[self.field] = self.file
+
+
+class _Uploads(list):
+    """
+    The files found in a method by UploadCache.prepare(), along with the positions of all the method's files, cached
+    or not, to rewind them before the call is repeated. 'positions' is None if a file can't be rewound.
+    """
+
+    def __init__(self, uploads: List[_Upload], positions: Optional[List[Tuple[Any, int]]]):
+        super().__init__(uploads)
+        self.positions = positions
+
+
+def _seekable(f: InputFile) -> bool:
+    try:
+        f.file.seek(f.file.tell())
+        return True
+    except (AttributeError, OSError, ValueError):
+        # Pipes, sockets and other streams
+        return False
+
+
+def _accepts_file_id(method: TelegramMethodBase, field: str) -> bool:
+    return str in getattr(method._get_field_type(field), "__args__", ())
+
+
+def _sent_file_id(message: Any) -> Optional[str]:
+    """
+    Returns the file_id of the file a message was sent with.
+    """
+    if not isinstance(message, dict):
+        return None
+
+    for field in MESSAGE_FILE_FIELDS:
+        value = message.get(field)
+        if value:
+            if isinstance(value, list):
+                # Photo sizes, the original size is the last one
+                value = value[-1]
+            return value.get("file_id")
+
+    return None
+
+
+class UploadCache(abc.ABC):
+    """
+    Base class for upload caches, mapping a key made of the file's content hash and kind (photo, document...) to the
+    file_id Telegram assigned to it. The kind is part of the key since Telegram doesn't accept, for instance,
+    a photo's file_id as a document.
+
+    Subclasses store the mapping by implementing get(), set() and discard(), which must be thread-safe.
+
+    :param hash_name: (str) Optional. Name of the hashlib algorithm used to hash files. Defaults to "sha256".
+    """
+
+    def __init__(self, hash_name: str = "sha256"):
+        self.hash_name = hash_name
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up a file.
+        :param key: (str) The file's key
+        :return: (str) The file_id, or None if the file isn't cached
+        """
+
+    @abc.abstractmethod
+    def set(self, key: str, file_id: str):
+        """
+        Stores a file's file_id.
+        :param key: (str) The file's key
+        :param file_id: (str) The file_id
+        """
+
+    @abc.abstractmethod
+    def discard(self, key: str):
+        """
+        Forgets a file, i.e. because Telegram didn't accept its file_id.
+        :param key: (str) The file's key
+        """
+
+    def hash_file(self, f: InputFile) -> str:
+        """
+        Hashes the content of a file from its current position, reading it in chunks. The position is restored
+        afterwards.
+        :param f: (InputFile) The file, it must be seekable
+        :return: (str) The hex digest
+        """
+        position = f.file.tell()
+        h = hashlib.new(self.hash_name)
+        try:
+            for chunk in iter(lambda: f.file.read(CHUNK_SIZE), b""):
+                h.update(chunk)
+        finally:
+            f.file.seek(position)
+        return h.hexdigest()
+
+    def _find_uploads(self, method: TelegramMethodBase) -> Tuple[TelegramMethodBase, List[_Upload]]:
+        # Files are looked up in a copy of the method, along with copies of the media objects holding them, so that
+        # replacing them doesn't modify the caller's method
+        prepared = copy.copy(method)
+        uploads = []
+
+        def add(container: dict, field: str, kind: str, index: Optional[int]):
+            f = container[field]
+            if not _seekable(f):
+                # Reading the file to hash it would consume it, it's uploaded as usual
+                return
+            key = "{}:{}".format(kind, self.hash_file(f))
+            uploads.append(_Upload(key, container, field, f, index))
+
+        for field, value in method.items():
+            if isinstance(value, InputFile):
+                if field not in UNCACHED_FIELDS and _accepts_file_id(method, field):
+                    add(prepared, field, field, None)
+
+            elif isinstance(value, dict):
+                # A single media object, i.e. editMessageMedia, the result is the message itself
+                if isinstance(value.get("media"), InputFile):
+                    item = prepared[field] = copy.copy(value)
+                    add(item, "media", value.get("type", "media"), None)
+
+            elif isinstance(value, (list, tuple)):
+                # sendMediaGroup, one message is sent for each item
+                items = None
+                for index, item in enumerate(value):
+                    if isinstance(item, dict) and isinstance(item.get("media"), InputFile):
+                        if items is None:
+                            items = prepared[field] = list(value)
+                        item = items[index] = copy.copy(item)
+                        add(item, "media", item.get("type", "media"), index)
+
+        return prepared, uploads
+
+    def prepare(self, method: TelegramMethodBase) -> Tuple[TelegramMethodBase, _Uploads]:
+        """
+        Replaces the method's files that are in the cache with their file_id. The method isn't modified, a copy is
+        returned instead.
+        :param method: The method about to be called
+        :return: The method to call, and the files found in it, to be passed to update() or restore()
+        """
+        positions = method._file_positions()
+        prepared, uploads = self._find_uploads(method)
+        for upload in uploads:
+            file_id = self.get(upload.key)
+            if file_id is not None:
+                upload.container[upload.field] = file_id
+        return prepared, _Uploads(uploads, positions)
+
+    def update(self, uploads: _Uploads, result: Any):
+        """
+        Stores the file_ids of the files uploaded by a successful call.
+        :param uploads: The files returned by prepare()
+        :param result: The method's result
+        """
+        for upload in uploads:
+            if upload.container[upload.field] is not upload.file:
+                # Sent by file_id
+                continue
+
+            message = result
+            if upload.index is not None:
+                message = result[upload.index] if isinstance(result, list) and upload.index < len(result) else None
+
+            file_id = _sent_file_id(message)
+            if file_id is not None:
+                self.set(upload.key, file_id)
+
+    def restore(self, uploads: _Uploads, error: Exception) -> bool:
+        """
+        Handles a failed call. If cached file_ids were sent and Telegram rejected the request, they are forgotten and
+        the files are put back in the method returned by prepare() and rewound, so that the call can be repeated
+        uploading them. The call can't be repeated if some of the method's files can't be rewound.
+        :param uploads: The files returned by prepare()
+        :param error: The error raised by the call
+        :return: (bool) True if the call should be repeated
+        """
+        if not isinstance(error, BadRequest):
+            return False
+
+        stale = [upload for upload in uploads if upload.container[upload.field] is not upload.file]
+        if not stale:
+            return False
+
+        for upload in stale:
+            self.discard(upload.key)
+        if uploads.positions is None:
+            return False
+
+        for upload in uploads:
+            upload.restore()
+        # Including the files that weren't looked up, i.e. thumbnails, read by the failed call
+        _rewind_files(uploads.positions)
+        return True
+
+
+class MemoryUploadCache(UploadCache):
+    """
+    Keeps the most recently used files in memory. All operations take constant time.
+
+    :param size: (int) Optional. How many files are remembered, the least recently used are forgotten first.
+    Defaults to 10000.
+    :param hash_name: (str) Optional. Name of the hashlib algorithm used to hash files. Defaults to "sha256".
+    """
+
+    def __init__(self, size: int = 10000, hash_name: str = "sha256"):
+        super().__init__(hash_name)
+        self.size = size
+
+        self._file_ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            file_id = self._file_ids.get(key)
+            if file_id is not None:
+                self._file_ids.move_to_end(key)
+            return file_id
+
+    def set(self, key: str, file_id: str):
+        with self._lock:
+            self._file_ids[key] = file_id
+            self._file_ids.move_to_end(key)
+            if len(self._file_ids) > self.size:
+                self._file_ids.popitem(last=False)
+
+    def discard(self, key: str):
+        with self._lock:
+            self._file_ids.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._file_ids)
+
+
+class SQLiteUploadCache(UploadCache):
+    """
+    Stores files in an SQLite database, so that they're remembered across restarts and can be shared by several
+    processes.
+
+    :param path: (str) Path of the database file, it's created if it doesn't exist
+    :param table: (str) Optional. Name of the table, created if it doesn't exist. Must be a valid identifier.
+    Defaults to "depytg_uploads".
+    :param hash_name: (str) Optional. Name of the hashlib algorithm used to hash files. Defaults to "sha256".
+    """
+
+    def __init__(self, path: str, table: str = "depytg_uploads", hash_name: str = "sha256"):
+        super().__init__(hash_name)
+        # The name is part of the queries, it can't be passed as a parameter
+        if not table.isidentifier():
+            raise ValueError("Invalid table name '{}', must be a valid identifier".format(table))
+        self.table = table
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute('CREATE TABLE IF NOT EXISTS "{}" (key TEXT PRIMARY KEY, file_id TEXT NOT NULL)'
+                             .format(table))
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute('SELECT file_id FROM "{}" WHERE key = ?'.format(self.table), (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def set(self, key: str, file_id: str):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO "{}" (key, file_id) VALUES (?, ?)'.format(self.table),
+                             (key, file_id))
+
+    def discard(self, key: str):
+        with self._lock:
+            self._db.execute('DELETE FROM "{}" WHERE key = ?'.format(self.table), (key,))
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        with self._lock:
+            self._db.close()
+
+
+class DbmUploadCache(UploadCache):
+    """
+    Stores files in a dbm database, so that they're remembered across restarts.
+
+    :param path: (str) Path of the database file, it's created if it doesn't exist
+    :param hash_name: (str) Optional. Name of the hashlib algorithm used to hash files. Defaults to "sha256".
+    """
+
+    def __init__(self, path: str, hash_name: str = "sha256"):
+        super().__init__(hash_name)
+
+        self._db = dbm.open(path, "c")
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            file_id = self._db.get(key)
+        return None if file_id is None else file_id.decode()
+
+    def set(self, key: str, file_id: str):
+        with self._lock:
+            self._db[key] = file_id
+
+    def discard(self, key: str):
+        with self._lock:
+            try:
+                del self._db[key]
+            except KeyError:
+                pass
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        with self._lock:
+            self._db.close()
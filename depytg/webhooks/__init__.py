@@ -1,3 +1,16 @@
-__all__ = ('flask',)
+# Each receiver is only available if its web framework is installed
+__all__ = ['asgi']
 
-from . import *
\ No newline at end of file
+from . import asgi
+
+try:
+    from . import flask
+    __all__.append('flask')
+except ImportError:
+    pass
+
+try:
+    from . import aiohttp
+    __all__.append('aiohttp')
+except ImportError:
+    pass
@@ -0,0 +1,147 @@
+"""
+Serves a webhook with a production HTTP server.
+
+    python -m depytg.webhooks mybot.handlers:on_update --path my_secret_path --port 8443 --workers 4
+
+Regular functions are served as a Flask app, with gunicorn or waitress. Coroutine functions are served as an ASGI
+app, with gunicorn and uvicorn workers or with uvicorn alone, or as an aiohttp app.
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import sys
+from typing import Callable, List
+
+from depytg.dispatcher import OVERFLOW_POLICIES
+
+# Servers able to serve each kind of app, in order of preference
+SYNC_SERVERS = ("gunicorn", "waitress")
+ASYNC_SERVERS = ("gunicorn", "uvicorn", "aiohttp")
+
+
+def _import_handler(path: str) -> Callable:
+    module, _, name = path.partition(":")
+    if not name:
+        raise ValueError("Handler must be specified as 'module:function', got '{}'".format(path))
+    return getattr(importlib.import_module(module), name)
+
+
+def _find_server(servers: tuple) -> str:
+    for server in servers:
+        try:
+            importlib.import_module(server)
+            return server
+        except ImportError:
+            pass
+    raise ImportError("No supported server is installed, install one of: {}".format(", ".join(servers)))
+
+
+def _parse_args(argv: List[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m depytg.webhooks", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("handler", help="the update handler, as 'module:function'. Coroutine functions are served "
+                                        "by an asyncio server.")
+    parser.add_argument("--path", required=True, help="URL path of the webhook, keep it secret")
+    parser.add_argument("--host", default="0.0.0.0", help="address to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on (default: %(default)s)")
+    parser.add_argument("--server", choices=sorted(set(SYNC_SERVERS + ASYNC_SERVERS)),
+                        help="HTTP server to use (default: the first one installed among {} for regular handlers, "
+                             "{} for coroutine handlers)".format(", ".join(SYNC_SERVERS), ", ".join(ASYNC_SERVERS)))
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of server processes, only supported by gunicorn (default: %(default)s)")
+    parser.add_argument("--threads", type=int, default=4,
+                        help="threads per process serving requests, for regular handlers (default: %(default)s)")
+    parser.add_argument("--keepalive", type=float, default=75,
+                        help="seconds an idle connection from Telegram is kept open (default: %(default)s)")
+    parser.add_argument("--max-body-size", type=int, default=1024 * 1024,
+                        help="largest accepted request in bytes (default: %(default)s)")
+    parser.add_argument("--handler-workers", type=int, default=0,
+                        help="if specified, updates are queued and handled by this many workers per process "
+                             "after replying to Telegram")
+    parser.add_argument("--queue-size", type=int, default=1000,
+                        help="maximum number of queued updates per process (default: %(default)s)")
+    parser.add_argument("--overflow", choices=OVERFLOW_POLICIES, default="block",
+                        help="what to do when the queue is full (default: %(default)s)")
+    parser.add_argument("--secret-token", default=os.environ.get("DEPYTG_WEBHOOK_SECRET_TOKEN"),
+                        help="secret token requests must carry (default: $DEPYTG_WEBHOOK_SECRET_TOKEN)")
+    parser.add_argument("--dedup-size", type=int, default=0,
+                        help="how many update IDs are remembered to ignore repeated updates (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def _serve_gunicorn(app: Callable, args: argparse.Namespace, asgi: bool):
+    from gunicorn.app.base import BaseApplication
+
+    options = {
+        "bind": "{}:{}".format(args.host, args.port),
+        "workers": args.workers,
+        "keepalive": args.keepalive,
+    }
+    if asgi:
+        try:
+            import uvicorn_worker
+            options["worker_class"] = "uvicorn_worker.UvicornWorker"
+        except ImportError:
+            options["worker_class"] = "uvicorn.workers.UvicornWorker"
+    else:
+        options["worker_class"] = "gthread"
+        options["threads"] = args.threads
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Application().run()
+
+
+def main(argv: List[str] = None):
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    handler = _import_handler(args.handler)
+    is_async = asyncio.iscoroutinefunction(handler)
+
+    server = args.server or _find_server(ASYNC_SERVERS if is_async else SYNC_SERVERS)
+    if server not in (ASYNC_SERVERS if is_async else SYNC_SERVERS):
+        sys.exit("{} can't serve {} handlers".format(server, "coroutine" if is_async else "regular"))
+    if args.workers > 1 and server != "gunicorn":
+        sys.exit("Multiple workers are only supported by gunicorn")
+
+    options = dict(workers=args.handler_workers, queue_size=args.queue_size, overflow=args.overflow,
+                   secret_token=args.secret_token, dedup_size=args.dedup_size, max_body_size=args.max_body_size)
+
+    if server == "aiohttp":
+        from aiohttp import web
+        from depytg.webhooks import aiohttp
+
+        app = aiohttp.get_app("webhook", args.path, handler, **options)
+        web.run_app(app, host=args.host, port=args.port, keepalive_timeout=args.keepalive)
+
+    elif is_async:
+        from depytg.webhooks import asgi
+
+        app = asgi.get_app("webhook", args.path, handler, **options)
+
+        if server == "uvicorn":
+            import uvicorn
+            uvicorn.run(app, host=args.host, port=args.port, timeout_keep_alive=int(args.keepalive))
+        else:
+            _serve_gunicorn(app, args, asgi=True)
+
+    else:
+        from depytg.webhooks import flask
+
+        app = flask.get_app("webhook", args.path, handler, **options)
+
+        if server == "waitress":
+            import waitress
+            waitress.serve(app, host=args.host, port=args.port, threads=args.threads,
+                           channel_timeout=args.keepalive, max_request_body_size=args.max_body_size)
+        else:
+            _serve_gunicorn(app, args, asgi=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import asyncio
+import hmac
+import logging
+from typing import Awaitable, Callable, Optional, cast
+
+from depytg.dedup import RecentUpdates
+from depytg.dispatcher import AsyncDispatcher, OVERFLOW_POLICIES
+from depytg.internals import json_codec
+from depytg.types import Update
+
+logger = logging.getLogger("depytg")
+
+# Header carrying the secret token passed to setWebhook, on Bot API servers supporting it
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def check_secret_token(expected: Optional[str], received: Optional[str]) -> bool:
+    """
+    Checks the secret token of a webhook request in constant time.
+    :param expected: (str) The configured token, or None to accept any request
+    :param received: (str) The token in the request's header, if any
+    :return: (bool) True if the request is allowed
+    """
+    if expected is None:
+        return True
+    if received is None:
+        return False
+    return hmac.compare_digest(expected.encode(), received.encode())
+
+
+class AsyncReceiver(object):
+    """
+    Handles the body of webhook requests for the asyncio based receivers.
+
+    :param on_update: (coroutine function(Update)) Awaited on new updates
+    :param workers: (int) Number of worker tasks, 0 to await `on_update` before replying
+    :param queue_size: (int) Maximum number of updates queued or being handled
+    :param overflow: (str) What to do when an update is received while the queue is full
+    :param secret_token: (str) Secret token requests must carry, or None
+    :param dedup_size: (int) How many update IDs are remembered to ignore repeats, 0 to handle every request
+    """
+
+    def __init__(self, on_update: Callable[[Update], Awaitable], workers: int, queue_size: int, overflow: str,
+                 secret_token: Optional[str] = None, dedup_size: int = 0):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError("Invalid overflow policy '{}', use one of {}".format(overflow, OVERFLOW_POLICIES))
+
+        self.on_update = on_update
+        self.overflow = overflow
+        self.secret_token = secret_token
+        self.recent = RecentUpdates(dedup_size) if dedup_size else None
+
+        self.dispatcher = None
+        if workers:
+            # Updates are queued as they are received and only converted by the workers
+            self.dispatcher = AsyncDispatcher(lambda j: on_update(cast(Update, Update.from_json(j))),
+                                              workers, queue_size)
+
+    async def receive(self, body: bytes, secret_token: Optional[str] = None) -> int:
+        """
+        Handles a webhook request.
+        :param body: (bytes) The request's body
+        :param secret_token: (str) Optional. The value of the request's secret token header
+        :return: (int) The HTTP status code to reply with
+        """
+        if not check_secret_token(self.secret_token, secret_token):
+            return 403
+
+        try:
+            j = json_codec.loads(body)
+        except ValueError:
+            logger.warning("Invalid update received from webhook")
+            return 400
+
+        update_id = j.get("update_id")
+        if self.recent is not None and not self.recent.add(update_id):
+            return 200
+
+        try:
+            status = await self._handle(j)
+        except BaseException:
+            # Includes cancellation, i.e. when the client disconnects
+            if self.recent is not None:
+                self.recent.discard(update_id)
+            raise
+
+        if self.recent is not None and status != 200:
+            # Not handled, let Telegram send it again
+            self.recent.discard(update_id)
+        return status
+
+    async def _handle(self, j: dict) -> int:
+        if self.dispatcher is None:
+            await self.on_update(cast(Update, Update.from_json(j)))
+            return 200
+
+        if self.overflow == "block":
+            await self.dispatcher.dispatch(j)
+            return 200
+
+        try:
+            self.dispatcher.dispatch_nowait(j)
+        except asyncio.QueueFull:
+            if self.overflow == "reject":
+                return 503
+            logger.warning("Update queue is full, dropping update %s", j.get("update_id"))
+
+        return 200
+
+    async def close(self):
+        """
+        Waits for the queued updates to be handled and stops the workers.
+        """
+        if self.dispatcher is not None:
+            await self.dispatcher.stop()
@@ -0,0 +1,76 @@
+from typing import Awaitable, Callable
+
+from aiohttp import web
+
+from depytg.types import Update
+from depytg.webhooks._receiver import AsyncReceiver, SECRET_TOKEN_HEADER
+
+
+def get_app(name: str, url_path: str, on_update: Callable[[Update], Awaitable], workers: int = 0,
+            queue_size: int = 1000, overflow: str = "block", secret_token: str = None, dedup_size: int = 0,
+            max_body_size: int = None) -> web.Application:
+    """
+    Returns an aiohttp app that awaits `on_update` when new updates are received from Telegram.
+    Webhook is reachable at /<url_path>/
+
+    :param name: (str) Application name. Only kept for compatibility with depytg.webhooks.flask.
+    :param url_path: (str) URL path
+    :param on_update: (coroutine function(Update)) Awaited on new updates
+    :param workers: (int) Optional. Number of worker tasks, see get_blueprint. Defaults to 0.
+    :param queue_size: (int) Optional. Maximum number of queued updates, see get_blueprint. Defaults to 1000.
+    :param overflow: (str) Optional. What to do when the queue is full, see get_blueprint. Defaults to "block".
+    :param secret_token: (str) Optional. Secret token requests must carry, see get_blueprint.
+    :param dedup_size: (int) Optional. How many update IDs are remembered to ignore repeats, see get_blueprint.
+    Defaults to 0.
+    :param max_body_size: (int) Optional. Largest accepted request body in bytes, larger requests are rejected with
+    HTTP 413. Defaults to aiohttp's limit of 1 MiB.
+    :return: A new aiohttp app, i.e. to be run with aiohttp.web.run_app
+    """
+    app = web.Application() if max_body_size is None else web.Application(client_max_size=max_body_size)
+    return get_blueprint(name, url_path, on_update, app, workers, queue_size, overflow, secret_token, dedup_size)
+
+
+def get_blueprint(name: str, url_path: str, on_update: Callable[[Update], Awaitable], bp: web.Application = None,
+                  workers: int = 0, queue_size: int = 1000, overflow: str = "block", secret_token: str = None,
+                  dedup_size: int = 0) -> web.Application:
+    """
+    Sets up the webhook route on an aiohttp app, to be used as it is or added to another app with add_subapp().
+    Webhook is reachable at /<prefix>/<url_path>/
+
+    By default `on_update` is awaited before replying to Telegram. If 'workers' is specified, updates are instead
+    queued and Telegram gets a reply right away, while an AsyncDispatcher converts and handles them on its worker
+    tasks, keeping the updates of each chat in order. Queued updates are handled before the app shuts down.
+
+    :param name: (str) Blueprint name. Only kept for compatibility with depytg.webhooks.flask.
+    :param url_path: (str) URL path
+    :param on_update: (coroutine function(Update)) Awaited on new updates
+    :param bp: (aiohttp.web.Application) Optional. An existing app to set up routes on instead of a new one.
+    :param workers: (int) Optional. Number of worker tasks handling updates. Defaults to 0, awaiting `on_update`
+    before replying.
+    :param queue_size: (int) Optional. Maximum number of updates queued or being handled. Defaults to 1000.
+    :param overflow: (str) Optional. What to do when an update is received while the queue is full: "block" waits
+    for room in the queue, "reject" replies with HTTP 503 so that Telegram sends the update again later, "drop" logs
+    and discards the update. Defaults to "block".
+    :param secret_token: (str) Optional. If specified, requests without this token in the
+    X-Telegram-Bot-Api-Secret-Token header are rejected with HTTP 403. Bot API servers that don't support the header
+    can only be authenticated by keeping 'url_path' secret.
+    :param dedup_size: (int) Optional. If specified, the IDs of this many recent updates are remembered and updates
+    sent again by Telegram are acknowledged without being handled. Defaults to 0, handling every request.
+    :return: The aiohttp app
+    """
+    receiver = AsyncReceiver(on_update, workers, queue_size, overflow, secret_token, dedup_size)
+
+    if bp is None:
+        bp = web.Application()
+
+    async def webhook(request: web.Request) -> web.Response:
+        return web.Response(status=await receiver.receive(await request.read(),
+                                                              request.headers.get(SECRET_TOKEN_HEADER)))
+
+    async def cleanup(app: web.Application):
+        await receiver.close()
+
+    bp.router.add_post("/{}/".format(url_path), webhook)
+    bp.on_cleanup.append(cleanup)
+
+    return bp
@@ -0,0 +1,158 @@
+from typing import Awaitable, Callable
+
+from depytg.types import Update
+from depytg.webhooks._receiver import AsyncReceiver, SECRET_TOKEN_HEADER
+
+# ASGI header names are lowercase
+_secret_token_header = SECRET_TOKEN_HEADER.lower().encode()
+
+
+class WebhookApp(object):
+    """
+    A raw ASGI app receiving updates from Telegram. Use get_app or get_blueprint to create one.
+
+    :param url_path: (str) URL path
+    :param receiver: (AsyncReceiver) Handles the received updates
+    :param app: (ASGI app) Optional. App that handles all other requests, and the lifespan events.
+    :param max_body_size: (int) Optional. Largest accepted request body in bytes, larger requests are rejected with
+    HTTP 413. Defaults to no limit.
+    """
+
+    def __init__(self, url_path: str, receiver: AsyncReceiver, app: Callable = None, max_body_size: int = None):
+        self.path = "/{}/".format(url_path)
+        self.receiver = receiver
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable):
+        if scope["type"] == "http" and self._matches(scope):
+            await self._webhook(scope, receive, send)
+        elif self.app is not None:
+            await self.app(scope, receive, send)
+        elif scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._reply(send, 404)
+
+    def _matches(self, scope: dict) -> bool:
+        path = scope["path"]
+        # Mounted apps get either the full path or the path with the mount point removed, depending on the server
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        return path == self.path or path + "/" == self.path
+
+    async def _webhook(self, scope: dict, receive: Callable, send: Callable):
+        if scope["method"] != "POST":
+            await self._reply(send, 405)
+            return
+
+        secret_token = None
+        for name, value in scope["headers"]:
+            if name == _secret_token_header:
+                secret_token = value.decode("latin-1")
+            elif name == b"content-length" and self.max_body_size is not None:
+                try:
+                    length = int(value)
+                except ValueError:
+                    await self._reply(send, 400)
+                    return
+                if length > self.max_body_size:
+                    await self._reply(send, 413)
+                    return
+
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+
+            size += len(chunks[-1])
+            if self.max_body_size is not None and size > self.max_body_size:
+                await self._reply(send, 413)
+                return
+
+        await self._reply(send, await self.receiver.receive(b"".join(chunks), secret_token))
+
+    async def _lifespan(self, receive: Callable, send: Callable):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    @staticmethod
+    async def _reply(send: Callable, status: int):
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-length", b"0")]})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def close(self):
+        """
+        Waits for the queued updates to be handled and stops the workers. Called on the lifespan shutdown event,
+        unless another app handles lifespan events.
+        """
+        await self.receiver.close()
+
+
+def get_app(name: str, url_path: str, on_update: Callable[[Update], Awaitable], workers: int = 0,
+            queue_size: int = 1000, overflow: str = "block", secret_token: str = None, dedup_size: int = 0,
+            max_body_size: int = None) -> WebhookApp:
+    """
+    Returns an ASGI app that awaits `on_update` when new updates are received from Telegram.
+    Webhook is reachable at /<url_path>/
+
+    :param name: (str) Application name. Only kept for compatibility with depytg.webhooks.flask.
+    :param url_path: (str) URL path
+    :param on_update: (coroutine function(Update)) Awaited on new updates
+    :param workers: (int) Optional. Number of worker tasks, see get_blueprint. Defaults to 0.
+    :param queue_size: (int) Optional. Maximum number of queued updates, see get_blueprint. Defaults to 1000.
+    :param overflow: (str) Optional. What to do when the queue is full, see get_blueprint. Defaults to "block".
+    :param secret_token: (str) Optional. Secret token requests must carry, see get_blueprint.
+    :param dedup_size: (int) Optional. How many update IDs are remembered to ignore repeats, see get_blueprint.
+    Defaults to 0.
+    :param max_body_size: (int) Optional. Largest accepted request body in bytes, see get_blueprint.
+    :return: A new ASGI app, i.e. to be run with uvicorn
+    """
+    return get_blueprint(name, url_path, on_update, None, workers, queue_size, overflow, secret_token, dedup_size,
+                         max_body_size)
+
+
+def get_blueprint(name: str, url_path: str, on_update: Callable[[Update], Awaitable], bp: Callable = None,
+                  workers: int = 0, queue_size: int = 1000, overflow: str = "block", secret_token: str = None,
+                  dedup_size: int = 0, max_body_size: int = None) -> WebhookApp:
+    """
+    Returns an ASGI app that awaits `on_update` when new updates are received from Telegram, and passes any other
+    request to another ASGI app, if specified. It can also be mounted in a Starlette app.
+    Webhook is reachable at /<mountpoint>/<url_path>/
+
+    By default `on_update` is awaited before replying to Telegram. If 'workers' is specified, updates are instead
+    queued and Telegram gets a reply right away, while an AsyncDispatcher converts and handles them on its worker
+    tasks, keeping the updates of each chat in order.
+
+    :param name: (str) Blueprint name. Only kept for compatibility with depytg.webhooks.flask.
+    :param url_path: (str) URL path
+    :param on_update: (coroutine function(Update)) Awaited on new updates
+    :param bp: (ASGI app) Optional. An existing ASGI app handling all other requests. If specified, it also handles
+    lifespan events, so the returned app's close() should be awaited on shutdown when using workers.
+    :param workers: (int) Optional. Number of worker tasks handling updates. Defaults to 0, awaiting `on_update`
+    before replying.
+    :param queue_size: (int) Optional. Maximum number of updates queued or being handled. Defaults to 1000.
+    :param overflow: (str) Optional. What to do when an update is received while the queue is full: "block" waits
+    for room in the queue, "reject" replies with HTTP 503 so that Telegram sends the update again later, "drop" logs
+    and discards the update. Defaults to "block".
+    :param secret_token: (str) Optional. If specified, requests without this token in the
+    X-Telegram-Bot-Api-Secret-Token header are rejected with HTTP 403. Bot API servers that don't support the header
+    can only be authenticated by keeping 'url_path' secret.
+    :param dedup_size: (int) Optional. If specified, the IDs of this many recent updates are remembered and updates
+    sent again by Telegram are acknowledged without being handled. Defaults to 0, handling every request.
+    :param max_body_size: (int) Optional. Largest accepted request body in bytes, larger requests are rejected with
+    HTTP 413. Defaults to no limit.
+    :return: An ASGI app
+    """
+    return WebhookApp(url_path, AsyncReceiver(on_update, workers, queue_size, overflow, secret_token, dedup_size), bp,
+                      max_body_size)
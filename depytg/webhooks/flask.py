@@ -1,10 +1,19 @@
+import logging
+import queue
 from typing import Callable, cast, Union
 from flask import Flask, Blueprint, request
 
+from depytg.dedup import RecentUpdates
+from depytg.dispatcher import Dispatcher, OVERFLOW_POLICIES
+from depytg.internals import json_codec
 from depytg.types import Update
+from depytg.webhooks._receiver import SECRET_TOKEN_HEADER, check_secret_token
 
+logger = logging.getLogger("depytg")
 
-def get_app(name: str, url_path: str, on_update: Callable[[Update], None]):
+
+def get_app(name: str, url_path: str, on_update: Callable[[Update], None], workers: int = 0, queue_size: int = 1000,
+            overflow: str = "block", secret_token: str = None, dedup_size: int = 0, max_body_size: int = None):
     """
     Returns a Flask app that calls `on_update` when new updates are received from Telegram.
     Webhook is reachable at /<url_path>/
@@ -12,32 +21,103 @@ def get_app(name: str, url_path: str, on_update: Callable[[Update], None]):
     :param name: (str) Application name, use Python naming conventions
     :param url_path: (str) URL path
     :param on_update: (callable(Update)) Callable to be called on new updates
+    :param workers: (int) Optional. Number of worker threads, see get_blueprint. Defaults to 0.
+    :param queue_size: (int) Optional. Maximum number of queued updates, see get_blueprint. Defaults to 1000.
+    :param overflow: (str) Optional. What to do when the queue is full, see get_blueprint. Defaults to "block".
+    :param secret_token: (str) Optional. Secret token requests must carry, see get_blueprint.
+    :param dedup_size: (int) Optional. How many update IDs are remembered to ignore repeats, see get_blueprint.
+    Defaults to 0.
+    :param max_body_size: (int) Optional. Largest accepted request body in bytes, larger requests are rejected with
+    HTTP 413. Defaults to no limit.
     :return: A new Flask app
     """
     app = Flask(name)
+    app.config["MAX_CONTENT_LENGTH"] = max_body_size
 
-    get_blueprint(name, url_path, on_update, app)
+    return get_blueprint(name, url_path, on_update, app, workers, queue_size, overflow, secret_token, dedup_size)
 
 
-def get_blueprint(name: str, url_path: str, on_update: Callable[[Update], None], bp: Union[Flask, Blueprint] = None):
+def get_blueprint(name: str, url_path: str, on_update: Callable[[Update], None], bp: Union[Flask, Blueprint] = None,
+                  workers: int = 0, queue_size: int = 1000, overflow: str = "block", secret_token: str = None,
+                  dedup_size: int = 0):
     """
     Returns a Flask blueprint that calls `on_update` when new updates are received from Telegram.
     Webhook is reachable at /<mountpoint>/<url_path>/
 
+    By default `on_update` is called before replying to Telegram, so a slow handler keeps one of the webhook's
+    connections busy. If 'workers' is specified, updates are instead queued and Telegram gets a reply right away,
+    while a Dispatcher converts and handles them on its worker threads, keeping the updates of each chat in order.
+
     :param name: (str) Blueprint name, use Python naming conventions
     :param url_path: (str) URL path
     :param on_update: (callable(Update)) Callable to be called on new updates
     :param bp: Optional. An existing blueprint or Flask app to set up routes on instead of a new one. If not specified,
     a new blueprint will be created.
+    :param workers: (int) Optional. Number of worker threads handling updates. Defaults to 0, calling `on_update`
+    before replying.
+    :param queue_size: (int) Optional. Maximum number of updates queued or being handled. Defaults to 1000.
+    :param overflow: (str) Optional. What to do when an update is received while the queue is full: "block" waits
+    for room in the queue, "reject" replies with HTTP 503 so that Telegram sends the update again later, "drop" logs
+    and discards the update. Defaults to "block".
+    :param secret_token: (str) Optional. If specified, requests without this token in the
+    X-Telegram-Bot-Api-Secret-Token header are rejected with HTTP 403. Bot API servers that don't support the header
+    can only be authenticated by keeping 'url_path' secret.
+    :param dedup_size: (int) Optional. If specified, the IDs of this many recent updates are remembered and updates
+    sent again by Telegram are acknowledged without being handled. Defaults to 0, handling every request.
     :return: A blueprint
     """
+    if overflow not in OVERFLOW_POLICIES:
+        raise ValueError("Invalid overflow policy '{}', use one of {}".format(overflow, OVERFLOW_POLICIES))
+
     if not bp:
         bp = Blueprint(name, name)
 
+    dispatcher = None
+    if workers:
+        # Updates are queued as they are received and only converted by the workers
+        dispatcher = Dispatcher(lambda j: on_update(cast(Update, Update.from_json(j))), workers, queue_size)
+
+    recent = RecentUpdates(dedup_size) if dedup_size else None
+
     @bp.route("/{}/".format(url_path), methods=['POST'])
     def webhook():
-        j = request.json
-        on_update(cast(Update, Update.from_json(j)))
-        return '', 200
+        if not check_secret_token(secret_token, request.headers.get(SECRET_TOKEN_HEADER)):
+            return '', 403
+
+        try:
+            j = json_codec.loads(request.get_data())
+        except ValueError:
+            logger.warning("Invalid update received from webhook")
+            return '', 400
+
+        update_id = j.get("update_id")
+        if recent is not None and not recent.add(update_id):
+            return '', 200
+
+        try:
+            status = handle(j)
+        except Exception:
+            if recent is not None:
+                recent.discard(update_id)
+            raise
+
+        if recent is not None and status != 200:
+            # Not handled, let Telegram send it again
+            recent.discard(update_id)
+        return '', status
+
+    def handle(j: dict) -> int:
+        if dispatcher is None:
+            on_update(cast(Update, Update.from_json(j)))
+            return 200
+
+        try:
+            dispatcher.dispatch(j, block=overflow == "block")
+        except queue.Full:
+            if overflow == "reject":
+                return 503
+            logger.warning("Update queue is full, dropping update %s", j.get("update_id"))
+
+        return 200
 
     return bp
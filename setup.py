@@ -28,10 +28,12 @@ setup(
         'Topic :: Software Development :: Libraries :: Python Modules',
     ],
     keywords='telegram bot development',
-    python_requires='>=3',
-    install_requires=["requests", "asyncio"],
+    python_requires='>=3.6',
+    install_requires=["requests"],
     extras_require={
         'flask': ['Flask'],
-        'asyncio': ['aiohttp']
+        'asyncio': ['aiohttp'],
+        'fastjson': ['orjson'],
+        'benchmarks': ['pytest', 'pytest-benchmark']
     }
 )
@@ -0,0 +1,203 @@
+import asyncio
+import email
+import json
+import socket
+import threading
+from collections import defaultdict, deque
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+import pytest
+
+import depytg
+
+
+def run(coro):
+    """
+    Runs a coroutine in a new event loop.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def ok(result) -> dict:
+    return {"ok": True, "result": result}
+
+
+def error(error_code: int, description: str, **parameters) -> dict:
+    response = {"ok": False, "error_code": error_code, "description": description}
+    if parameters:
+        response["parameters"] = parameters
+    return response
+
+
+def message(**fields) -> dict:
+    result = {"message_id": 1, "date": 0, "chat": {"id": 1, "type": "private"}}
+    result.update(fields)
+    return result
+
+
+class Request(object):
+    """
+    A request received by the stub server. 'form' holds JSON fields, or the multipart fields with files as bytes,
+    'filenames' maps multipart file fields to their file names.
+    """
+
+    def __init__(self, method: str, headers, body: bytes):
+        self.method = method
+        self.headers = headers
+        self.body = body
+        self.filenames = {}
+
+        content_type = headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            msg = email.message_from_bytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+            self.form = {}
+            for part in msg.get_payload():
+                name = part.get_param("name", header="content-disposition")
+                value = part.get_payload(decode=True)
+                if part.get_filename() is None:
+                    value = value.decode()
+                else:
+                    self.filenames[name] = part.get_filename()
+                self.form[name] = value
+        else:
+            self.form = json.loads(body) if body else {}
+
+
+class StubAPI(object):
+    """
+    A local stand-in for the Bot API. Responses are queued per method with reply(), methods without queued responses
+    get {"ok": true, "result": true}. Files served for downloads are set in 'files', by path.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.files = {}
+        # Path -> number of bytes sent before the connection is dropped, for the next download of the file
+        self.cut = {}
+        self.range_requests = True
+        self.delay = 0
+        # Seconds to wait between each 16 KiB piece of a downloaded file
+        self.chunk_delay = 0
+
+        self._responses = defaultdict(deque)
+        self._lock = threading.Lock()
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                request = Request(self.path.rsplit("/", 1)[-1], self.headers, body)
+                self._send(200, json.dumps(api._respond(request)).encode())
+
+            def do_GET(self):
+                path = self.path.split("/", 3)[-1]
+                with api._lock:
+                    api.requests.append(Request("GET " + path, self.headers, b""))
+                    cut = api.cut.pop(path, None)
+
+                data = api.files.get(path)
+                if data is None:
+                    self._send(404, b"")
+                    return
+
+                start = 0
+                status = 200
+                range_header = self.headers.get("Range")
+                if range_header and api.range_requests:
+                    start = int(range_header[len("bytes="):-1])
+                    status = 206
+
+                body = data[start:]
+                if api.chunk_delay:
+                    self.send_response(status)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    for i in range(0, len(body), 16384):
+                        self.wfile.write(body[i:i + 16384])
+                        self.wfile.flush()
+                        threading.Event().wait(api.chunk_delay)
+                    return
+
+                if cut is None:
+                    self._send(status, body)
+                    return
+
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body[:cut])
+                self.wfile.flush()
+                self.close_connection = True
+                self.connection.shutdown(socket.SHUT_RDWR)
+
+            def _send(self, status: int, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        class Server(ThreadingMixIn, HTTPServer):
+            daemon_threads = True
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        base = "http://127.0.0.1:{}".format(self.server.server_address[1])
+        self.url_template = base + "/bot{token}/{method}"
+        self.file_url_template = base + "/file/bot{token}/{path}"
+
+    def reply(self, method: str, *responses):
+        """
+        Queues responses for a method. Each is a response dict, or a function taking the Request and returning one.
+        """
+        with self._lock:
+            self._responses[method].extend(responses)
+
+    def _respond(self, request: Request) -> dict:
+        with self._lock:
+            self.requests.append(request)
+            queue = self._responses[request.method]
+            response = queue.popleft() if queue else ok(True)
+
+        if self.delay:
+            threading.Event().wait(self.delay)
+        return response(request) if callable(response) else response
+
+    def calls(self, method: str) -> list:
+        return [r for r in self.requests if r.method == method]
+
+    def client_options(self) -> dict:
+        return {"url_template": self.url_template, "file_url_template": self.file_url_template}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def api():
+    stub = StubAPI()
+    yield stub
+    stub.close()
+
+
+@pytest.fixture(params=depytg.depyfier.MODES)
+def mode(request):
+    """
+    Runs the test in every conversion mode.
+    """
+    previous = depytg.get_mode()
+    depytg.set_mode(request.param)
+    yield request.param
+    depytg.set_mode(previous)
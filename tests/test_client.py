@@ -0,0 +1,96 @@
+import io
+import time
+
+import pytest
+
+from depytg import Client, RateLimiter, RetryPolicy, methods, types
+from depytg.errors import FloodWait
+
+from conftest import ok, error, message, run
+
+
+def test_upload_is_rewound_before_retry(api):
+    api.reply("sendDocument", error(429, "Too Many Requests: retry after 0", retry_after=0), ok(message()))
+    data = b"x" * 5000
+
+    Client("1:x", **api.client_options()).call(
+        methods.sendDocument(1, types.InputFile(io.BytesIO(data), "text/plain", "a.txt")))
+
+    first, second = api.calls("sendDocument")
+    assert first.form["file0_a.txt"] == data
+    assert second.form["file0_a.txt"] == data
+
+
+def test_nested_uploads_are_rewound_before_retry(api):
+    api.reply("sendMediaGroup", error(429, "Too Many Requests: retry after 0", retry_after=0), ok([]))
+    media = [types.InputMediaPhoto("photo", types.InputFile(io.BytesIO(b"p" * 100), "image/jpeg")),
+             types.InputMediaPhoto("photo", types.InputFile(io.BytesIO(b"q" * 100), "image/jpeg"))]
+
+    Client("1:x", **api.client_options()).call(methods.sendMediaGroup(1, media))
+
+    assert [r.form["file0"] + r.form["file1"] for r in api.calls("sendMediaGroup")] == [b"p" * 100 + b"q" * 100] * 2
+
+
+class _Pipe(io.RawIOBase):
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return 0
+
+    def tell(self):
+        raise io.UnsupportedOperation("tell")
+
+
+def test_unseekable_upload_cant_be_rewound():
+    method = methods.sendDocument(1, types.InputFile(_Pipe(), "text/plain", "a.txt"))
+    assert method._file_positions() is None
+
+
+def test_async_upload_is_rewound_before_retry(api):
+    aio = pytest.importorskip("depytg.aio")
+    api.reply("sendDocument", error(429, "Too Many Requests: retry after 0", retry_after=0), ok(message()))
+    data = b"x" * 5000
+
+    async def send():
+        async with aio.AsyncClient("1:x", **api.client_options()) as client:
+            await client.call(methods.sendDocument(1, types.InputFile(io.BytesIO(data), "text/plain", "a.txt")))
+
+    run(send())
+
+    assert [r.form["file0_a.txt"] for r in api.calls("sendDocument")] == [data, data]
+
+
+def test_flood_wait_without_retry_after(api):
+    api.reply("sendMessage", error(429, "Too Many Requests"), ok(message(text="hi")))
+    client = Client("1:x", retry_policy=RetryPolicy(default_flood_wait=0.01), **api.client_options())
+
+    assert client.call(methods.sendMessage(1, "hi"))["text"] == "hi"
+    assert len(api.calls("sendMessage")) == 2
+
+
+def test_flood_wait_without_retry_after_gives_up():
+    policy = RetryPolicy(flood_retries=1)
+    flood = FloodWait("Too Many Requests", 429)
+    method = methods.sendMessage(1, "hi")
+
+    assert policy.retry_delay(method, flood, 0) == 1
+    assert policy.retry_delay(method, flood, 1) is None
+
+
+def test_flood_wait_sleeps_for_methods_not_rate_limited(api):
+    api.reply("editMessageText", error(429, "Too Many Requests: retry after 1", retry_after=0.3), ok(True))
+    client = Client("1:x", rate_limiter=RateLimiter(), **api.client_options())
+
+    start = time.monotonic()
+    client.call(methods.editMessageText("hi", chat_id=1, message_id=1))
+
+    assert time.monotonic() - start >= 0.3
+    assert len(api.calls("editMessageText")) == 2
+
+
+def test_clients_get_their_own_retry_policy():
+    first, second = Client("1:x"), Client("1:x")
+    assert isinstance(first.retry_policy, RetryPolicy)
+    assert first.retry_policy is not second.retry_policy
+    assert Client("1:x", retry_policy=None).retry_policy is None
@@ -0,0 +1,76 @@
+import json
+import os
+import pickle
+import sys
+
+import pytest
+
+import depytg
+from depytg import types
+from depytg.compact import CompactObject, compact_class
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks"))
+import payloads  # noqa: E402
+
+UPDATES = [payloads.update(i) for i in range(50)] + [{"update_id": 1, "message": payloads.reply_chain(3)}]
+
+
+@pytest.fixture
+def typed_mode():
+    previous = depytg.get_mode()
+    depytg.set_mode("typed")
+    yield
+    depytg.set_mode(previous)
+
+
+def test_round_trip(typed_mode):
+    for data in UPDATES:
+        update = types.Update.from_json(json.loads(json.dumps(data)))
+        compact = update.compact()
+
+        assert compact.to_dict() == data
+        assert json.loads(compact.to_json()) == data
+        assert compact == data
+
+        restored = compact.to_object()
+        assert type(restored) is types.Update
+        assert restored == update
+
+
+def test_attribute_access(typed_mode):
+    data = {"update_id": 1, "message": payloads.reply_chain(1)}
+    compact = types.Update.from_json(data).compact()
+
+    msg = compact.message
+    assert isinstance(msg, CompactObject) and msg._cls is types.Message
+    assert msg.chat.id == data["message"]["chat"]["id"]
+    assert msg.from_.id == data["message"]["from"]["id"]
+    assert msg.reply_to_message.message_id == data["message"]["reply_to_message"]["message_id"]
+    # Optional fields that weren't set
+    assert compact.callback_query is None
+    with pytest.raises(AttributeError):
+        compact.not_a_field
+
+
+def test_sequences_become_tuples(typed_mode):
+    data = {"update_id": 1, "message": payloads.message(2)}
+    data["message"]["photo"] = payloads.photo(2)
+    photo = types.Update.from_json(data).compact().message.photo
+
+    assert type(photo) is tuple
+    assert all(isinstance(p, CompactObject) and p._cls is types.PhotoSize for p in photo)
+
+
+def test_from_json_dict_and_pickle():
+    data = UPDATES[-1]
+    compact = compact_class(types.Update).from_dict(json.loads(json.dumps(data)))
+
+    assert compact.message.reply_to_message.chat.id == data["message"]["reply_to_message"]["chat"]["id"]
+    assert pickle.loads(pickle.dumps(compact)) == compact
+
+
+def test_invalid_objects():
+    with pytest.raises(TypeError):
+        compact_class(types.User).from_dict({"id": 1, "is_bot": False, "first_name": "a", "unknown": 1})
+    with pytest.raises(TypeError):
+        depytg.internals.TelegramObjectBase().compact()
@@ -0,0 +1,84 @@
+import os
+import sys
+import threading
+
+import pytest
+
+import depytg
+from depytg import types
+from depytg.internals import TelegramObjectBase
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks"))
+import payloads  # noqa: E402
+
+UPDATES = [payloads.update(i) for i in range(200)] + [{"update_id": 1, "message": payloads.reply_chain(5)}]
+
+
+@pytest.fixture
+def restore_mode():
+    previous = depytg.get_mode()
+    yield
+    depytg.set_mode(previous)
+
+
+def decode_all(mode: str) -> list:
+    depytg.set_mode(mode)
+    return [types.Update.from_json(u) for u in UPDATES]
+
+
+def assert_same(compiled, generic, path="update"):
+    assert type(compiled) is type(generic), path
+    if isinstance(generic, dict):
+        assert compiled.keys() == generic.keys(), path
+        for key in generic:
+            assert_same(compiled[key], generic[key], "{}.{}".format(path, key))
+    elif isinstance(generic, (list, tuple)):
+        assert len(compiled) == len(generic), path
+        for i, (c, g) in enumerate(zip(compiled, generic)):
+            assert_same(c, g, "{}[{}]".format(path, i))
+    else:
+        assert compiled == generic, path
+
+
+def forget_decoders():
+    def subclasses(cls):
+        for sub in cls.__subclasses__():
+            yield sub
+            yield from subclasses(sub)
+
+    for cls in subclasses(TelegramObjectBase):
+        for attr in ("_object_decoder", "_lazy_decoder"):
+            if attr in cls.__dict__:
+                delattr(cls, attr)
+
+
+def test_compiled_decoders_match_devel_mode(restore_mode):
+    generic = decode_all("devel")
+    compiled = decode_all("typed")
+    assert isinstance(compiled[-1]["message"]["reply_to_message"], types.Message)
+
+    for c, g in zip(compiled, generic):
+        assert_same(c, g)
+
+
+def test_decoders_compiled_concurrently(restore_mode):
+    forget_decoders()
+    depytg.set_mode("typed")
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def decode():
+        barrier.wait()
+        try:
+            for u in UPDATES:
+                types.Update.from_json(u)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=decode) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
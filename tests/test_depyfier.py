@@ -0,0 +1,114 @@
+import copy
+import warnings
+
+import pytest
+
+import depytg
+from depytg import compiler, methods, types
+from depytg.depyfier import depyfy_obj_hook
+from depytg.internals import TelegramObjectBase
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 1,
+        "date": 0,
+        "from": {"id": 1, "is_bot": False, "first_name": "name"},
+        "chat": {"id": 1, "type": "private"},
+        "photo": [{"file_id": "P1", "width": 1, "height": 1}],
+    },
+}
+
+
+@pytest.fixture
+def restore_mode():
+    previous = depytg.get_mode()
+    with warnings.catch_warnings():
+        # The development mode warning
+        warnings.simplefilter("ignore")
+        yield
+    TelegramObjectBase._compiled_override = None
+    depytg.set_mode(previous)
+
+
+def decode() -> types.Update:
+    return types.Update.from_json(copy.deepcopy(UPDATE))
+
+
+def stored(obj: dict, key: str):
+    """
+    Returns a field as it's stored, without the conversion attribute access does in lazy mode.
+    """
+    return dict.__getitem__(obj, key)
+
+
+def test_fast_mode_decodes_untyped_objects(restore_mode):
+    depytg.set_mode("fast")
+    update = decode()
+
+    assert type(stored(update, "message")) is TelegramObjectBase
+    assert type(update.message.chat) is TelegramObjectBase
+    assert type(update.message.photo[0]) is TelegramObjectBase
+    assert update.message.from_.first_name == "name"
+
+
+@pytest.mark.parametrize("mode", ["typed", "devel"])
+def test_typed_modes_decode_nested_types(restore_mode, mode):
+    depytg.set_mode(mode)
+    update = decode()
+
+    assert type(stored(update, "message")) is types.Message
+    assert type(update.message.chat) is types.Chat
+    assert type(update.message.from_) is types.User
+    assert type(update.message.photo[0]) is types.PhotoSize
+
+
+def test_lazy_mode_converts_on_access(restore_mode):
+    depytg.set_mode("lazy")
+    update = decode()
+
+    assert type(stored(update, "message")) is dict
+    assert type(update.message) is types.Message
+    assert type(stored(update.message, "chat")) is dict
+    assert type(update.message.chat) is types.Chat
+
+
+@pytest.mark.parametrize("mode", depytg.depyfier.MODES)
+def test_results_are_decoded_for_the_mode(restore_mode, mode):
+    depytg.set_mode(mode)
+    result = methods.getUpdates.read_result({"ok": True, "result": [copy.deepcopy(UPDATE)]})
+
+    expected = TelegramObjectBase if mode == "fast" else types.Message
+    assert type(result[0].message) is expected
+    assert result[0].message.chat.id == 1
+
+
+@pytest.mark.parametrize("mode", depytg.depyfier.MODES)
+def test_enabled_compiler_survives_mode_changes(restore_mode, mode):
+    compiler.enable(True)
+    depytg.set_mode(mode)
+    update = decode()
+
+    # Compiled decoders produce typed objects even in fast mode, lazy ones only in lazy mode
+    assert type(stored(update, "message")) is (dict if mode == "lazy" else types.Message)
+    assert type(update.message.chat) is types.Chat
+
+
+@pytest.mark.parametrize("mode", depytg.depyfier.MODES)
+def test_disabled_compiler_survives_mode_changes(restore_mode, mode):
+    compiler.enable(False)
+    depytg.set_mode(mode)
+    update = decode()
+
+    # The generic implementation converts everything eagerly, even in lazy mode
+    expected = TelegramObjectBase if mode == "fast" else types.Message
+    assert type(stored(update, "message")) is expected
+    assert type(stored(update.message, "chat")) is (TelegramObjectBase if mode == "fast" else types.Chat)
+
+
+def test_depyfy_obj_hook_is_deprecated():
+    with pytest.warns(DeprecationWarning):
+        obj = depyfy_obj_hook({"id": 1})
+
+    assert type(obj) is TelegramObjectBase
+    assert obj == {"id": 1}
@@ -0,0 +1,131 @@
+import asyncio
+import queue
+import threading
+import time
+
+import pytest
+
+from depytg.dispatcher import AsyncDispatcher, Dispatcher, chat_key
+
+from conftest import message, run
+
+
+def update(update_id: int, chat_id: int) -> dict:
+    return {"update_id": update_id, "message": message(chat={"id": chat_id, "type": "private"})}
+
+
+def test_chat_key():
+    assert chat_key(update(1, 5)) == 5
+    assert chat_key({"update_id": 1, "callback_query": {"id": "1", "from": {"id": 7}}}) == 7
+    assert chat_key({"update_id": 1}) is None
+
+
+def test_updates_are_ordered_by_chat():
+    handled = []
+    lock = threading.Lock()
+
+    def handler(u):
+        # Later updates are faster, they would overtake earlier ones if a chat's updates ran concurrently
+        time.sleep(0.001 * (20 - u["update_id"] % 20))
+        with lock:
+            handled.append((chat_key(u), u["update_id"]))
+
+    with Dispatcher(handler, workers=4) as dispatcher:
+        for i in range(60):
+            dispatcher.dispatch(update(i, i % 3))
+
+    assert len(handled) == 60
+    for chat in range(3):
+        ids = [i for c, i in handled if c == chat]
+        assert ids == sorted(ids)
+
+
+def test_chats_are_handled_concurrently():
+    release = threading.Event()
+    handled = []
+
+    def handler(u):
+        if chat_key(u) == 1:
+            release.wait(5)
+        handled.append(u["update_id"])
+
+    with Dispatcher(handler, workers=2) as dispatcher:
+        dispatcher.dispatch(update(1, 1))
+        dispatcher.dispatch(update(2, 2))
+        for _ in range(100):
+            if handled:
+                break
+            time.sleep(0.01)
+        # The slow chat doesn't hold up the other one
+        assert handled == [2]
+        release.set()
+
+    assert handled == [2, 1]
+
+
+def test_overflow():
+    release = threading.Event()
+    dispatcher = Dispatcher(lambda u: release.wait(5), workers=1, max_pending=2)
+    try:
+        dispatcher.dispatch(update(1, 1))
+        dispatcher.dispatch(update(2, 1))
+
+        with pytest.raises(queue.Full):
+            dispatcher.dispatch(update(3, 1), block=False)
+        # The timeout doesn't apply when not blocking
+        with pytest.raises(queue.Full):
+            dispatcher.dispatch(update(3, 1), block=False, timeout=1)
+        started = time.monotonic()
+        with pytest.raises(queue.Full):
+            dispatcher.dispatch(update(3, 1), timeout=0.1)
+        assert time.monotonic() - started >= 0.1
+    finally:
+        release.set()
+        dispatcher.stop()
+
+
+def test_failing_key_doesnt_take_a_slot():
+    def key(u):
+        raise KeyError("chat")
+
+    dispatcher = Dispatcher(lambda u: None, workers=1, max_pending=1, key=key)
+    try:
+        for _ in range(3):
+            with pytest.raises(KeyError):
+                dispatcher.dispatch(update(1, 1), block=False)
+        dispatcher.key = chat_key
+        dispatcher.dispatch(update(1, 1), block=False)
+    finally:
+        dispatcher.stop()
+
+
+def test_async_dispatcher_orders_updates_and_overflows():
+    handled = []
+
+    async def handler(u):
+        await asyncio.sleep(0.001 * (10 - u["update_id"] % 10))
+        handled.append((chat_key(u), u["update_id"]))
+
+    async def main():
+        async with AsyncDispatcher(handler, workers=4) as dispatcher:
+            for i in range(30):
+                await dispatcher.dispatch(update(i, i % 3))
+
+        blocked = asyncio.Event()
+
+        async def wait(u):
+            await blocked.wait()
+
+        dispatcher = AsyncDispatcher(wait, workers=1, max_pending=1)
+        dispatcher.dispatch_nowait(update(1, 1))
+        with pytest.raises(asyncio.QueueFull):
+            dispatcher.dispatch_nowait(update(2, 1))
+        blocked.set()
+        await dispatcher.stop()
+
+    run(main())
+
+    assert len(handled) == 30
+    for chat in range(3):
+        ids = [i for c, i in handled if c == chat]
+        assert ids == sorted(ids)
@@ -0,0 +1,306 @@
+import asyncio
+import io
+import os
+import threading
+import time
+
+import pytest
+
+from depytg import Client, methods, types
+from depytg.download import DownloadCache, GetFileCache, PART_SUFFIX
+from depytg.errors import TelegramError
+
+from conftest import error, ok, run
+
+DATA = bytes(range(256)) * 1000
+
+
+def serve(api, file_id: str, data: bytes, path: str = None, times: int = 5):
+    path = path or "documents/{}".format(file_id)
+    api.files[path] = data
+    api.reply("getFile", *[ok({"file_id": file_id, "file_size": len(data), "file_path": path})] * times)
+    return path
+
+
+def downloads(api) -> list:
+    return [(r.method, r.headers.get("Range")) for r in api.requests if r.method.startswith("GET")]
+
+
+def test_download_to_path_resumes_after_interruption(api, tmp_path):
+    path = serve(api, "F1", DATA)
+    api.cut[path] = 100000
+    dest = str(tmp_path / "file.bin")
+
+    Client("1:x", **api.client_options()).download("F1", dest)
+
+    with open(dest, "rb") as f:
+        assert f.read() == DATA
+    assert not os.path.exists(dest + PART_SUFFIX)
+    first, second = downloads(api)
+    assert first == ("GET " + path, None)
+    assert second[0] == "GET " + path and second[1].startswith("bytes=")
+
+
+def test_download_restarts_without_range_support(api):
+    path = serve(api, "F1", DATA)
+    api.cut[path] = 100000
+    api.range_requests = False
+    buffer = io.BytesIO()
+    buffer.write(b"prefix")
+
+    Client("1:x", **api.client_options()).download(types.Document("F1"), buffer)
+
+    assert buffer.getvalue() == b"prefix" + DATA
+
+
+def test_download_resumes_partial_file(api, tmp_path):
+    path = serve(api, "F1", DATA)
+    dest = str(tmp_path / "file.bin")
+    with open(dest + PART_SUFFIX, "wb") as f:
+        f.write(DATA[:1000])
+
+    Client("1:x", **api.client_options()).download("F1", dest)
+
+    with open(dest, "rb") as f:
+        assert f.read() == DATA
+    assert downloads(api) == [("GET " + path, "bytes=1000-")]
+
+
+def test_expired_link_is_requested_again(api):
+    serve(api, "F1", DATA, path="documents/new")
+    expired = types.File("F1", len(DATA), "documents/old")
+    buffer = io.BytesIO()
+
+    Client("1:x", **api.client_options()).download(expired, buffer)
+
+    assert buffer.getvalue() == DATA
+    assert [r.method for r in api.requests] == ["GET documents/old", "getFile", "GET documents/new"]
+
+
+def test_download_gives_up_after_retries(api):
+    path = serve(api, "F1", DATA)
+
+    class Cut(dict):
+        # Every download of the file is cut
+        def pop(self, key, default=None):
+            return 10 if key == path else default
+
+    api.cut = Cut()
+    with pytest.raises(Exception):
+        Client("1:x", **api.client_options()).download("F1", io.BytesIO(), retries=1)
+    assert len(downloads(api)) == 2
+
+
+def test_cache_hit_skips_get_file(api, tmp_path):
+    serve(api, "F1", DATA)
+    client = Client("1:x", download_cache=DownloadCache(str(tmp_path / "cache")), **api.client_options())
+
+    client.download("F1", io.BytesIO())
+    requests = len(api.requests)
+    buffer = io.BytesIO()
+    client.download("F1", buffer)
+
+    assert buffer.getvalue() == DATA
+    assert len(api.requests) == requests == 2
+
+
+def test_cache_evicts_least_recently_used(api, tmp_path):
+    for file_id in ("A", "B", "C"):
+        serve(api, file_id, file_id.encode() * 1000)
+    cache = DownloadCache(str(tmp_path / "cache"), max_size=2500)
+    client = Client("1:x", download_cache=cache, **api.client_options())
+
+    for file_id in ("A", "B", "A", "C"):
+        client.download(file_id, io.BytesIO())
+
+    assert len(cache) == 2 and cache.size == 2000
+    assert cache.open("B") is None
+    with cache.open("A") as f:
+        assert f.read() == b"A" * 1000
+
+    reloaded = DownloadCache(str(tmp_path / "cache"), max_size=2500)
+    assert len(reloaded) == 2 and reloaded.size == 2000
+
+
+def test_cache_evicts_partial_files(api, tmp_path):
+    path = serve(api, "F1", DATA)
+    cache = DownloadCache(str(tmp_path / "cache"), max_size=len(DATA) + 1000)
+    client = Client("1:x", download_cache=cache, **api.client_options())
+
+    api.cut[path] = 100000
+    with pytest.raises(Exception):
+        client.download("F1", io.BytesIO(), retries=0)
+    # The partial file is kept for resuming, and counts towards the cache size
+    assert 0 < cache.size < len(DATA)
+
+    serve(api, "F2", b"x" * len(DATA))
+    client.download("F2", io.BytesIO())
+
+    assert [p for p in os.listdir(str(tmp_path / "cache")) if p.endswith(PART_SUFFIX)] == []
+    assert cache.size == len(DATA)
+
+
+def test_evicted_file_can_still_be_read(tmp_path):
+    cache = DownloadCache(str(tmp_path), max_size=10)
+
+
+    def add(file_id: str):
+        part_path = cache.begin(file_id)
+        with open(part_path, "wb") as f:
+            f.write(file_id.encode() * 10)
+        cache.add(file_id, part_path)
+
+    add("A")
+    opened = cache.open("A")
+    add("B")
+
+    with opened:
+        assert cache.open("A") is None
+        assert opened.read() == b"A" * 10
+
+
+def test_async_download(api, tmp_path):
+    aio = pytest.importorskip("depytg.aio")
+    path = serve(api, "F1", DATA)
+    api.cut[path] = 100000
+    dest = str(tmp_path / "file.bin")
+
+    async def download():
+        async with aio.AsyncClient("1:x", download_cache=DownloadCache(str(tmp_path / "cache")),
+                                   **api.client_options()) as client:
+            await client.download("F1", dest)
+            buffer = io.BytesIO()
+            await client.download("F1", buffer)
+            return buffer.getvalue()
+
+    assert run(download()) == DATA
+    with open(dest, "rb") as f:
+        assert f.read() == DATA
+    first, second = [r[1] for r in downloads(api)]
+    # aiohttp drops what it buffered when the connection is cut, the download resumes after what was written
+    assert first is None
+    assert 0 < int(second[len("bytes="):-1]) <= 100000
+    assert len(api.calls("getFile")) == 1
+
+
+def file_result(file_id: str) -> dict:
+    return ok({"file_id": file_id, "file_size": 10, "file_path": "documents/" + file_id})
+
+
+def test_concurrent_getfile_calls_are_coalesced(api):
+    api.reply("getFile", file_result("F1"), file_result("F1"))
+    api.delay = 0.2
+    client = Client("1:x", getfile_cache=GetFileCache(), **api.client_options())
+    results = []
+
+    def get():
+        results.append(client(methods.getFile("F1")))
+
+    threads = [threading.Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(api.calls("getFile")) == 1
+    assert len(results) == 8 and all(r["file_path"] == "documents/F1" for r in results)
+    # Cached afterwards
+    client(methods.getFile("F1"))
+    assert len(api.calls("getFile")) == 1
+
+
+def test_coalesced_getfile_error_is_raised_to_every_caller(api):
+    api.reply("getFile", error(400, "Bad Request: wrong file_id"), file_result("F1"))
+    api.delay = 0.2
+    client = Client("1:x", getfile_cache=GetFileCache(), **api.client_options())
+    errors = []
+
+    def get():
+        try:
+            client(methods.getFile("F1"))
+        except TelegramError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 4
+    assert len(api.calls("getFile")) == 1
+    # Errors aren't cached
+    assert client(methods.getFile("F1"))["file_id"] == "F1"
+    assert len(api.calls("getFile")) == 2
+
+
+def test_getfile_cache_entries_expire(api):
+    api.reply("getFile", file_result("F1"), file_result("F1"))
+    client = Client("1:x", getfile_cache=GetFileCache(ttl=0.1), **api.client_options())
+
+    client(methods.getFile("F1"))
+    client(methods.getFile("F1"))
+    assert len(api.calls("getFile")) == 1
+    time.sleep(0.15)
+    client(methods.getFile("F1"))
+    assert len(api.calls("getFile")) == 2
+
+
+def test_concurrent_async_getfile_calls_are_coalesced(api):
+    aio = pytest.importorskip("depytg.aio")
+    api.reply("getFile", file_result("F1"), file_result("F2"))
+    api.delay = 0.2
+
+    async def main():
+        async with aio.AsyncClient("1:x", getfile_cache=GetFileCache(), **api.client_options()) as client:
+            calls = [client.call(methods.getFile("F1")) for _ in range(8)] + [client.call(methods.getFile("F2"))]
+            return await asyncio.gather(*calls)
+
+    results = run(main())
+    assert [r["file_id"] for r in results] == ["F1"] * 8 + ["F2"]
+    assert len(api.calls("getFile")) == 2
+
+
+class ThreadRecordingBuffer(io.BytesIO):
+    """
+    Records the threads it's written from.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def write(self, data) -> int:
+        self.threads.add(threading.current_thread())
+        return super().write(data)
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_async_download_writes_outside_event_loop(api, tmp_path, cached):
+    aio = pytest.importorskip("depytg.aio")
+    serve(api, "F1", DATA)
+    buffer = ThreadRecordingBuffer()
+    cache = DownloadCache(str(tmp_path / "cache")) if cached else None
+
+    async def download():
+        async with aio.AsyncClient("1:x", download_cache=cache, **api.client_options()) as client:
+            await client.download("F1", buffer)
+
+    run(download())
+    assert buffer.getvalue() == DATA
+    assert buffer.threads and threading.current_thread() not in buffer.threads
+
+
+def test_async_download_timeout_applies_to_reads(api):
+    aio = pytest.importorskip("depytg.aio")
+    serve(api, "F1", DATA)
+    # About 1.6 seconds in total, 0.1 between reads
+    api.chunk_delay = 0.1
+    buffer = io.BytesIO()
+
+    async def download():
+        async with aio.AsyncClient("1:x", timeout=0.5, **api.client_options()) as client:
+            await client.download("F1", buffer, retries=0)
+
+    run(download())
+    assert buffer.getvalue() == DATA
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+import depytg
+from depytg import types
+from depytg.internals import json_codec
+
+from conftest import message
+
+UPDATE = {"update_id": 1, "message": message(text="hi", **{"from": {"id": 5, "is_bot": False, "first_name": "A"}})}
+
+
+@pytest.fixture(autouse=True)
+def lazy_mode():
+    previous = depytg.get_mode()
+    depytg.set_mode("lazy")
+    yield
+    depytg.set_mode(previous)
+
+
+def test_nested_objects_are_converted_on_access():
+    update = types.Update.from_json(json.loads(json.dumps(UPDATE)))
+
+    assert type(update["message"]) is dict
+    msg = update.message
+    assert isinstance(msg, types.Message)
+    # Cached, item access now returns the converted object too
+    assert update.message is msg
+    assert update["message"] is msg
+    assert isinstance(msg.chat, types.Chat)
+    assert msg.text == "hi"
+
+
+def test_shadowed_fields():
+    msg = types.Update.from_json(json.loads(json.dumps(UPDATE))).message
+
+    assert type(msg["from"]) is dict
+    assert isinstance(msg.from_, types.User)
+    assert msg.from_.id == 5
+    assert msg["from"] is msg.from_
+
+
+def test_objects_encode_to_the_same_json():
+    update = types.Update.from_json(json.loads(json.dumps(UPDATE)))
+    assert json.loads(json_codec.dumps(update)) == UPDATE
+
+    # Partly converted
+    update.message.chat
+    assert json.loads(json_codec.dumps(update)) == UPDATE
+
+
+def test_failed_conversion_raises_again():
+    data = json.loads(json.dumps(UPDATE))
+    data["message"]["chat"]["unknown_field"] = 1
+    msg = types.Update.from_json(data).message
+
+    for _ in range(2):
+        with pytest.raises(TypeError):
+            msg.chat
+    assert type(msg["chat"]) is dict
@@ -0,0 +1,71 @@
+import io
+import json
+
+from depytg import Client, aio, methods, types
+
+from conftest import ok, message, run
+
+
+def input_file(content: bytes, name: str = None) -> types.InputFile:
+    return types.InputFile(io.BytesIO(content), "application/octet-stream", name)
+
+
+def album() -> methods.sendMediaGroup:
+    thumb = input_file(b"thumb")
+    return methods.sendMediaGroup(1, [
+        types.InputMediaVideo("video", input_file(b"one", "one.mp4"), thumb=thumb),
+        types.InputMediaVideo("video", input_file(b"two", "two.mp4"), thumb=thumb),
+        types.InputMediaPhoto("photo", "FILE_ID"),
+    ])
+
+
+def check_album_request(api):
+    request, = api.calls("sendMediaGroup")
+    media = json.loads(request.form["media"])
+
+    def attached(value: str) -> bytes:
+        assert value.startswith("attach://")
+        return request.form[value[len("attach://"):]]
+
+    assert [attached(item["media"]) for item in media[:2]] == [b"one", b"two"]
+    assert media[0]["thumb"] == media[1]["thumb"]
+    assert attached(media[0]["thumb"]) == b"thumb"
+    assert media[2]["media"] == "FILE_ID"
+    # The shared thumbnail is only sent once
+    assert len(request.filenames) == 3
+
+
+def test_nested_files_are_sent_in_one_request(api, mode):
+    api.reply("sendMediaGroup", ok([message(), message(), message()]))
+    method = album()
+
+    Client("1:x", **api.client_options())(method)
+
+    check_album_request(api)
+    # The method still holds its files
+    assert isinstance(method["media"][0]["media"], types.InputFile)
+
+
+def test_nested_files_are_sent_in_one_request_async(api):
+    api.reply("sendMediaGroup", ok([message(), message(), message()]))
+
+    async def main():
+        async with aio.AsyncClient("1:x", **api.client_options()) as client:
+            await client.call(album())
+
+    run(main())
+    check_album_request(api)
+
+
+def test_nested_objects_without_files_are_sent_as_json(api):
+    api.reply("sendMediaGroup", ok([message(), message()]))
+
+    Client("1:x", **api.client_options())(methods.sendMediaGroup(1, [
+        types.InputMediaPhoto("photo", "ID1"), types.InputMediaPhoto("photo", "ID2", caption="two")]))
+
+    request, = api.calls("sendMediaGroup")
+    assert not request.filenames
+    # Nested objects are JSON-serialized fields, like in multipart requests
+    media = json.loads(request.form["media"])
+    assert [item["media"] for item in media] == ["ID1", "ID2"]
+    assert media[1]["caption"] == "two"
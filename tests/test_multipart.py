@@ -0,0 +1,71 @@
+import email
+import io
+import os
+
+from depytg import Client, methods
+from depytg.multipart import CHUNK_SIZE, MultipartStream
+from depytg.types import InputFile
+
+DATA = bytes(range(256)) * 1000
+
+
+def stream() -> MultipartStream:
+    return MultipartStream({"chat_id": 1}, {"file0": InputFile(io.BytesIO(DATA), "image/jpeg")}, "boundary")
+
+
+def parse(body: bytes, content_type: str) -> dict:
+    msg = email.message_from_bytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+    return {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+            for part in msg.get_payload()}
+
+
+def test_read_returns_whole_body():
+    body = stream()
+    data = body.read()
+
+    assert len(data) == len(body) > CHUNK_SIZE
+    assert body.read() == b""
+    assert parse(data, body.content_type) == {"chat_id": b"1", "file0": DATA}
+
+
+def test_read_in_chunks():
+    body = stream()
+    chunks = list(iter(lambda: body.read(1000), b""))
+
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert b"".join(chunks) == stream().read(-1)
+
+
+def test_length_counts_from_file_position():
+    f = io.BytesIO(DATA)
+    f.seek(1000)
+    body = MultipartStream({}, {"file0": InputFile(f, "image/jpeg")})
+
+    data = body.read()
+    assert len(data) == len(body)
+    assert parse(data, body.content_type) == {"file0": DATA[1000:]}
+
+
+def test_unseekable_files_are_buffered():
+    r, w = os.pipe()
+    os.write(w, DATA[:1000])
+    os.close(w)
+
+    with open(r, "rb") as f:
+        body = MultipartStream({}, {"file0": InputFile(f, "image/jpeg")})
+        data = body.read()
+
+    assert len(data) == len(body)
+    assert parse(data, body.content_type) == {"file0": DATA[:1000]}
+
+
+def test_upload_from_pipe(api):
+    r, w = os.pipe()
+    os.write(w, b"photo")
+    os.close(w)
+
+    with open(r, "rb") as f:
+        Client("1:x", **api.client_options())(methods.sendPhoto(1, InputFile(f, "image/jpeg", "cat.jpg")))
+
+    request, = api.calls("sendPhoto")
+    assert request.form[request.form["photo"][len("attach://"):]] == b"photo"
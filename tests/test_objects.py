@@ -0,0 +1,41 @@
+import gc
+import sys
+
+import pytest
+
+from depytg import types
+
+resource = pytest.importorskip("resource")
+
+
+def _peak_memory() -> int:
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _build(n: int):
+    for i in range(n):
+        types.User(i, False, "name")
+
+
+@pytest.mark.parametrize("n", [100000, pytest.param(1000000, marks=pytest.mark.slow)])
+def test_constructing_objects_doesnt_grow_memory(n):
+    # Warm up per-class caches (schema, decoders) before measuring
+    _build(1000)
+    gc.collect()
+
+    blocks, peak = sys.getallocatedblocks(), _peak_memory()
+    _build(n)
+    gc.collect()
+
+    # Constructors used to append every object's field names to a list shared by all objects, growing by about
+    # 40 bytes per object
+    assert sys.getallocatedblocks() - blocks < 1000
+    assert _peak_memory() - peak < 1024 * 1024
+
+
+def test_dir_lists_fields():
+    user = types.User(1, False, "name")
+    assert {"id", "is_bot", "first_name", "username"} <= set(dir(user))
+    assert dir(user) == dir(types.User(2, True, "other"))
@@ -0,0 +1,46 @@
+from depytg import Client
+from depytg.polling import UpdatePoller
+
+from conftest import error, ok, message
+
+
+def test_unknown_updates_are_skipped(api, mode):
+    api.reply("getUpdates", ok([
+        {"update_id": 10, "my_chat_member": {"chat": {"id": 1, "type": "private"}}},
+        {"update_id": 11, "message": message(text="hi")},
+    ]))
+    poller = UpdatePoller(Client("1:x", **api.client_options()), timeout=0, pipeline=False)
+
+    for update in poller:
+        assert update["update_id"] == 11
+        assert update["message"]["text"] == "hi"
+        poller.stop()
+
+    assert poller.offset == 12
+
+
+def test_repeated_updates_are_skipped(api):
+    api.reply("getUpdates", ok([{"update_id": 10, "message": message(text="a")}]),
+              ok([{"update_id": 10, "message": message(text="a")}, {"update_id": 11, "message": message(text="b")}]))
+    poller = UpdatePoller(Client("1:x", **api.client_options()), timeout=0, pipeline=False, dedup_size=10)
+
+    received = []
+    for update in poller:
+        received.append(update["update_id"])
+        if update["update_id"] == 11:
+            poller.stop()
+
+    assert received == [10, 11]
+    assert api.calls("getUpdates")[1].form["offset"] == 11
+
+
+def test_flood_wait_without_retry_after_is_retried(api):
+    api.reply("getUpdates", error(429, "Too Many Requests"), ok([{"update_id": 10, "message": message(text="a")}]))
+    client = Client("1:x", retry_policy=None, **api.client_options())
+    poller = UpdatePoller(client, timeout=0, pipeline=False, retry_delay=0.01)
+
+    for update in poller:
+        assert update["update_id"] == 10
+        poller.stop()
+
+    assert len(api.calls("getUpdates")) == 2
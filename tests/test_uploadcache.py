@@ -0,0 +1,167 @@
+import io
+import json
+import os
+from typing import Union
+
+import pytest
+
+from depytg import Client, methods, types
+from depytg.internals import TelegramMethodBase
+from depytg.uploadcache import MemoryUploadCache, SQLiteUploadCache, UploadCache
+
+from conftest import error, ok, message
+
+
+class editMessageMedia(TelegramMethodBase):
+    # Not in this version of the API yet, sends a single InputMedia
+    ReturnType = types.Message
+
+    def __init__(self, chat_id: Union[int, str], message_id: int, media: types.InputMedia):
+        super().__init__()
+
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.media = media
+
+
+def input_file(content: bytes) -> types.InputFile:
+    return types.InputFile(io.BytesIO(content), "application/octet-stream")
+
+
+def photo(content: bytes = b"photo") -> types.InputFile:
+    return types.InputFile(io.BytesIO(content), "image/jpeg", "cat.jpg")
+
+
+def sent(request, value):
+    """
+    Returns the content of an uploaded file, or the value sent in its place.
+    """
+    if isinstance(value, str) and value.startswith("attach://"):
+        return request.form[value[len("attach://"):]]
+    return value
+
+
+def sent_photos(api) -> list:
+    return [sent(r, r.form["photo"]) for r in api.calls("sendPhoto")]
+
+
+def sent_photo(file_id: str) -> dict:
+    return ok(message(photo=[{"file_id": file_id + "-small", "width": 1, "height": 1},
+                             {"file_id": file_id, "width": 10, "height": 10}]))
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryUploadCache()
+    else:
+        cache = SQLiteUploadCache(str(tmp_path / "uploads.db"))
+        yield cache
+        cache.close()
+
+
+def test_second_upload_is_sent_by_file_id(api, cache):
+    api.reply("sendPhoto", sent_photo("P1"), sent_photo("P1"))
+    client = Client("1:x", upload_cache=cache, **api.client_options())
+
+    client(methods.sendPhoto(1, photo()))
+    method = methods.sendPhoto(1, photo())
+    client(method)
+
+    assert sent_photos(api) == [b"photo", "P1"]
+    # The caller's method still holds its file
+    assert isinstance(method["photo"], types.InputFile)
+
+
+def test_different_content_is_uploaded(api, cache):
+    api.reply("sendPhoto", sent_photo("P1"), sent_photo("P2"))
+    client = Client("1:x", upload_cache=cache, **api.client_options())
+
+    client(methods.sendPhoto(1, photo(b"one")))
+    client(methods.sendPhoto(1, photo(b"two")))
+
+    assert sent_photos(api) == [b"one", b"two"]
+
+
+def test_rejected_file_id_is_uploaded_again(api, cache):
+    api.reply("sendPhoto", sent_photo("P1"), error(400, "Bad Request: wrong file identifier"), sent_photo("P2"))
+    client = Client("1:x", upload_cache=cache, **api.client_options())
+
+    client(methods.sendPhoto(1, photo()))
+    client(methods.sendPhoto(1, photo()))
+
+    assert sent_photos(api) == [b"photo", "P1", b"photo"]
+    # The new file_id replaces the rejected one
+    prepared, _ = cache.prepare(methods.sendPhoto(1, photo()))
+    assert prepared["photo"] == "P2"
+
+
+def test_media_group_items_are_cached(api):
+    api.reply("sendMediaGroup", ok([message(photo=[{"file_id": "P1", "width": 1, "height": 1}]),
+                                    message(photo=[{"file_id": "P2", "width": 1, "height": 1}])]))
+    client = Client("1:x", upload_cache=MemoryUploadCache(), **api.client_options())
+    client(methods.sendMediaGroup(1, [types.InputMediaPhoto("photo", photo(b"one")),
+                                      types.InputMediaPhoto("photo", photo(b"two"))]))
+
+    media = [types.InputMediaPhoto("photo", photo(b"two")), types.InputMediaPhoto("photo", photo(b"three"))]
+    client(methods.sendMediaGroup(1, media))
+
+    request = api.calls("sendMediaGroup")[1]
+    assert [sent(request, item["media"]) for item in json.loads(request.form["media"])] == ["P2", b"three"]
+    assert isinstance(media[0]["media"], types.InputFile)
+
+
+def test_single_media_object_is_cached(api):
+    api.reply("editMessageMedia", sent_photo("P1"))
+    cache = MemoryUploadCache()
+    client = Client("1:x", upload_cache=cache, **api.client_options())
+
+    media = types.InputMediaPhoto("photo", photo())
+    client(editMessageMedia(1, 1, media))
+
+    prepared, _ = cache.prepare(editMessageMedia(1, 1, types.InputMediaPhoto("photo", photo())))
+    assert prepared["media"]["media"] == "P1"
+    assert isinstance(media["media"], types.InputFile)
+
+
+def test_invalid_table_name(tmp_path):
+    with pytest.raises(ValueError):
+        SQLiteUploadCache(str(tmp_path / "uploads.db"), table='uploads"; DROP TABLE x; --')
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        UploadCache()
+
+
+def test_retry_rewinds_uncached_files(api):
+    video = {"file_id": "V1", "width": 1, "height": 1, "duration": 1}
+    api.reply("sendVideo", ok(message(video=video)), error(400, "Bad Request: wrong file identifier"),
+              ok(message(video=video)))
+    client = Client("1:x", upload_cache=MemoryUploadCache(), **api.client_options())
+
+    def send():
+        client(methods.sendVideo(1, input_file(b"VIDEO"), thumb=input_file(b"THUMB")))
+
+    send()
+    send()
+
+    retried = api.calls("sendVideo")[2]
+    assert sent(retried, retried.form["video"]) == b"VIDEO"
+    assert sent(retried, retried.form["thumb"]) == b"THUMB"
+
+
+def test_unseekable_files_arent_cached():
+    r, w = os.pipe()
+    os.write(w, b"photo")
+    os.close(w)
+    cache = MemoryUploadCache()
+
+    with open(r, "rb") as f:
+        method = methods.sendPhoto(1, types.InputFile(f, "image/jpeg"))
+        prepared, uploads = cache.prepare(method)
+
+        assert prepared["photo"] is method["photo"]
+        assert list(uploads) == []
+        # Nothing was read
+        assert f.read() == b"photo"
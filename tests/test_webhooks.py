@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+
+import pytest
+
+from depytg.webhooks import asgi
+
+from conftest import message, run
+
+
+def update(update_id: int, chat_id: int = 1) -> bytes:
+    return json.dumps({"update_id": update_id, "message": message(chat={"id": chat_id, "type": "private"})}).encode()
+
+
+def asgi_post(app, body: bytes, headers: list = None) -> int:
+    """
+    Sends a request to an ASGI app, returning the response's status.
+    """
+    scope = {"type": "http", "method": "POST", "path": "/hook/", "headers": headers or []}
+    messages = [{"type": "http.request", "body": body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    run(app(scope, receive, send))
+    return sent[0]["status"]
+
+
+def flask_app(on_update, **options):
+    flask = pytest.importorskip("depytg.webhooks.flask")
+    return flask.get_app("bot", "hook", on_update, **options)
+
+
+def test_flask_rejects_malformed_body():
+    received = []
+    client = flask_app(received.append).test_client()
+
+    assert client.post("/hook/", data=b"{not json").status_code == 400
+    assert client.post("/hook/", data=update(1)).status_code == 200
+    assert [u["update_id"] for u in received] == [1]
+
+
+def test_flask_max_body_size():
+    client = flask_app(lambda u: None, max_body_size=50).test_client()
+
+    assert client.post("/hook/", data=update(1)).status_code == 413
+    assert client.post("/hook/", data=b'{"update_id": 1}').status_code == 200
+
+
+def test_asgi_max_body_size():
+    received = []
+
+    async def on_update(u):
+        received.append(u["update_id"])
+
+    app = asgi.get_app("bot", "hook", on_update, max_body_size=50)
+
+    assert asgi_post(app, update(1), [(b"content-length", str(len(update(1))).encode())]) == 413
+    # Without a content-length header the limit is enforced while reading
+    assert asgi_post(app, update(2)) == 413
+    assert asgi_post(app, b'{"update_id": 3}', [(b"content-length", b"16")]) == 200
+    assert received == [3]
+
+
+def test_asgi_rejects_malformed_requests():
+    async def on_update(u):
+        pass
+
+    app = asgi.get_app("bot", "hook", on_update, max_body_size=50)
+
+    assert asgi_post(app, b'{"update_id": 1}', [(b"content-length", b"sixteen")]) == 400
+    assert asgi_post(app, b"{not json") == 400
+
+
+def test_aiohttp_max_body_size():
+    aiohttp = pytest.importorskip("depytg.webhooks.aiohttp")
+
+    async def on_update(u):
+        pass
+
+    assert aiohttp.get_app("bot", "hook", on_update, max_body_size=50)._client_max_size == 50
+
+
+def test_flask_workers_handle_updates_after_replying():
+    release = threading.Event()
+    handled = []
+
+    def on_update(u):
+        release.wait(5)
+        handled.append(u["update_id"])
+
+    client = flask_app(on_update, workers=2).test_client()
+    for i in range(3):
+        assert client.post("/hook/", data=update(i)).status_code == 200
+    # Replied before handling
+    assert handled == []
+
+    release.set()
+    for _ in range(100):
+        if len(handled) == 3:
+            break
+        time.sleep(0.01)
+    assert handled == [0, 1, 2]
+
+
+@pytest.mark.parametrize("overflow, status", [("reject", 503), ("drop", 200)])
+def test_flask_overflow(overflow, status):
+    release = threading.Event()
+    handled = []
+
+    def on_update(u):
+        release.wait(5)
+        handled.append(u["update_id"])
+
+    client = flask_app(on_update, workers=1, queue_size=1, overflow=overflow, dedup_size=10).test_client()
+    assert client.post("/hook/", data=update(1)).status_code == 200
+    assert client.post("/hook/", data=update(2)).status_code == status
+
+    release.set()
+    for _ in range(100):
+        if handled:
+            break
+        time.sleep(0.01)
+    if overflow == "reject":
+        # Telegram sends rejected updates again, they aren't taken for repeats
+        assert client.post("/hook/", data=update(2)).status_code == 200
+        for _ in range(100):
+            if len(handled) == 2:
+                break
+            time.sleep(0.01)
+        assert handled == [1, 2]
+    else:
+        time.sleep(0.05)
+        assert handled == [1]